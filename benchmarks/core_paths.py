@@ -0,0 +1,191 @@
+"""Time the core application paths against synthetic order histories
+
+Run from the repository root:
+
+    python benchmarks/core_paths.py --sizes 10000 100000 --output results.json
+    python benchmarks/core_paths.py --sizes 10000 100000 --baseline results.json
+
+Each size gets a fresh dataset in a temporary directory. The timings cover
+the work behind load_data, save_data, the dashboard metrics,
+update_orders_display (a virtualized Treeview) and every generate_*_report
+method, including the columnar analytics report (vectorized when NumPy is
+installed), with the report cache cleared, reopening a cached report and
+indexing and searching the menu for the Quick Order picker.
+Rows are inserted into a real Treeview only when a display is available. With
+--baseline the run fails if any timing is slower than the baseline by more
+than --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dataset import generate_data, write_dataset
+from restaurant_engine import RestaurantEngine, order_list_row
+from restaurant_search import MenuIndex
+from restaurant_storage import STORAGE_BACKENDS, open_store
+
+
+def best_of(repeat, func):
+    """Run func repeat times and return the fastest time in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def open_treeview():
+    # A VirtualTreeview like the one on the orders screen, or None without a display
+    try:
+        import tkinter as tk
+        from restaurant_widgets import VirtualTreeview
+        root = tk.Tk()
+    except Exception:
+        return None
+    root.withdraw()
+    columns = ('ID', 'Table', 'Customer', 'Items', 'Total', 'Status', 'Time')
+    return VirtualTreeview(root, columns, order_list_row, lambda order: order['id'])
+
+
+def fill_treeview(tree, orders):
+    # The same work as update_orders_display; without a display only the
+    # rows a window would show are formatted
+    if tree is not None:
+        tree.set_rows(orders)
+    else:
+        for order in orders[:30]:
+            order_list_row(order)
+
+
+def uncached(engine, report):
+    """Wrap a report so every call builds it instead of reading the report cache"""
+    def build():
+        engine.reports.clear()
+        return report()
+    return build
+
+
+def run_size(order_count, backend, repeat, tree, options):
+    """Time every core path for one dataset size"""
+    today = date.today().strftime('%Y-%m-%d')
+    timings = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_file = os.path.join(tmp_dir, STORAGE_BACKENDS[backend][1])
+        write_dataset(generate_data(order_count), backend, data_file, **options)
+
+        def load():
+            engine = RestaurantEngine(open_store(backend, data_file, **options))
+            engine.load(today)
+            engine.close()
+
+        timings['load_data'] = best_of(repeat, load)
+
+        engine = RestaurantEngine(open_store(backend, data_file, **options))
+        engine.load(today)
+        timings['save_data'] = best_of(repeat, engine.save)
+        timings['dashboard_metrics'] = best_of(repeat, lambda: engine.dashboard_metrics(today))
+        timings['update_orders_display_today'] = best_of(
+            repeat, lambda: fill_treeview(tree, engine.recent_orders(today, today)))
+
+        # The first report or 'All' listing pulls the whole history into memory
+        timings['load_history'] = best_of(1, engine.orders_in_range)
+        timings['update_orders_display_all'] = best_of(
+            repeat, lambda: fill_treeview(tree, engine.recent_orders()))
+        timings['generate_sales_report'] = best_of(repeat, uncached(engine, lambda: engine.sales_report(today)))
+        timings['generate_inventory_report'] = best_of(repeat, uncached(engine, engine.inventory_report))
+        timings['generate_customer_report'] = best_of(repeat, uncached(engine, engine.customer_report))
+        timings['generate_financial_report'] = best_of(repeat, uncached(engine, engine.financial_report))
+        timings['build_order_columns'] = best_of(1, engine.order_columns)
+        timings['generate_analytics_report'] = best_of(repeat, uncached(engine, engine.analytics_report))
+        # Reopening a report on unchanged data is served from the report cache
+        engine.sales_report(today)
+        timings['reopen_sales_report'] = best_of(repeat, lambda: engine.sales_report(today))
+        timings['quick_order_menu_search'] = best_of(repeat, lambda: MenuIndex(engine.data['menu']).search('chi'))
+
+        specs = [{'items': order['items'], 'table': order['table'], 'customer': order['customer'],
+                  'date': today, 'status': 'completed'} for order in engine.recent_orders(today, today)[:1000]]
+
+        def ingest():
+            engine.create_orders_batch(specs)
+            engine.flush()
+
+        if specs:
+            timings['create_orders_batch_per_order'] = best_of(repeat, ingest) / len(specs)
+        engine.close()
+    return timings
+
+
+def compare(results, baseline, tolerance, min_delta=0.001):
+    """List the timings that got slower than the baseline by more than tolerance
+
+    Slowdowns under min_delta seconds are ignored as timer noise.
+    """
+    previous = {(r['backend'], r['orders']): r['timings'] for r in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get((result['backend'], result['orders']), {})
+        for name, seconds in result['timings'].items():
+            if name in old and seconds - old[name] > max(old[name] * tolerance, min_delta):
+                regressions.append(f"{result['backend']} {result['orders']} orders {name}: "
+                                   f"{old[name] * 1000:.1f} ms -> {seconds * 1000:.1f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help="order counts to benchmark")
+    parser.add_argument('--backend', choices=sorted(STORAGE_BACKENDS), default='json')
+    parser.add_argument('--snapshot-format', choices=['json', 'binary'], default='json',
+                        help="snapshot format of the json backend")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per timing, the fastest is kept")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--baseline', help="results file of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="allowed slowdown against the baseline, as a fraction")
+    args = parser.parse_args()
+
+    options = {'save_window': 0}
+    if args.backend == 'json':
+        options['snapshot_format'] = args.snapshot_format
+    tree = open_treeview()
+
+    results = []
+    for size in args.sizes:
+        timings = run_size(size, args.backend, args.repeat, tree, options)
+        results.append({'backend': args.backend, 'orders': size, 'timings': timings})
+        print(f"{size} orders ({args.backend})")
+        for name, seconds in timings.items():
+            print(f"  {name:32} {seconds * 1000:10.2f} ms")
+
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'treeview': tree is not None,
+        'options': options,
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""Generate a synthetic restaurant with a realistic order history
+
+Run from the repository root to write a dataset the application can open:
+
+    python benchmarks/dataset.py --orders 100000 --backend json restaurant_data.json
+"""
+import argparse
+import os
+import random
+import sys
+from collections import defaultdict
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from restaurant_analytics import build_customer_stats, build_rollups, rollup_range
+from restaurant_engine import RestaurantEngine, empty_data
+from restaurant_storage import STORAGE_BACKENDS, open_store
+
+MENU = {
+    'Appetizers': [('Spring Rolls', 5.99, 1.8), ('Garlic Bread', 4.49, 1.0), ('Samosa', 3.99, 0.9),
+                   ('Chicken Wings', 8.99, 3.5), ('Soup of the Day', 6.49, 1.9), ('Nachos', 7.49, 2.4),
+                   ('Bruschetta', 6.99, 2.0), ('Calamari', 9.49, 3.8)],
+    'Main Courses': [('Burger', 12.99, 5.0), ('Pizza', 15.99, 6.0), ('Pasta', 13.99, 4.5),
+                     ('Steak', 24.99, 12.0), ('Biryani', 14.49, 5.2), ('Karahi', 18.99, 7.5),
+                     ('Grilled Fish', 19.99, 8.0), ('Club Sandwich', 10.99, 3.9), ('Curry Bowl', 12.49, 4.1),
+                     ('Veggie Wrap', 9.99, 3.0)],
+    'Desserts': [('Cake', 6.49, 2.2), ('Ice Cream', 4.99, 1.4), ('Kheer', 5.49, 1.5),
+                 ('Brownie', 5.99, 1.7), ('Cheesecake', 7.49, 2.6)],
+    'Beverages': [('Soda', 2.99, 0.5), ('Coffee', 3.49, 0.6), ('Tea', 2.49, 0.3), ('Lassi', 3.99, 0.9),
+                  ('Fresh Juice', 4.49, 1.3), ('Water', 1.49, 0.2)],
+}
+
+FIRST_NAMES = ['Ali', 'Sara', 'Omar', 'Ayesha', 'Bilal', 'Fatima', 'Hassan', 'Zara', 'Usman', 'Hina',
+               'John', 'Maria', 'David', 'Emma', 'Chen', 'Priya', 'Lucas', 'Noor', 'Ibrahim', 'Mina']
+LAST_NAMES = ['Khan', 'Ahmed', 'Malik', 'Hussain', 'Smith', 'Garcia', 'Lee', 'Patel', 'Silva', 'Raza']
+EXPENSES = [('Produce delivery', 'Supplies', 80, 400), ('Meat and fish', 'Supplies', 150, 700),
+            ('Utilities', 'Utilities', 60, 250), ('Cleaning supplies', 'Supplies', 20, 90),
+            ('Equipment repair', 'Maintenance', 50, 600), ('Rent installment', 'Rent', 300, 900)]
+POSITIONS = ['Chef', 'Cook', 'Waiter', 'Cashier', 'Manager', 'Cleaner']
+
+
+def generate_data(order_count, seed=1, days=365, today=None):
+    """Build a data dict with a menu, stock, staff, customers, expenses and order_count orders
+
+    Orders are spread over the `days` days up to and including today, with
+    the last few of today still in the kitchen.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    data = empty_data()
+
+    menu_items = []
+    for category, items in MENU.items():
+        data['menu'][category] = [{'name': name, 'price': price, 'cost': cost} for name, price, cost in items]
+        menu_items.extend(data['menu'][category])
+    for item in menu_items:
+        data['inventory'][item['name']] = {
+            'quantity': rng.randint(0, 120),
+            'unit': 'servings',
+            'min_stock': 10
+        }
+
+    customer_count = min(max(order_count // 20, 50), 5000)
+    data['customers'] = [{
+        'id': number,
+        'name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {number}",
+        'phone': f"03{rng.randint(0, 99):02d}-{rng.randint(1000000, 9999999)}",
+        'email': f"customer{number}@example.com",
+        'loyalty_points': 0,
+        'visits': 0
+    } for number in range(1, customer_count + 1)]
+
+    data['employees'] = [{
+        'id': number,
+        'name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        'position': rng.choice(POSITIONS),
+        'email': f"staff{number}@example.com",
+        'phone': f"03{rng.randint(0, 99):02d}-{rng.randint(1000000, 9999999)}",
+        'salary': float(rng.randint(300, 1500)),
+        'status': 'active'
+    } for number in range(1, 26)]
+
+    day_list = [(today - timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(days - 1, -1, -1)]
+    for day in day_list:
+        for _ in range(rng.randint(1, 4)):
+            description, category, low, high = rng.choice(EXPENSES)
+            data['expenses'].append({'description': description, 'amount': float(rng.randint(low, high)),
+                                     'category': category, 'date': day})
+
+    orders = []
+    daily_sales = defaultdict(float)
+    for number in range(order_count):
+        day = day_list[number * days // order_count]
+        items = [dict(rng.choice(menu_items)) for _ in range(rng.randint(1, 5))]
+        customer = rng.choice(data['customers']) if rng.random() < 0.4 else None
+        order = {
+            'id': number + 1,
+            'table': str(rng.randint(1, 10)),
+            'customer': customer['name'] if customer else 'Walk-in',
+            'items': items,
+            'total': sum(item['price'] for item in items),
+            'date': day,
+            'time': f"{rng.randint(11, 22):02d}:{rng.randint(0, 59):02d}",
+            'status': 'completed'
+        }
+        if customer:
+            order['customer_id'] = customer['id']
+        orders.append(order)
+        daily_sales[day] += order['total']
+
+    # The most recent orders are still being prepared
+    for order in orders[-min(5, len(orders)):]:
+        if order['date'] == day_list[-1]:
+            order['status'] = 'active'
+            data['kitchen_orders'].append(order)
+
+    data['orders'] = orders
+    data['daily_sales'] = daily_sales
+    data['next_order_id'] = order_count + 1
+    data['rollups'] = build_rollups(orders)
+    data['item_sales'] = rollup_range(data['rollups'])['items']
+    data['next_customer_id'] = customer_count + 1
+    data['customer_stats'] = build_customer_stats(orders, {})
+    return data
+
+
+def write_dataset(data, backend='json', data_file=None, **options):
+    """Save a generated data dict as a fresh store and return its file name"""
+    data_file = data_file or STORAGE_BACKENDS[backend][1]
+    engine = RestaurantEngine(open_store(backend, data_file, **options))
+    engine.data = data
+    engine.save()
+    engine.close()
+    return data_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('data_file', nargs='?', help="file to write, the backend's usual file by default")
+    parser.add_argument('--orders', type=int, default=10000, help="number of orders to generate")
+    parser.add_argument('--days', type=int, default=365, help="number of days the orders span")
+    parser.add_argument('--seed', type=int, default=1, help="random seed")
+    parser.add_argument('--backend', choices=sorted(STORAGE_BACKENDS), default='json')
+    args = parser.parse_args()
+
+    data = generate_data(args.orders, seed=args.seed, days=args.days)
+    data_file = write_dataset(data, args.backend, args.data_file)
+    print(f"Wrote {args.orders} orders to {data_file}")
+
+
+if __name__ == '__main__':
+    main()
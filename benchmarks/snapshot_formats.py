@@ -0,0 +1,78 @@
+"""Compare the JSON and binary snapshot formats on save time, load time and size
+
+Run from the repository root:
+
+    python benchmarks/snapshot_formats.py --sizes 10000 100000 1000000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dataset import generate_data
+from restaurant_storage import decode_snapshot, encode_snapshot
+
+
+def time_json(data, path):
+    # The layout the application originally saved with
+    start = time.perf_counter()
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, default=str)
+    save_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with open(path, 'r') as f:
+        loaded = json.load(f)
+    load_seconds = time.perf_counter() - start
+    return save_seconds, load_seconds, os.path.getsize(path), loaded
+
+
+def time_binary(data, path):
+    start = time.perf_counter()
+    with open(path, 'wb') as f:
+        f.write(encode_snapshot(data))
+    save_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        loaded = decode_snapshot(f.read())
+    load_seconds = time.perf_counter() - start
+    return save_seconds, load_seconds, os.path.getsize(path), loaded
+
+
+def run(sizes):
+    """Time both formats for each order count and return the results"""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            data = generate_data(size)
+            for name, timer in (('json', time_json), ('binary', time_binary)):
+                save_seconds, load_seconds, file_size, loaded = timer(data, os.path.join(tmp_dir, name))
+                if loaded['orders'] != data['orders']:
+                    raise AssertionError("%s snapshot did not round-trip" % name)
+                results.append({'orders': size, 'format': name, 'save_seconds': save_seconds,
+                                'load_seconds': load_seconds, 'bytes': file_size})
+                print("%9d orders  %-6s  save %7.3fs  load %7.3fs  %8.1f MB" % (
+                    size, name, save_seconds, load_seconds, file_size / 1e6))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help="order counts to benchmark")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.sizes)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
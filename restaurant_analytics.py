@@ -0,0 +1,288 @@
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, timedelta
+from operator import itemgetter
+
+EXPENSE_CATEGORIES = ('Supplies', 'Utilities', 'Payroll', 'Rent', 'Maintenance', 'Marketing', 'Other')
+PERIODS = ('day', 'week', 'month', 'year', 'all')
+
+
+class DailyTotals:
+    """Amounts per day with running totals, for sums over any date range
+
+    The days are kept sorted next to a running total, so the sum between
+    two dates is two binary searches. Adding to the latest day, the usual
+    case, is O(1); back-dated amounts shift the running totals after them.
+    """
+
+    def __init__(self, amounts=None):
+        self.days = []
+        self.running = []
+        self.amounts = {}
+        for day in sorted(amounts or {}):
+            self.add(day, amounts[day])
+
+    def add(self, day, amount):
+        """Add an amount to a day"""
+        if day in self.amounts:
+            position = bisect_left(self.days, day)
+        elif not self.days or day > self.days[-1]:
+            self.days.append(day)
+            self.running.append(self.running[-1] if self.running else 0.0)
+            position = len(self.days) - 1
+        else:
+            position = bisect_left(self.days, day)
+            self.days.insert(position, day)
+            self.running.insert(position, self.running[position - 1] if position else 0.0)
+        self.amounts[day] = self.amounts.get(day, 0) + amount
+        for index in range(position, len(self.running)):
+            self.running[index] += amount
+
+    def total(self, start=None, end=None):
+        """Sum of the amounts between two dates (inclusive)"""
+        first = 0 if start is None else bisect_left(self.days, start)
+        last = len(self.days) if end is None else bisect_right(self.days, end)
+        if last <= first:
+            return 0.0
+        return self.running[last - 1] - (self.running[first - 1] if first else 0.0)
+
+
+class ExpenseLedger:
+    """Expenses indexed by date and category
+
+    Keeps running per-day totals overall and per category, and the
+    expenses of every day, so period totals cost O(log n) and the most
+    recent expenses come out in date order without sorting the list.
+    """
+
+    def __init__(self, expenses=()):
+        self.totals = DailyTotals()
+        self.category_totals = {}
+        self.by_day = {}
+        self.days = []
+        for expense in expenses:
+            self.add(expense)
+
+    def add(self, expense):
+        """Record an expense"""
+        day = expense['date']
+        category = expense_category(expense)
+        self.totals.add(day, expense['amount'])
+        self.category_totals.setdefault(category, DailyTotals()).add(day, expense['amount'])
+        if day not in self.by_day:
+            insort(self.days, day)
+            self.by_day[day] = []
+        self.by_day[day].append(expense)
+
+    def total(self, start=None, end=None):
+        """Expenses between two dates (inclusive)"""
+        return self.totals.total(start, end)
+
+    def by_category(self, start=None, end=None):
+        """Expenses per category between two dates (inclusive), largest first"""
+        amounts = ((category, totals.total(start, end)) for category, totals in self.category_totals.items())
+        return sorted(((category, amount) for category, amount in amounts if amount),
+                      key=itemgetter(1), reverse=True)
+
+    def recent(self, count=10):
+        """The latest expenses, newest first"""
+        expenses = []
+        for day in reversed(self.days):
+            expenses.extend(reversed(self.by_day[day]))
+            if len(expenses) >= count:
+                break
+        return expenses[:count]
+
+
+def expense_category(expense):
+    """Category of an expense; expenses recorded before categories are 'Other'"""
+    return expense.get('category') or 'Other'
+
+
+def period_range(period, today):
+    """First and last day of the day, week, month or year containing today, or (None, None) for 'all'"""
+    current = date.fromisoformat(today)
+    if period == 'day':
+        start = current
+    elif period == 'week':
+        start = current - timedelta(days=current.weekday())
+    elif period == 'month':
+        start = current.replace(day=1)
+    elif period == 'year':
+        start = current.replace(month=1, day=1)
+    elif period == 'all':
+        return None, None
+    else:
+        raise ValueError(f"Unknown period: {period}")
+    return start.isoformat(), today
+
+
+class SalesMetrics:
+    """Running order and revenue totals behind the dashboard and sidebar
+
+    Rebuilt once from the per-day order counts and daily_sales when data is
+    loaded, then kept current in O(1) per order.
+    """
+
+    def __init__(self):
+        self.total_orders = 0
+        self.total_revenue = 0.0
+        self.day_orders = {}
+        self.day_revenue = {}
+        self.revenue_totals = DailyTotals()
+
+    def rebuild(self, day_orders, daily_sales):
+        """Start over from per-day order counts and revenue"""
+        self.day_orders = dict(day_orders)
+        self.day_revenue = dict(daily_sales)
+        self.revenue_totals = DailyTotals(self.day_revenue)
+        self.total_orders = sum(self.day_orders.values())
+        self.total_revenue = sum(self.day_revenue.values())
+
+    def add_order(self, order):
+        """Count a newly created order"""
+        day = order['date']
+        self.day_orders[day] = self.day_orders.get(day, 0) + 1
+        self.day_revenue[day] = self.day_revenue.get(day, 0) + order['total']
+        self.revenue_totals.add(day, order['total'])
+        self.total_orders += 1
+        self.total_revenue += order['total']
+
+    def count_orders(self, date=None):
+        """Number of orders, optionally on a single day"""
+        if date is None:
+            return self.total_orders
+        return self.day_orders.get(date, 0)
+
+    def revenue_in_range(self, start=None, end=None):
+        """Revenue between two dates (inclusive)"""
+        return self.revenue_totals.total(start, end)
+
+    def summary(self, today):
+        """Revenue and order figures for the dashboard"""
+        return {
+            'total_revenue': self.total_revenue,
+            'total_orders': self.total_orders,
+            'avg_order': self.total_revenue / self.total_orders if self.total_orders > 0 else 0,
+            'today_orders': self.day_orders.get(today, 0),
+            'today_revenue': self.day_revenue.get(today, 0)
+        }
+
+
+# Rollups are plain dicts so they can be stored with the rest of the data:
+# {'days': {'YYYY-MM-DD': bucket}, 'hours': {'YYYY-MM-DD HH': bucket}}
+# where every bucket holds the order count, revenue, item quantities and
+# revenue per table of the orders taken in that day or hour.
+
+def new_bucket():
+    """An empty rollup bucket"""
+    return {'orders': 0, 'revenue': 0.0, 'items': {}, 'tables': {}}
+
+
+def add_to_bucket(bucket, order):
+    """Count an order in a rollup bucket"""
+    bucket['orders'] += 1
+    bucket['revenue'] += order['total']
+    items = bucket['items']
+    for item in order['items']:
+        items[item['name']] = items.get(item['name'], 0) + 1
+    table = str(order.get('table'))
+    bucket['tables'][table] = bucket['tables'].get(table, 0) + order['total']
+
+
+def order_buckets(order):
+    """The day and hour bucket keys an order falls into"""
+    return order['date'], f"{order['date']} {order.get('time', '00:00')[:2]}"
+
+
+def add_to_rollups(rollups, order):
+    """Count an order in its day and hour buckets"""
+    day, hour = order_buckets(order)
+    add_to_bucket(rollups['days'].setdefault(day, new_bucket()), order)
+    add_to_bucket(rollups['hours'].setdefault(hour, new_bucket()), order)
+
+
+def build_rollups(orders):
+    """Build the day and hour rollups from raw orders"""
+    rollups = {'days': {}, 'hours': {}}
+    for order in orders:
+        add_to_rollups(rollups, order)
+    return rollups
+
+
+def merge_buckets(buckets):
+    """Combine rollup buckets into one"""
+    merged = new_bucket()
+    for bucket in buckets:
+        merged['orders'] += bucket['orders']
+        merged['revenue'] += bucket['revenue']
+        for name, quantity in bucket['items'].items():
+            merged['items'][name] = merged['items'].get(name, 0) + quantity
+        for table, revenue in bucket['tables'].items():
+            merged['tables'][table] = merged['tables'].get(table, 0) + revenue
+    return merged
+
+
+def rollup_range(rollups, start=None, end=None):
+    """One bucket covering the days between start and end (inclusive)"""
+    return merge_buckets(bucket for day, bucket in rollups['days'].items()
+                         if (start is None or day >= start) and (end is None or day <= end))
+
+
+def hourly_orders(rollups, day):
+    """Order count and revenue per hour of one day, as {'HH': (orders, revenue)}"""
+    hours = {}
+    for hour in range(24):
+        bucket = rollups['hours'].get(f"{day} {hour:02d}")
+        if bucket is not None:
+            hours[f"{hour:02d}"] = (bucket['orders'], bucket['revenue'])
+    return hours
+
+
+def add_item_sales(item_sales, order):
+    """Count the items of an order in a lifetime {name: quantity} counter"""
+    for item in order['items']:
+        item_sales[item['name']] = item_sales.get(item['name'], 0) + 1
+
+
+def top_items(item_sales, k=10):
+    """The k best-selling (name, quantity) pairs, best first"""
+    return heapq.nlargest(k, item_sales.items(), key=itemgetter(1))
+
+
+def top_items_in_range(rollups, start=None, end=None, k=10):
+    """The k best-selling items between two dates (inclusive), from the day rollups"""
+    return top_items(rollup_range(rollups, start, end)['items'], k)
+
+
+def add_customer_order(customer_stats, order):
+    """Count an order towards its customer's lifetime spend, order count and last visit
+
+    customer_stats maps str(customer id) to the customer's totals; orders
+    without a customer_id are walk-ins and are not counted.
+    """
+    customer_id = order.get('customer_id')
+    if customer_id is None:
+        return
+    stats = customer_stats.get(str(customer_id))
+    if stats is None:
+        stats = customer_stats[str(customer_id)] = {'spend': 0.0, 'orders': 0, 'last_visit': ''}
+    stats['spend'] += order['total']
+    stats['orders'] += 1
+    visit = f"{order['date']} {order.get('time', '')}".strip()
+    if visit > stats['last_visit']:
+        stats['last_visit'] = visit
+
+
+def build_customer_stats(orders, customer_ids):
+    """Customer totals for a list of orders
+
+    Orders saved before they carried a customer_id are matched to a
+    customer through customer_ids, a {name: id} mapping.
+    """
+    customer_stats = {}
+    for order in orders:
+        if 'customer_id' not in order and order.get('customer') in customer_ids:
+            order = {**order, 'customer_id': customer_ids[order['customer']]}
+        add_customer_order(customer_stats, order)
+    return customer_stats
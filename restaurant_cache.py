@@ -0,0 +1,66 @@
+import functools
+import threading
+from collections import OrderedDict
+
+
+class ReportCache:
+    """Least recently used cache of generated report text
+
+    Keys include the data version the report was built from, so a change to
+    the data never has to find and drop stale entries: they simply stop
+    being asked for and fall off the end once max_entries is reached.
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Cached value for a key, or None"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entries beyond max_entries"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def cached_report(name):
+    """Decorator caching a report method's text in self.reports
+
+    The key is the report name, the arguments other than task and
+    self.data_version as it was when the report was started, so a report
+    that raced with a change is only ever returned for the old version.
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, task=None, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())), self.data_version)
+            content = self.reports.get(key)
+            if content is None:
+                content = method(self, *args, task=task, **kwargs)
+                self.reports.put(key, content)
+            return content
+        return wrapper
+    return decorate
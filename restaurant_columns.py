@@ -0,0 +1,177 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+GROUP_KEYS = ('day', 'month', 'weekday', 'hour', 'table', 'customer', 'item')
+PROGRESS_ROWS = 20000
+
+
+class OrderColumns:
+    """Orders stored column by column for group-by, date-range and ranking queries
+
+    Built once from a list of order dicts and sorted by time, so a date range
+    is a slice found by binary search. Strings (tables, customers, items) are
+    replaced by integer codes into the *_names lists and item lines are kept
+    in flat columns with an offsets array: order i owns item lines
+    item_offsets[i] to item_offsets[i + 1]. With NumPy installed the columns
+    are arrays and every query is vectorized; without it the same queries
+    run as plain Python loops over lists. progress, when given, is called
+    with the fraction of the build done every PROGRESS_ROWS orders.
+    """
+
+    def __init__(self, orders, progress=None):
+        table_codes, customer_codes, item_codes = {}, {}, {}
+        day_cache = {}
+        rows = []
+        total = 2 * len(orders) or 1
+        for index, order in enumerate(orders):
+            if progress is not None and index % PROGRESS_ROWS == 0:
+                progress(index / total)
+            day = day_cache.get(order['date'])
+            if day is None:
+                day = day_cache[order['date']] = date.fromisoformat(order['date']).toordinal() - EPOCH_ORDINAL
+            hours, _, minutes = order.get('time', '').partition(':')
+            seconds = int(hours) * 3600 + int(minutes) * 60 if hours.isdigit() and minutes.isdigit() else 0
+            rows.append((day * 86400 + seconds, order))
+        rows.sort(key=lambda row: row[0])
+
+        ids, timestamps, tables, customers, totals = [], [], [], [], []
+        item_offsets, item_lines, item_prices = [0], [], []
+        for index, (timestamp, order) in enumerate(rows, len(rows)):
+            if progress is not None and index % PROGRESS_ROWS == 0:
+                progress(index / total)
+            ids.append(order['id'])
+            timestamps.append(timestamp)
+            tables.append(table_codes.setdefault(str(order['table']), len(table_codes)))
+            customers.append(customer_codes.setdefault(order.get('customer') or 'Walk-in', len(customer_codes)))
+            totals.append(float(order['total']))
+            for item in order['items']:
+                item_lines.append(item_codes.setdefault(item['name'], len(item_codes)))
+                item_prices.append(float(item['price']))
+            item_offsets.append(len(item_lines))
+
+        self.table_names = list(table_codes)
+        self.customer_names = list(customer_codes)
+        self.item_names = list(item_codes)
+        self.ids = self._column(ids, 'int64')
+        self.timestamps = self._column(timestamps, 'int64')
+        self.days = [timestamp // 86400 for timestamp in timestamps] if np is None else self.timestamps // 86400
+        self.tables = self._column(tables, 'int32')
+        self.customers = self._column(customers, 'int32')
+        self.totals = self._column(totals, 'float64')
+        self.item_offsets = self._column(item_offsets, 'int64')
+        self.item_codes = self._column(item_lines, 'int32')
+        self.item_prices = self._column(item_prices, 'float64')
+
+    def __len__(self):
+        return len(self.ids)
+
+    def row_range(self, start=None, end=None):
+        """First and past-the-last row of the orders between two dates (inclusive)"""
+        first = 0 if start is None else self._search(_day_number(start), 'left')
+        last = len(self) if end is None else self._search(_day_number(end), 'right')
+        return first, max(first, last)
+
+    def totals_in_range(self, start=None, end=None):
+        """Order count and revenue between two dates (inclusive)"""
+        first, last = self.row_range(start, end)
+        revenue = self.totals[first:last].sum() if np is not None else sum(self.totals[first:last])
+        return last - first, float(revenue)
+
+    def group_by(self, key, start=None, end=None):
+        """Order count and revenue per group between two dates (inclusive)
+
+        key is one of GROUP_KEYS. Returns {label: (orders, revenue)} in the
+        natural order of the groups; for 'item' the count is the number of
+        that item sold and the revenue the sum of its prices.
+        """
+        codes, weights, labels = self._groups(key, *self.row_range(start, end))
+        counts, sums = _bincount(codes, weights, len(labels))
+        return {labels[code]: (count, sums[code]) for code, count in enumerate(counts) if count}
+
+    def top(self, key, k=10, start=None, end=None, by='revenue'):
+        """The k largest groups as (label, orders, revenue), ordered by revenue or by orders"""
+        groups = self.group_by(key, start, end)
+        position = 1 if by == 'revenue' else 0
+        best = heapq.nlargest(k, groups.items(), key=lambda group: group[1][position])
+        return [(label, orders, revenue) for label, (orders, revenue) in best]
+
+    def _groups(self, key, first, last):
+        # Integer codes, weights and labels of the groups for rows first..last
+        if key == 'item':
+            lines = slice(int(self.item_offsets[first]), int(self.item_offsets[last]))
+            return self.item_codes[lines], self.item_prices[lines], self.item_names
+        weights = self.totals[first:last]
+        if key == 'table':
+            return self.tables[first:last], weights, self.table_names
+        if key == 'customer':
+            return self.customers[first:last], weights, self.customer_names
+        if key == 'hour':
+            timestamps = self.timestamps[first:last]
+            codes = timestamps % 86400 // 3600 if np is not None else [t % 86400 // 3600 for t in timestamps]
+            return codes, weights, [f"{hour:02d}" for hour in range(24)]
+        if key == 'weekday':
+            # Day 0 of the epoch was a Thursday
+            days = self.days[first:last]
+            codes = (days + 3) % 7 if np is not None else [(day + 3) % 7 for day in days]
+            return codes, weights, WEEKDAYS
+        if key in ('day', 'month'):
+            if first == last:
+                return [], [], []
+            base = int(self.days[first])
+            days = self.days[first:last]
+            if key == 'day':
+                codes = days - base if np is not None else [day - base for day in days]
+                labels = [date.fromordinal(EPOCH_ORDINAL + base + offset).isoformat()
+                          for offset in range(int(self.days[last - 1]) - base + 1)]
+                return codes, weights, labels
+            months = [_month_number(day) for day in range(base, int(self.days[last - 1]) + 1)]
+            # Every day in the range maps to a month code relative to the first month
+            month_of_day = [month - months[0] for month in months]
+            codes = (np.asarray(month_of_day)[days - base] if np is not None
+                     else [month_of_day[day - base] for day in days])
+            labels = [f"{(months[0] + offset) // 12:04d}-{(months[0] + offset) % 12 + 1:02d}"
+                      for offset in range(months[-1] - months[0] + 1)]
+            return codes, weights, labels
+        raise ValueError(f"Unknown group key: {key}")
+
+    def _search(self, day, side):
+        if np is not None:
+            return int(np.searchsorted(self.days, day, side=side))
+        return (bisect_left if side == 'left' else bisect_right)(self.days, day)
+
+    def _column(self, values, dtype):
+        return np.asarray(values, dtype=dtype) if np is not None else values
+
+
+def _day_number(day):
+    # Days since the epoch of a YYYY-MM-DD date
+    return date.fromisoformat(day).toordinal() - EPOCH_ORDINAL
+
+
+def _month_number(day):
+    # year * 12 + month - 1 of a day number
+    moment = date.fromordinal(EPOCH_ORDINAL + day)
+    return moment.year * 12 + moment.month - 1
+
+
+def _bincount(codes, weights, size):
+    # Count and weight total per code, as two lists of length size
+    if np is not None:
+        codes = np.asarray(codes, dtype='int64')
+        counts = np.bincount(codes, minlength=size)
+        sums = np.bincount(codes, weights=np.asarray(weights, dtype='float64'), minlength=size)
+        return counts.tolist(), sums.tolist()
+    counts = [0] * size
+    sums = [0.0] * size
+    for code, weight in zip(codes, weights):
+        counts[code] += 1
+        sums[code] += weight
+    return counts, sums
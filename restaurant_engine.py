@@ -0,0 +1,525 @@
+import functools
+import heapq
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+from restaurant_analytics import (ExpenseLedger, SalesMetrics, build_customer_stats, build_rollups, hourly_orders,
+                                  rollup_range, top_items, top_items_in_range)
+from restaurant_cache import ReportCache, cached_report
+from restaurant_columns import OrderColumns
+from restaurant_inventory import StockMonitor
+from restaurant_search import MenuIndex
+from restaurant_instrumentation import OperationTimings, timed
+from restaurant_storage import add_created_order, apply_change
+from restaurant_tasks import report_progress
+
+
+def empty_data():
+    """Data for a restaurant with nothing set up yet"""
+    return {
+        'menu': {
+            'Appetizers': [],
+            'Main Courses': [],
+            'Desserts': [],
+            'Beverages': []
+        },
+        'inventory': {},
+        'orders': [],
+        'employees': [],
+        'tables': {i: {'status': 'available', 'order_id': None} for i in range(1, 11)},
+        'daily_sales': defaultdict(float),
+        'expenses': [],
+        'customers': [],
+        'reservations': [],
+        'suppliers': [],
+        'coupons': [],
+        'tax_settings': {'rate': 0.08, 'name': 'Sales Tax'},
+        'kitchen_orders': [],
+        'next_order_id': 1,
+        'rollups': {'days': {}, 'hours': {}},
+        'item_sales': {},
+        'next_customer_id': 1,
+        'customer_stats': {}
+    }
+
+
+def synchronized(method):
+    """Decorator running a method while holding self.lock"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def order_list_row(order):
+    """Values shown for an order in the orders list"""
+    return (order['id'], order['table'], order.get('customer', 'Walk-in'),
+            len(order['items']), f"${order['total']:.2f}", order.get('status', 'active').title(),
+            order.get('time', 'N/A'))
+
+
+class RestaurantEngine:
+    """Restaurant data and the operations on it, without any user interface
+
+    The engine owns the data dict and a storage backend from open_store().
+    Every change is applied to the data in memory and queued on the store as
+    one journaled change, so the GUI, imports and load tests all share the
+    same code path. Saves, background writes and reports are timed in
+    self.timings. Reports may be built on worker threads: they and every
+    change hold self.lock while they touch the data. Every change also bumps
+    self.data_version, which keys the report text kept in self.reports.
+    """
+
+    def __init__(self, store, timings=None):
+        self.store = store
+        self.data = None
+        self.timings = timings or OperationTimings()
+        self.metrics = SalesMetrics()
+        self.lock = threading.RLock()
+        self.data_version = 0
+        self.reports = ReportCache()
+        self.expense_ledger = ExpenseLedger()
+        self.stock = StockMonitor()
+        # Customer name -> id, for linking new orders to their customer
+        self.customer_ids = {}
+        # Columnar copy of the orders of a date range, with the range and the
+        # order count it was built at
+        self._columns = None
+        self._columns_key = None
+        # Search index over the menu, built when first needed after the menu changes
+        self._menu_index = None
+        self.store.write_observer = self._record_write
+
+    @timed('load_data')
+    def load(self, today=None):
+        """Load data from the store, starting empty when there is nothing saved"""
+        data = self.store.load(today)
+        if data is None:
+            return self.reset()
+        data['daily_sales'] = defaultdict(float, data['daily_sales'])
+        self.data_version += 1
+        self._menu_index = None
+        if 'next_order_id' not in data:
+            # Saved before the id sequence was persisted, when nothing was
+            # ever removed, so every id up to the order count is taken
+            data['next_order_id'] = max([self.store.count_orders(), *self.store.orders_by_id]) + 1
+        self.data = data
+        self.metrics.rebuild(self.store.order_counts_by_day(), data['daily_sales'])
+        self.expense_ledger = ExpenseLedger(data['expenses'])
+        self.stock.rebuild(data['inventory'])
+        migrated = False
+        if 'next_customer_id' not in data:
+            # Saved before customers had ids: number them in the order they were added
+            for number, customer in enumerate(data['customers'], 1):
+                customer['id'] = number
+            data['next_customer_id'] = len(data['customers']) + 1
+            data.pop('customer_stats', None)
+            migrated = True
+        self._index_customers()
+        if 'rollups' not in data or 'item_sales' not in data or 'customer_stats' not in data:
+            # Saved before these totals existed: build them from the full history once
+            self.rebuild_rollups()
+            migrated = True
+        if migrated:
+            self.save()
+        return data
+
+    def reset(self):
+        """Replace the data with an empty restaurant and save it"""
+        self.data = empty_data()
+        self.data_version += 1
+        self._menu_index = None
+        self.metrics.rebuild({}, {})
+        self.expense_ledger = ExpenseLedger()
+        self.stock.rebuild({})
+        self._index_customers()
+        self.save()
+        return self.data
+
+    @timed('save_data')
+    def save(self):
+        """Write a full snapshot of the data"""
+        self.store.save(self.data)
+
+    @timed('flush_data')
+    def flush(self):
+        """Wait for queued changes to be written"""
+        self.store.flush()
+
+    def close(self):
+        """Write queued changes and release the store"""
+        self.store.close()
+
+    def status(self):
+        """Pending write count, last save latency and last error of the store"""
+        return self.store.status()
+
+    @synchronized
+    def apply(self, change, payload):
+        """Apply a change to the data and queue it for the store"""
+        apply_change(self.data, change, payload, self.store.orders_by_id)
+        self.data_version += 1
+        if change == 'order_created':
+            self._track_orders([payload])
+        elif change == 'menu_item_added':
+            self._menu_index = None
+        self.store.append(change, payload)
+
+    # Orders
+    @synchronized
+    def create_order(self, items, table, customer=None, date=None, time=None):
+        """Create an order for the kitchen and return it"""
+        order = self._new_order(items, table, customer, date, time)
+        self.apply('order_created', order)
+        return order
+
+    @timed('create_orders_batch')
+    @synchronized
+    def create_orders_batch(self, orders):
+        """Create many orders at once and return them
+
+        Each entry is a dict with 'items' and 'table' and optionally
+        'customer', 'date', 'time' and 'status'. The orders are added to the
+        data in one pass and handed to the store as a single batch.
+        """
+        created = []
+        for spec in orders:
+            order = self._new_order(spec['items'], spec['table'], spec.get('customer'),
+                                    spec.get('date'), spec.get('time'), spec.get('status', 'active'))
+            add_created_order(self.data, order, self.store.orders_by_id)
+            created.append(order)
+        self.data_version += 1
+        self._track_orders(created)
+        self.store.append_many([('order_created', order) for order in created])
+        return created
+
+    def mark_ready(self, order_id):
+        """Take an order off the kitchen queue as ready and return it"""
+        order = self.find_order(order_id)
+        if order is None:
+            raise KeyError(f"Order #{order_id} not found")
+        self.apply('order_status', {'id': order['id'], 'date': order['date'], 'status': 'ready'})
+        return order
+
+    def count_orders(self, date=None):
+        """Number of orders, optionally on a single day"""
+        return self.metrics.count_orders(date)
+
+    def find_order(self, order_id):
+        """The order with the given id, or None"""
+        return self.store.find_order(order_id)
+
+    def active_orders(self):
+        """Orders still being prepared in the kitchen"""
+        return self.store.orders_with_status('active')
+
+    def orders_in_range(self, start=None, end=None):
+        """Orders between two dates (inclusive)"""
+        return self.store.load_orders(start, end)
+
+    def recent_orders(self, start=None, end=None):
+        """Orders between two dates (inclusive), newest first"""
+        return sorted(self.orders_in_range(start, end), key=lambda x: x.get('id', 0), reverse=True)
+
+    def customer_stats(self, customer):
+        """Lifetime spend, order count and last visit of a customer"""
+        return self.data['customer_stats'].get(str(customer.get('id')),
+                                               {'spend': 0.0, 'orders': 0, 'last_visit': ''})
+
+    def top_customers(self, k=10):
+        """The k customers who spent the most, with their totals, biggest spender first"""
+        customers = [(customer, self.customer_stats(customer)) for customer in self.data['customers']]
+        return heapq.nlargest(k, customers, key=lambda pair: pair[1]['spend'])
+
+    # Dashboard and reports
+    @synchronized
+    def rebuild_rollups(self):
+        """Recompute the rollups, item totals and customer totals from every stored order"""
+        orders = self.orders_in_range()
+        self.data['rollups'] = build_rollups(orders)
+        self.data['item_sales'] = rollup_range(self.data['rollups'])['items']
+        self.data['customer_stats'] = build_customer_stats(orders, self.customer_ids)
+
+    def sales_in_range(self, start=None, end=None):
+        """Orders, revenue, item quantities and table revenue between two dates (inclusive)"""
+        return rollup_range(self.data['rollups'], start, end)
+
+    def top_selling_items(self, k=10, start=None, end=None):
+        """The k best-selling (name, quantity) pairs, over all time or between two dates"""
+        if start is None and end is None:
+            return top_items(self.data['item_sales'], k)
+        return top_items_in_range(self.data['rollups'], start, end, k)
+
+    def hourly_sales(self, day):
+        """Order count and revenue per hour of a day"""
+        return hourly_orders(self.data['rollups'], day)
+
+    def order_columns(self, start=None, end=None, progress=None):
+        """The orders between two dates (inclusive) as OrderColumns, rebuilt once new orders come in
+
+        Days that are not loaded are read for the columns only and not kept
+        in memory. Neither reading the orders nor building the columns holds
+        self.lock, so orders can still be taken meanwhile.
+        """
+        key = (start, end, self.metrics.total_orders)
+        with self.lock:
+            if self._columns is not None and self._columns_key == key:
+                return self._columns
+        columns = OrderColumns(self.store.read_orders(start, end), progress)
+        with self.lock:
+            self._columns, self._columns_key = columns, key
+        return columns
+
+    def dashboard_metrics(self, today):
+        """Revenue and order figures shown on the dashboard and sidebar"""
+        return self.metrics.summary(today)
+
+    @timed('sales_report')
+    @cached_report('sales')
+    @synchronized
+    def sales_report(self, today, task=None):
+        """Text of the sales report"""
+        report_content = self._report_header("SALES REPORT")
+
+        # Calculate metrics
+        metrics = self.dashboard_metrics(today)
+        report_content += f"Total Revenue: ${metrics['total_revenue']:.2f}\n"
+        report_content += f"Total Orders: {metrics['total_orders']}\n"
+        report_content += f"Average Order Value: ${metrics['avg_order']:.2f}\n\n"
+
+        # Today's sales
+        report_content += f"Today's Sales: ${metrics['today_revenue']:.2f}\n\n"
+
+        # Top selling items
+        report_progress(task, 0.25)
+        top_selling = self.top_selling_items(10)
+
+        if top_selling:
+            report_content += "TOP SELLING ITEMS:\n"
+            for item, count in top_selling:
+                report_content += f"  {item}: {count} orders\n"
+
+        # Revenue by table
+        report_progress(task, 0.5)
+        sales = self.sales_in_range()
+        if sales['tables']:
+            report_content += "\nREVENUE BY TABLE:\n"
+            for table, revenue in sorted(sales['tables'].items(), key=lambda x: x[1], reverse=True):
+                report_content += f"  Table {table}: ${revenue:.2f}\n"
+
+        # Today by hour
+        report_progress(task, 0.75)
+        hours = self.hourly_sales(today)
+        if hours:
+            report_content += "\nTODAY BY HOUR:\n"
+            for hour, (orders, revenue) in hours.items():
+                report_content += f"  {hour}:00  {orders} orders  ${revenue:.2f}\n"
+        return report_content
+
+    @timed('inventory_report')
+    @cached_report('inventory')
+    @synchronized
+    def inventory_report(self, task=None):
+        """Text of the inventory report"""
+        report_content = self._report_header("INVENTORY REPORT")
+
+        # Total items
+        report_content += f"Total Items: {len(self.data['inventory'])}\n\n"
+
+        # Low stock items, furthest below their minimum first
+        report_progress(task, 0.5)
+        low_stock = self.stock.low_items()
+
+        if low_stock:
+            report_content += f"LOW STOCK ITEMS ({len(low_stock)}):\n"
+            for item_name in low_stock:
+                item_data = self.data['inventory'][item_name]
+                report_content += (f"  {item_name}: {item_data['quantity']} {item_data['unit']} "
+                                   f"(min {item_data['min_stock']})\n")
+        else:
+            report_content += "No items are low in stock\n"
+        return report_content
+
+    @timed('customer_report')
+    @cached_report('customer')
+    @synchronized
+    def customer_report(self, task=None):
+        """Text of the customer report"""
+        report_content = self._report_header("CUSTOMER REPORT")
+
+        # Total customers
+        report_content += f"Total Customers: {len(self.data['customers'])}\n\n"
+
+        # Top customers by spending
+        report_progress(task, 0.25)
+        top_customers = self.top_customers(10)
+        report_progress(task, 0.75)
+
+        if top_customers:
+            report_content += "TOP CUSTOMERS BY SPENDING:\n"
+            for customer, stats in top_customers:
+                last_visit = stats['last_visit'] or 'never'
+                report_content += (f"  {customer['name']}: ${stats['spend']:.2f} "
+                                   f"({stats['orders']} orders, last visit {last_visit})\n")
+        return report_content
+
+    def profit_and_loss(self, start=None, end=None):
+        """Revenue, expenses, net profit, tax and expenses per category between two dates (inclusive)"""
+        revenue = self.metrics.revenue_in_range(start, end)
+        expenses = self.expense_ledger.total(start, end)
+        return {
+            'revenue': revenue,
+            'expenses': expenses,
+            'net_profit': revenue - expenses,
+            'tax': revenue * self.data['tax_settings']['rate'],
+            'by_category': self.expense_ledger.by_category(start, end)
+        }
+
+    def recent_expenses(self, count=10):
+        """The latest expenses by date, newest first"""
+        return self.expense_ledger.recent(count)
+
+    @timed('financial_report')
+    @cached_report('financial')
+    @synchronized
+    def financial_report(self, start=None, end=None, task=None):
+        """Text of the financial report between two dates (inclusive)"""
+        report_content = self._report_header("FINANCIAL REPORT")
+        if start is not None or end is not None:
+            report_content += f"Period: {start or 'first day'} to {end or 'today'}\n\n"
+
+        # Calculate metrics
+        pnl = self.profit_and_loss(start, end)
+
+        report_content += f"Total Revenue: PKR{pnl['revenue']:.2f}\n"
+        report_content += f"Total Expenses: PKR{pnl['expenses']:.2f}\n"
+        report_content += f"Net Profit: PKR{pnl['net_profit']:.2f}\n"
+        report_content += f"Tax Collected: PKR{pnl['tax']:.2f}\n"
+
+        # Expenses by category
+        report_progress(task, 0.5)
+        if pnl['by_category']:
+            report_content += "\nEXPENSES BY CATEGORY:\n"
+            for category, amount in pnl['by_category']:
+                report_content += f"  {category}: PKR{amount:.2f}\n"
+        return report_content
+
+    @timed('analytics_report')
+    @cached_report('analytics')
+    def analytics_report(self, start=None, end=None, task=None):
+        """Text of the period analytics report between two dates (inclusive)"""
+        report_content = self._report_header("PERIOD ANALYTICS REPORT")
+        columns = self.order_columns(start, end, lambda fraction: report_progress(task, fraction * 0.8))
+
+        # Period totals
+        orders, revenue = columns.totals_in_range(start, end)
+        report_content += f"Period: {start or 'first order'} to {end or 'last order'}\n"
+        report_content += f"Orders: {orders}\n"
+        report_content += f"Revenue: ${revenue:.2f}\n"
+        report_content += f"Average Order Value: ${revenue / orders if orders else 0:.2f}\n"
+
+        sections = [
+            ("REVENUE BY MONTH", columns.group_by('month', start, end).items()),
+            ("REVENUE BY WEEKDAY", columns.group_by('weekday', start, end).items()),
+            ("REVENUE BY HOUR", columns.group_by('hour', start, end).items()),
+            ("TOP ITEMS BY REVENUE", ((label, (count, total)) for label, count, total
+                                      in columns.top('item', 10, start, end))),
+            ("TOP CUSTOMERS BY REVENUE", [(label, (count, total)) for label, count, total
+                                          in columns.top('customer', 11, start, end)
+                                          if label != 'Walk-in'][:10]),
+            ("TOP TABLES BY REVENUE", ((f"Table {label}", (count, total)) for label, count, total
+                                       in columns.top('table', 10, start, end)))
+        ]
+        for index, (title, rows) in enumerate(sections):
+            report_progress(task, 0.8 + 0.2 * index / len(sections))
+            report_content += f"\n{title}:\n"
+            for label, (count, total) in rows:
+                report_content += f"  {label:<24} {count:>7}  ${total:>12.2f}\n"
+        return report_content
+
+    # Menu, inventory and people
+    def menu_index(self):
+        """MenuIndex over the current menu"""
+        if self._menu_index is None:
+            self._menu_index = MenuIndex(self.data['menu'])
+        return self._menu_index
+
+    @synchronized
+    def add_menu_item(self, category, item):
+        """Add an item to the menu and give it a stock entry if it has none"""
+        self.apply('menu_item_added', {'category': category, 'item': item})
+        if item['name'] not in self.data['inventory']:
+            self.set_inventory_item(item['name'], {
+                'quantity': 50,
+                'unit': 'servings',
+                'min_stock': 10
+            })
+
+    @synchronized
+    def set_inventory_item(self, name, item):
+        """Add or replace an inventory item"""
+        self.apply('inventory_item_set', {'name': name, 'item': item})
+        self.stock.update(name, item)
+
+    @synchronized
+    def add_customer(self, customer):
+        """Add a customer under the next free customer id and return them"""
+        customer = {'id': self.data['next_customer_id'], **customer}
+        self.apply('customer_added', customer)
+        self.customer_ids.setdefault(customer['name'], customer['id'])
+        return customer
+
+    @synchronized
+    def add_expense(self, expense):
+        """Record an expense"""
+        self.apply('expense_added', expense)
+        self.expense_ledger.add(expense)
+
+    @synchronized
+    def add_employee(self, employee):
+        """Add an employee, numbering them after the existing staff"""
+        employee = {'id': len(self.data['employees']) + 1, **employee}
+        self.apply('employee_added', employee)
+        return employee
+
+    def _index_customers(self):
+        # The first customer registered under a name gets that name's orders
+        self.customer_ids = {}
+        for customer in self.data['customers']:
+            self.customer_ids.setdefault(customer['name'], customer['id'])
+
+    def _track_orders(self, orders):
+        # Keep the running aggregates in step with newly created orders
+        for order in orders:
+            self.metrics.add_order(order)
+
+    def _record_write(self, changes, seconds):
+        # Runs on the store's writer thread
+        self.timings.record('background_write', seconds, {'changes': changes})
+
+    def _report_header(self, title):
+        return (f"{title}\n" + "=" * 50 + "\n"
+                f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+
+    def _new_order(self, items, table, customer, date, time, status='active'):
+        if date is None or time is None:
+            now = datetime.now()
+            date = date or now.strftime("%Y-%m-%d")
+            time = time or now.strftime("%H:%M")
+        items = [dict(item) for item in items]
+        order = {
+            'id': self.data['next_order_id'],
+            'table': str(table),
+            'customer': customer or 'Walk-in',
+            'items': items,
+            'total': sum(item['price'] for item in items),
+            'date': date,
+            'time': time,
+            'status': status
+        }
+        self.data['next_order_id'] += 1
+        if order['customer'] in self.customer_ids:
+            order['customer_id'] = self.customer_ids[order['customer']]
+        return order
@@ -0,0 +1,124 @@
+import functools
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+class OperationTimings:
+    """Rolling duration statistics per operation and a log of slow operations
+
+    The last `window` durations of every operation are kept for the
+    percentiles, so recording costs a lock and a deque append. Operations
+    slower than slow_threshold seconds are appended to log_file as JSON
+    lines together with the context returned by the `context` callable.
+    """
+
+    def __init__(self, enabled=True, slow_threshold=0.25, log_file=None, window=1000):
+        self.enabled = enabled
+        self.slow_threshold = slow_threshold
+        self.log_file = log_file
+        self.window = window
+        # Callable returning a dict that describes the current state
+        self.context = None
+        self._samples = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation, seconds, details=None):
+        """Add one duration for an operation"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if operation not in self._samples:
+                self._samples[operation] = deque(maxlen=self.window)
+                self._counts[operation] = 0
+            self._samples[operation].append(seconds)
+            self._counts[operation] += 1
+        if seconds >= self.slow_threshold:
+            self._log_slow(operation, seconds, details)
+
+    def measure(self, operation, details=None):
+        """Context manager that records how long its block takes"""
+        return _Measurement(self, operation, details)
+
+    def stats(self):
+        """Count, p50, p95, p99 and max in seconds for every operation"""
+        with self._lock:
+            samples = {operation: sorted(values) for operation, values in self._samples.items()}
+            counts = dict(self._counts)
+        return {operation: {
+            'count': counts[operation],
+            'p50': percentile(values, 50),
+            'p95': percentile(values, 95),
+            'p99': percentile(values, 99),
+            'max': values[-1]
+        } for operation, values in samples.items()}
+
+    def reset(self):
+        """Forget every recorded duration"""
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+
+    def _log_slow(self, operation, seconds, details):
+        if self.log_file is None:
+            return
+        entry = {'time': datetime.now().isoformat(timespec='seconds'),
+                 'operation': operation, 'ms': round(seconds * 1000, 1)}
+        try:
+            if self.context is not None:
+                entry.update(self.context())
+            entry.update(details or {})
+            with open(self.log_file, 'a') as f:
+                f.write(json.dumps(entry, default=str) + '\n')
+        except Exception:
+            # Instrumentation must never break the operation it measures
+            pass
+
+
+class _Measurement:
+    def __init__(self, timings, operation, details):
+        self.timings = timings
+        self.operation = operation
+        self.details = details
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timings.record(self.operation, time.perf_counter() - self.started, self.details)
+        return False
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def timed(operation, screen=None):
+    """Decorator recording the duration of a method in self.timings
+
+    With screen given the method opens that screen, which is remembered in
+    self.current_screen for the slow-operation context.
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if screen is not None:
+                self.current_screen = screen
+            timings = self.timings
+            if not timings.enabled:
+                return method(self, *args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                timings.record(operation, time.perf_counter() - started)
+        return wrapper
+    return decorate
@@ -0,0 +1,61 @@
+from bisect import bisect_left, insort
+
+
+class StockMonitor:
+    """Live low-stock set and items ordered by how close they are to their minimum
+
+    An item is low when its quantity is at or below its min_stock. The set
+    and the order are updated only when an item's quantity or threshold
+    changes, so views read them without scanning the inventory.
+    threshold_observer, when set, is called with the item name, the item and
+    whether it is now low every time an item crosses its threshold.
+    """
+
+    def __init__(self, inventory=None):
+        self.threshold_observer = None
+        self.rebuild(inventory or {})
+
+    def rebuild(self, inventory):
+        """Start over from an inventory dict"""
+        self.items = dict(inventory)
+        self.low_stock = set()
+        self._distances = {}
+        self._order = []
+        for name, item in self.items.items():
+            self._index(name, item)
+        self._order.sort()
+
+    def update(self, name, item):
+        """Record a new or changed item and report a threshold crossing"""
+        was_low = name in self.low_stock
+        known = name in self._distances
+        if known:
+            self._order.pop(bisect_left(self._order, (self._distances[name], name)))
+            self.low_stock.discard(name)
+        self.items[name] = item
+        self._index(name, item, keep_sorted=True)
+        is_low = name in self.low_stock
+        if is_low != was_low and self.threshold_observer is not None:
+            self.threshold_observer(name, item, is_low)
+
+    def is_low(self, name):
+        """Check whether an item is at or below its minimum stock"""
+        return name in self.low_stock
+
+    def low_items(self):
+        """Names of the low-stock items, furthest below their minimum first"""
+        return [name for _, name in self._order[:len(self.low_stock)]]
+
+    def by_urgency(self):
+        """Every item name, ordered by quantity left above the minimum"""
+        return [name for _, name in self._order]
+
+    def _index(self, name, item, keep_sorted=False):
+        distance = item['quantity'] - item['min_stock']
+        self._distances[name] = distance
+        if distance <= 0:
+            self.low_stock.add(name)
+        if keep_sorted:
+            insort(self._order, (distance, name))
+        else:
+            self._order.append((distance, name))
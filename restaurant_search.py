@@ -0,0 +1,75 @@
+from bisect import bisect_left
+from collections import defaultdict
+
+
+class MenuIndex:
+    """Prefix and trigram index over the names of the menu items
+
+    entries are (category, item) pairs in menu order. Every word of every
+    name is kept in a sorted list, so the items with a word starting with
+    the typed text are found by binary search; names are also split into
+    trigrams so text from the middle of a word or with a typo still finds
+    the item.
+    """
+
+    def __init__(self, menu):
+        self.entries = [(category, item) for category, items in menu.items() for item in items]
+        self._words = []
+        self._trigrams = defaultdict(set)
+        for number, (_, item) in enumerate(self.entries):
+            name = item['name'].lower()
+            for word in name.split():
+                self._words.append((word, number))
+            for trigram in _trigrams(name):
+                self._trigrams[trigram].add(number)
+        self._words.sort()
+
+    def search(self, query, limit=None):
+        """Entry numbers matching query, best first
+
+        Items where every typed word starts a word of the name come first,
+        in menu order, followed by items sharing at least half of the
+        query's trigrams, most shared first. An empty query matches
+        everything.
+        """
+        words = query.lower().split()
+        if not words:
+            matches = list(range(len(self.entries)))
+            return matches[:limit] if limit is not None else matches
+
+        prefix_matches = None
+        for word in words:
+            found = self._prefixed(word)
+            prefix_matches = found if prefix_matches is None else prefix_matches & found
+        matches = sorted(prefix_matches)
+
+        trigrams = _trigrams(query.lower())
+        if trigrams:
+            shared = defaultdict(int)
+            for trigram in trigrams:
+                for number in self._trigrams.get(trigram, ()):
+                    if number not in prefix_matches:
+                        shared[number] += 1
+            needed = (len(trigrams) + 1) // 2
+            similar = [number for number, count in shared.items() if count >= needed]
+            similar.sort(key=lambda number: (-shared[number], number))
+            matches.extend(similar)
+        return matches[:limit] if limit is not None else matches
+
+    def _prefixed(self, prefix):
+        # Entry numbers with a word starting with prefix
+        found = set()
+        position = bisect_left(self._words, (prefix,))
+        while position < len(self._words) and self._words[position][0].startswith(prefix):
+            found.add(self._words[position][1])
+            position += 1
+        return found
+
+
+def _trigrams(text):
+    # Three-letter pieces of each word, padded so short words still have one
+    trigrams = set()
+    for word in text.split():
+        padded = f" {word} "
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
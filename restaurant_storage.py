@@ -0,0 +1,1209 @@
+import argparse
+import gc
+import json
+import os
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right, insort
+
+from restaurant_analytics import (add_customer_order, add_item_sales, add_to_bucket, add_to_rollups, new_bucket,
+                                  order_buckets)
+
+
+def add_created_order(data, order, orders_by_id=None):
+    """Add a new order to the data along with the totals and kitchen queue
+
+    orders_by_id is as for apply_change(). The kitchen queue only holds
+    orders in it, so a new order is not looked for in the queue.
+    """
+    new = orders_by_id is not None and order['id'] not in orders_by_id
+    if new:
+        orders_by_id[order['id']] = order
+    if new or orders_by_id is None:
+        data['orders'].append(order)
+    # Ids are never handed out twice, even after orders are removed
+    data['next_order_id'] = max(data.get('next_order_id', 1), order['id'] + 1)
+    data['daily_sales'][order['date']] = data['daily_sales'].get(order['date'], 0) + order['total']
+    if 'rollups' in data:
+        add_to_rollups(data['rollups'], order)
+    if 'item_sales' in data:
+        add_item_sales(data['item_sales'], order)
+    if 'customer_stats' in data:
+        add_customer_order(data['customer_stats'], order)
+    if order.get('status') == 'active' and (new or not any(o.get('id') == order['id']
+                                                          for o in data['kitchen_orders'])):
+        data['kitchen_orders'].append(order)
+
+
+def apply_change(data, change, payload, orders_by_id=None):
+    """Apply a single journaled change to the data store
+
+    orders_by_id, when given, maps the id of every order in data['orders'] to
+    the order. It is kept up to date, makes status changes a dict lookup and
+    keeps an order from being added twice when a journal is replayed.
+    """
+    if change == 'order_created':
+        add_created_order(data, payload, orders_by_id)
+    elif change == 'order_status':
+        if orders_by_id is not None:
+            order = orders_by_id.get(payload['id'])
+        else:
+            # Recent orders live at the end of the list, so search backwards
+            order = next((o for o in reversed(data['orders']) if o.get('id') == payload['id']), None)
+        if order is not None:
+            order['status'] = payload['status']
+        # The kitchen queue only holds orders that are still being prepared
+        if payload['status'] != 'active':
+            data['kitchen_orders'] = [o for o in data['kitchen_orders'] if o.get('id') != payload['id']]
+    elif change == 'menu_item_added':
+        data['menu'].setdefault(payload['category'], []).append(payload['item'])
+    elif change == 'inventory_item_set':
+        data['inventory'][payload['name']] = payload['item']
+    elif change == 'customer_added':
+        data['customers'].append(payload)
+        if 'id' in payload:
+            data['next_customer_id'] = max(data.get('next_customer_id', 1), payload['id'] + 1)
+    elif change == 'expense_added':
+        data['expenses'].append(payload)
+    elif change == 'employee_added':
+        data['employees'].append(payload)
+    else:
+        raise ValueError(f"Unknown change type: {change}")
+
+
+def track_order_change(order_days, open_orders, change, payload):
+    """Keep per-day order counts and the day of every open order up to date"""
+    if change == 'order_created':
+        order_days[payload['date']] = order_days.get(payload['date'], 0) + 1
+        if payload.get('status') == 'active':
+            open_orders[payload['id']] = payload['date']
+    elif change == 'order_status':
+        if payload['status'] == 'active':
+            open_orders[payload['id']] = payload['date']
+        else:
+            open_orders.pop(payload['id'], None)
+
+
+def group_by_day(orders):
+    """Group orders by their date"""
+    days = {}
+    for order in orders:
+        days.setdefault(order['date'], []).append(order)
+    return days
+
+
+class DayIndex:
+    """Orders grouped by day, with the days kept sorted for range lookups
+
+    A day can be known to have stored orders before they are read into
+    memory; its orders are None until set_day() is called with them. A
+    date range is found by binary search over the sorted days, so a query
+    for today or the last week only touches those days.
+    """
+
+    def __init__(self):
+        self.orders = {}
+        self.days = []
+
+    def needs_loading(self, day):
+        """Check whether a day has stored orders that are not loaded yet"""
+        return day in self.orders and self.orders[day] is None
+
+    def add_known_day(self, day):
+        """Record that a day has stored orders that are not loaded yet"""
+        if day not in self.orders:
+            insort(self.days, day)
+            self.orders[day] = None
+
+    def set_day(self, day, orders):
+        """Set the loaded orders of a day"""
+        if day not in self.orders:
+            insort(self.days, day)
+        self.orders[day] = orders
+
+    def add_order(self, order):
+        """Add an order to its day, which must be loaded or new"""
+        day = self.orders.get(order['date'])
+        if day is None:
+            self.set_day(order['date'], [order])
+        else:
+            day.append(order)
+
+    def days_in_range(self, start=None, end=None):
+        """Sorted days between two dates (inclusive)"""
+        first = 0 if start is None else bisect_left(self.days, start)
+        last = len(self.days) if end is None else bisect_right(self.days, end)
+        return self.days[first:last]
+
+    def unloaded_days(self, start=None, end=None):
+        """Days between two dates (inclusive) whose orders are not loaded yet"""
+        return [day for day in self.days_in_range(start, end) if self.orders[day] is None]
+
+    def orders_in_range(self, start=None, end=None):
+        """Loaded orders between two dates (inclusive), day by day"""
+        return [order for day in self.days_in_range(start, end) for order in self.orders[day] or ()]
+
+
+# Binary snapshot format: a header followed by length-prefixed records.
+# Orders are packed column by column with every repeated string (item,
+# customer, date, status, ...) stored once in a string table. Orders that do
+# not fit the columns are kept as JSON, as is all non-order data. Version 2
+# added the customer_id column, 0 for walk-ins.
+SNAPSHOT_MAGIC = b'RSNP'
+SNAPSHOT_VERSION = 2
+SNAPSHOT_HEADER = struct.Struct('<4sH')
+RECORD_HEADER = struct.Struct('<4sI')
+
+ORDER_KEYS = {'id', 'table', 'customer', 'items', 'total', 'date', 'time', 'status'}
+CUSTOMER_ORDER_KEYS = ORDER_KEYS | {'customer_id'}
+ORDER_STRING_FIELDS = ('table', 'customer', 'date', 'time', 'status')
+ITEM_KEYS = {'name', 'price', 'cost'}
+
+U32 = 'I' if array('I').itemsize == 4 else 'L'
+
+
+def is_packable_order(order):
+    """Check whether an order fits the packed order columns"""
+    if order.keys() == CUSTOMER_ORDER_KEYS:
+        if type(order['customer_id']) is not int or order['customer_id'] <= 0:
+            return False
+    elif order.keys() != ORDER_KEYS:
+        return False
+    if type(order['id']) is not int or type(order['total']) is not float:
+        return False
+    if any(type(order[field]) is not str for field in ORDER_STRING_FIELDS):
+        return False
+    return all(type(item) is dict and item.keys() == ITEM_KEYS and type(item['name']) is str
+               and type(item['price']) is float and type(item['cost']) is float
+               for item in order['items'])
+
+
+def encode_snapshot(data):
+    """Encode a data dict in the binary snapshot format"""
+    records = []
+    rest = {key: value for key, value in data.items() if key != 'orders'}
+
+    if 'orders' in data:
+        strings = {'': 0}
+        string_id = lambda value: strings.setdefault(value, len(strings))
+
+        ids = array('q')
+        totals = array('d')
+        customer_ids = array('q')
+        string_columns = {field: array(U32) for field in ORDER_STRING_FIELDS}
+        item_offsets = array(U32, [0])
+        item_names = array(U32)
+        item_prices = array('d')
+        item_costs = array('d')
+        unpacked = {}
+
+        for row, order in enumerate(data['orders']):
+            if is_packable_order(order):
+                ids.append(order['id'])
+                totals.append(order['total'])
+                customer_ids.append(order.get('customer_id', 0))
+                for field in ORDER_STRING_FIELDS:
+                    string_columns[field].append(string_id(order[field]))
+                for item in order['items']:
+                    item_names.append(string_id(item['name']))
+                    item_prices.append(item['price'])
+                    item_costs.append(item['cost'])
+            else:
+                # Keep the row in the columns as a placeholder
+                unpacked[row] = order
+                ids.append(0)
+                totals.append(0.0)
+                customer_ids.append(0)
+                for field in ORDER_STRING_FIELDS:
+                    string_columns[field].append(0)
+            item_offsets.append(len(item_names))
+
+        encoded = [value.encode('utf-8') for value in strings]
+        string_offsets = array(U32, [0])
+        for value in encoded:
+            string_offsets.append(string_offsets[-1] + len(value))
+
+        records.append((b'STRS', _pack_arrays([string_offsets]) + b''.join(encoded)))
+        columns = [ids, totals] + [string_columns[field] for field in ORDER_STRING_FIELDS]
+        columns += [item_offsets, item_names, item_prices, item_costs, customer_ids]
+        records.append((b'ORDS', struct.pack('<I', len(data['orders'])) + _pack_arrays(columns)))
+        if unpacked:
+            records.append((b'OJSN', json.dumps(unpacked, default=str).encode('utf-8')))
+
+    records.append((b'DATA', json.dumps(rest, default=str).encode('utf-8')))
+
+    parts = [SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION)]
+    for tag, payload in records:
+        parts.append(RECORD_HEADER.pack(tag, len(payload)))
+        parts.append(payload)
+    return b''.join(parts)
+
+
+def decode_snapshot(buf):
+    """Decode a data dict from the binary snapshot format"""
+    magic, version = SNAPSHOT_HEADER.unpack_from(buf, 0)
+    if magic != SNAPSHOT_MAGIC or not 1 <= version <= SNAPSHOT_VERSION:
+        raise ValueError("Not a restaurant snapshot file")
+
+    records = {}
+    pos = SNAPSHOT_HEADER.size
+    while pos < len(buf):
+        tag, length = RECORD_HEADER.unpack_from(buf, pos)
+        pos += RECORD_HEADER.size
+        records[tag] = buf[pos:pos + length]
+        pos += length
+
+    data = json.loads(records[b'DATA'])
+    if b'ORDS' in records:
+        # Building millions of small dicts keeps triggering the cyclic
+        # garbage collector, which finds nothing to free here
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            data['orders'] = _decode_orders(records, version)
+        finally:
+            if gc_enabled:
+                gc.enable()
+    return data
+
+
+def _decode_orders(records, version):
+    # Rebuild the order dicts from the STRS, ORDS and OJSN records
+    (string_offsets,), pos = _unpack_arrays(records[b'STRS'], [U32])
+    blob = records[b'STRS'][pos:]
+    strings = [blob[start:end].decode('utf-8') for start, end in zip(string_offsets, string_offsets[1:])]
+
+    typecodes = ['q', 'd'] + [U32] * len(ORDER_STRING_FIELDS) + [U32, U32, 'd', 'd']
+    if version >= 2:
+        typecodes.append('q')
+    columns, _ = _unpack_arrays(records[b'ORDS'][4:], typecodes)
+    ids, totals, tables, customers, dates, times, statuses, item_offsets, item_names, item_prices, item_costs = columns[:11]
+
+    items = [{'name': strings[name], 'price': price, 'cost': cost}
+             for name, price, cost in zip(item_names, item_prices, item_costs)]
+    orders = [{'id': order_id, 'table': strings[table], 'customer': strings[customer],
+               'items': items[start:end], 'total': total, 'date': strings[date],
+               'time': strings[time_], 'status': strings[status]}
+              for order_id, table, customer, start, end, total, date, time_, status
+              in zip(ids, tables, customers, item_offsets, item_offsets[1:], totals, dates, times, statuses)]
+    if version >= 2:
+        for order, customer_id in zip(orders, columns[11]):
+            if customer_id:
+                order['customer_id'] = customer_id
+    if b'OJSN' in records:
+        for row, order in json.loads(records[b'OJSN']).items():
+            orders[int(row)] = order
+    return orders
+
+
+def _pack_arrays(arrays):
+    # Each array is written little-endian with its byte length in front
+    parts = []
+    for values in arrays:
+        if sys.byteorder == 'big':
+            values = array(values.typecode, values)
+            values.byteswap()
+        raw = values.tobytes()
+        parts.append(struct.pack('<I', len(raw)))
+        parts.append(raw)
+    return b''.join(parts)
+
+
+def _unpack_arrays(buf, typecodes):
+    # Returns the arrays as lists and the position after the last one
+    arrays = []
+    pos = 0
+    for typecode in typecodes:
+        (length,) = struct.unpack_from('<I', buf, pos)
+        pos += 4
+        values = array(typecode)
+        values.frombytes(buf[pos:pos + length])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        arrays.append(values.tolist())
+        pos += length
+    return arrays, pos
+
+
+class BackgroundWriter:
+    """Coalesce bursts of changes and write them on a background thread"""
+
+    def __init__(self, save_window=0.5):
+        self.save_window = save_window
+        self.last_save_latency = None
+        self.last_error = None
+        # Called with the number of changes and the seconds taken after every
+        # successful background write
+        self.write_observer = None
+        self._pending = []
+        self._in_flight = 0
+        self._failures = 0
+        self._flush_requested = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._writer = None
+
+    @property
+    def pending_writes(self):
+        """Number of changes not yet on disk"""
+        with self._cond:
+            return len(self._pending) + self._in_flight
+
+    def status(self):
+        """Pending write count, last save latency and last error"""
+        with self._cond:
+            return {
+                'pending_writes': len(self._pending) + self._in_flight,
+                'last_save_latency': self.last_save_latency,
+                'last_error': self.last_error
+            }
+
+    def append(self, change, payload):
+        """Queue a change to be written"""
+        self.append_many([(change, payload)])
+
+    def append_many(self, changes):
+        """Queue a list of (change, payload) pairs to be written together"""
+        entries = [self._prepare_change(change, payload) for change, payload in changes]
+        with self._cond:
+            self._pending.extend(entries)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+                self._writer.start()
+            self._cond.notify_all()
+
+    def flush(self):
+        """Block until every queued change has been written"""
+        with self._cond:
+            if not self._pending and not self._in_flight:
+                return
+            failures = self._failures
+            self._flush_requested = True
+            self._cond.notify_all()
+            while (self._pending or self._in_flight) and self._failures == failures:
+                self._cond.wait()
+            if self._failures != failures:
+                raise self.last_error
+
+    def close(self):
+        """Write everything that is queued and stop the writer thread
+
+        If the queued changes cannot be written, the writer makes one last
+        attempt and stops, and the error is raised.
+        """
+        try:
+            self.flush()
+        finally:
+            with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+            if self._writer is not None:
+                self._writer.join()
+                self._writer = None
+
+    def _writer_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+
+                # Give the rest of a burst a chance to arrive so it all goes
+                # out in one write
+                deadline = time.monotonic() + self.save_window
+                while not self._flush_requested and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch = self._pending
+                self._pending = []
+                self._in_flight = len(batch)
+
+            started = time.perf_counter()
+            error = None
+            try:
+                self._write_changes(batch)
+            except Exception as e:
+                error = e
+
+            with self._cond:
+                self._in_flight = 0
+                if error is None:
+                    self.last_save_latency = time.perf_counter() - started
+                    self.last_error = None
+                else:
+                    # Keep the batch so nothing is lost and retry after a pause
+                    self._pending[:0] = batch
+                    self.last_error = error
+                    self._failures += 1
+                    self._flush_requested = False
+                if not self._pending:
+                    self._flush_requested = False
+                self._cond.notify_all()
+                if error is not None and self._closed:
+                    # That was the last attempt: stop so close() can return,
+                    # leaving the error in last_error
+                    return
+
+            if error is None and self.write_observer is not None:
+                self.write_observer(len(batch), self.last_save_latency)
+
+            if error is not None:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._closed, max(self.save_window, 1.0))
+
+    def _prepare_change(self, change, payload):
+        # Runs on the caller's thread; the result must not share state with payload
+        raise NotImplementedError
+
+    def _write_changes(self, batch):
+        raise NotImplementedError
+
+
+class OrderStore(BackgroundWriter):
+    """Store whose orders are kept by day and read into memory on demand
+
+    Subclasses do the I/O: they fill in order_days and open_orders and the
+    loaded orders on load(), write full saves and read one day's orders
+    with _read_day(). This class keeps the day index, the order lookup and
+    the per-day counts in step with loads, saves and new changes, and
+    answers the order queries from memory.
+    """
+
+    def __init__(self, save_window=0.5):
+        super().__init__(save_window)
+        self.data = None
+        # Order count per day and the day of every order still in the kitchen
+        self.order_days = {}
+        self.open_orders = {}
+        # Every loaded order by id
+        self.orders_by_id = {}
+        # Orders of every day with orders, read into memory on demand. Reports
+        # read days on worker threads, so checking and loading a day holds
+        # _load_lock.
+        self._days = DayIndex()
+        self._load_lock = threading.RLock()
+
+    def load_orders(self, start=None, end=None):
+        """Read the orders between two dates (inclusive) into memory and return them"""
+        with self._load_lock:
+            for day in self._days.unloaded_days(start, end):
+                self._load_day(day)
+            return self._days.orders_in_range(start, end)
+
+    def read_orders(self, start=None, end=None):
+        """Orders between two dates (inclusive), reading days that are not loaded without keeping them"""
+        with self._load_lock:
+            days = [(day, self._days.orders[day]) for day in self._days.days_in_range(start, end)]
+            days = [(day, orders if orders is None else list(orders)) for day, orders in days]
+        orders = []
+        for day, day_orders in days:
+            orders.extend(self._read_day(day) if day_orders is None else day_orders)
+        return orders
+
+    def append_many(self, changes):
+        """Queue a list of (change, payload) pairs to be written together"""
+        with self._load_lock:
+            for change, payload in changes:
+                if change == 'order_created':
+                    if self._days.needs_loading(payload['date']):
+                        # An order for an older day: read the day before adding to it
+                        self._load_day(payload['date'])
+                    self._days.add_order(payload)
+                    self.orders_by_id[payload['id']] = payload
+                track_order_change(self.order_days, self.open_orders, change, payload)
+        super().append_many(changes)
+
+    def count_orders(self, date=None):
+        """Count all orders, or the orders taken on one date"""
+        if date is None:
+            return sum(self.order_days.values())
+        return self.order_days.get(date, 0)
+
+    def order_counts_by_day(self):
+        """Number of orders on every day that has any"""
+        return dict(self.order_days)
+
+    def find_order(self, order_id):
+        """Find a loaded order by id"""
+        return self.orders_by_id.get(order_id)
+
+    def orders_with_status(self, status):
+        """List loaded orders with the given status"""
+        if status == 'active':
+            # The days of open orders are always loaded
+            return [self.orders_by_id[order_id] for order_id in sorted(self.open_orders)
+                    if order_id in self.orders_by_id]
+        return [o for o in self.data['orders'] if o.get('status') == status]
+
+    def _index_loaded(self, orders, days):
+        # Index the orders read by load(); days were read in full, even if empty
+        with self._load_lock:
+            self.orders_by_id = {o['id']: o for o in orders}
+            self._days = DayIndex()
+            for day in self.order_days:
+                self._days.add_known_day(day)
+            for day in days:
+                self._days.set_day(day, [])
+            for day, day_orders in group_by_day(orders).items():
+                self._days.set_day(day, day_orders)
+
+    def _index_saved(self, orders, days):
+        # Index the orders of a full save; days groups them by day
+        with self._load_lock:
+            for day, day_orders in days.items():
+                self.order_days[day] = len(day_orders)
+                self._days.set_day(day, day_orders)
+            self.orders_by_id = {o['id']: o for o in orders}
+            self.open_orders = {order_id: day for order_id, day in self.open_orders.items() if day not in days}
+            self.open_orders.update({o['id']: o['date'] for o in orders if o.get('status') == 'active'})
+
+    def _load_day(self, day):
+        orders = self._read_day(day)
+        self._days.set_day(day, orders)
+        self.data['orders'].extend(orders)
+        self.orders_by_id.update((o['id'], o) for o in orders)
+
+    def _read_day(self, day):
+        raise NotImplementedError
+
+
+class JournalStore(OrderStore):
+    """JSON snapshot plus an append-only journal of changes
+
+    Orders are kept out of the snapshot in one file per day under
+    <name>_orders/. Only the days that are needed are read into memory.
+    With snapshot_format='binary' the snapshot and day files are written in
+    the packed binary format instead; either format is read back. A
+    read_only store never writes: a data file that still holds every order
+    is split by day in memory only and the journal is never compacted.
+    """
+
+    def __init__(self, data_file, compact_every=500, save_window=0.5, snapshot_format='json', read_only=False):
+        super().__init__(save_window)
+        if snapshot_format not in ('json', 'binary'):
+            raise ValueError("Unknown snapshot format: %s" % snapshot_format)
+        self.data_file = data_file
+        self.snapshot_format = snapshot_format
+        base = os.path.splitext(data_file)[0]
+        self.binary_file = base + '.snap'
+        self.journal_file = base + '.journal'
+        self.compacting_file = base + '.journal.compacting'
+        self.orders_dir = base + '_orders'
+        self.compact_every = compact_every
+        self.read_only = read_only
+        self.seq = 0
+        self.pending_entries = 0
+        self._journal = None
+        self._compactor = None
+        # Orders of a data file that still holds every order, by day, when
+        # read_only keeps them from being written to day files
+        self._split_days = {}
+
+    def load(self, today=None):
+        """Rebuild data from the snapshot and the journal tail, or None if there is no snapshot
+
+        Only today's orders and the days with orders still in the kitchen or
+        touched by the journal tail are read; older days are loaded by
+        load_orders().
+        """
+        if not os.path.exists(self.data_file) and not os.path.exists(self.binary_file):
+            return None
+        today = today or time.strftime('%Y-%m-%d')
+
+        data, self.seq, self.order_days, self.open_orders = self._read_snapshot()
+
+        # Anything written after the snapshot, including a compaction that
+        # was interrupted before it could finish
+        entries = [entry for path in (self.compacting_file, self.journal_file)
+                   for entry in self._read_journal(path) if entry['seq'] > self.seq]
+
+        days = {today} | set(self.open_orders.values()) | self._journal_days(entries, self.open_orders)
+        data['orders'] = []
+        for day in sorted(days):
+            data['orders'].extend(self._read_day(day))
+
+        # The kitchen queue refers to the loaded orders rather than to copies
+        by_id = {o['id']: o for o in data['orders']}
+        data['kitchen_orders'] = [by_id[o['id']] for o in data['kitchen_orders'] if o.get('id') in by_id]
+
+        self.seq = self._replay(data, entries, self.order_days, self.open_orders, by_id) or self.seq
+        self._index_loaded(data['orders'], days)
+
+        self.pending_entries = len(entries)
+        if self.pending_entries >= self.compact_every and not self.read_only:
+            self.compact()
+        self.data = data
+        return data
+
+    def save(self, data):
+        """Write a full snapshot of the data in memory and start a fresh journal"""
+        if self.read_only:
+            raise ValueError(f"{self.data_file} is opened read-only")
+        self.data = data
+        self.flush()
+        self.wait_for_compaction()
+        self._close_journal()
+
+        days = group_by_day(data['orders'])
+        for day, orders in days.items():
+            self._write_day(day, orders)
+        self._index_saved(data['orders'], days)
+
+        self._write_snapshot(data, self.seq, self.order_days, self.open_orders)
+        for path in (self.journal_file, self.compacting_file):
+            if os.path.exists(path):
+                os.remove(path)
+        self.pending_entries = 0
+
+    def append_many(self, changes):
+        """Queue a list of (change, payload) pairs to be written together"""
+        if self.read_only:
+            raise ValueError(f"{self.data_file} is opened read-only")
+        super().append_many(changes)
+
+    def _prepare_change(self, change, payload):
+        self.seq += 1
+        entry = {'seq': self.seq, 'change': change, 'data': payload}
+        return json.dumps(entry, default=str) + '\n'
+
+    def _write_changes(self, lines):
+        if self._journal is None:
+            self._journal = open(self.journal_file, 'a')
+        self._journal.write(''.join(lines))
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+        self.pending_entries += len(lines)
+        if self.pending_entries >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """Fold the journal into the snapshot and day files on a background thread"""
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+
+        # Seal the current journal so new changes go to a fresh file. If an
+        # earlier compaction was interrupted, finish that one first.
+        if not os.path.exists(self.compacting_file):
+            self._close_journal()
+            if not os.path.exists(self.journal_file):
+                return
+            os.replace(self.journal_file, self.compacting_file)
+            self.pending_entries = 0
+
+        self._compactor = threading.Thread(target=self._compact_worker, daemon=True)
+        self._compactor.start()
+
+    def wait_for_compaction(self):
+        """Block until a running compaction has finished"""
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+
+    def close(self):
+        """Write queued changes, close the journal and wait for background work"""
+        try:
+            super().close()
+        finally:
+            self.wait_for_compaction()
+            self._close_journal()
+
+    def _compact_worker(self):
+        data, seq, order_days, open_orders = self._read_snapshot()
+        entries = [entry for entry in self._read_journal(self.compacting_file) if entry['seq'] > seq]
+
+        # Only the days the journal touches need to be rewritten
+        days = self._journal_days(entries, open_orders)
+        data['orders'] = []
+        for day in days:
+            data['orders'].extend(self._read_day(day))
+
+        seq = self._replay(data, entries, order_days, open_orders, {o['id']: o for o in data['orders']}) or seq
+
+        # Day files go first: replaying them again after a crash is harmless
+        by_day = group_by_day(data['orders'])
+        for day in days:
+            self._write_day(day, by_day.get(day, []))
+            order_days[day] = len(by_day.get(day, []))
+
+        self._write_snapshot(data, seq, order_days, open_orders)
+        os.remove(self.compacting_file)
+
+    def _replay(self, data, entries, order_days, open_orders, orders_by_id):
+        # Returns the sequence number of the last entry applied
+        seq = None
+        for entry in entries:
+            change, payload = entry['change'], entry['data']
+            if change == 'order_status' and 'date' not in payload:
+                # Entries written before orders were split by day
+                payload['date'] = open_orders.get(payload['id'])
+            apply_change(data, change, payload, orders_by_id)
+            track_order_change(order_days, open_orders, change, payload)
+            seq = entry['seq']
+        return seq
+
+    def _journal_days(self, entries, open_orders):
+        # Days whose orders are touched by the given journal entries
+        days = set()
+        for entry in entries:
+            if entry['change'] in ('order_created', 'order_status'):
+                day = entry['data'].get('date') or open_orders.get(entry['data']['id'])
+                if day:
+                    days.add(day)
+        return days
+
+    def _read_snapshot(self):
+        data = self._read_file(self.data_file, self.binary_file)
+        if 'orders' in data:
+            self._split_orders(data)
+
+        seq = data.pop('_journal_seq', 0)
+        order_days = data.pop('_order_days', {})
+        open_orders = {order_id: day for order_id, day in data.pop('_open_orders', [])}
+        return data, seq, order_days, open_orders
+
+    def _split_orders(self, data):
+        # One-off conversion of a data file that still holds every order
+        orders = data.pop('orders')
+        days = group_by_day(orders)
+        if self.read_only:
+            self._split_days = days
+        else:
+            for day, day_orders in days.items():
+                self._write_day(day, day_orders)
+
+        order_days = {day: len(day_orders) for day, day_orders in days.items()}
+        open_orders = {o['id']: o['date'] for o in orders if o.get('status') == 'active'}
+        data['kitchen_orders'] = [o for o in data.get('kitchen_orders', []) if o.get('id') in open_orders]
+        seq = data.pop('_journal_seq', 0)
+        if not self.read_only:
+            self._write_snapshot(data, seq, order_days, open_orders)
+
+        data['_journal_seq'] = seq
+        data['_order_days'] = order_days
+        data['_open_orders'] = list(open_orders.items())
+
+    def _write_snapshot(self, data, seq, order_days, open_orders):
+        snapshot = {key: value for key, value in data.items() if key != 'orders'}
+        snapshot['_journal_seq'] = seq
+        snapshot['_order_days'] = order_days
+        snapshot['_open_orders'] = sorted(open_orders.items())
+        self._write_file(self.data_file, self.binary_file, snapshot, indent=2)
+
+    def _day_file(self, day, extension='.json'):
+        return os.path.join(self.orders_dir, day + extension)
+
+    def _read_day(self, day):
+        if day in self._split_days:
+            return self._split_days.pop(day)
+        json_file, binary_file = self._day_file(day), self._day_file(day, '.bin')
+        if not os.path.exists(json_file) and not os.path.exists(binary_file):
+            return []
+        return self._read_file(json_file, binary_file, key='orders')
+
+    def _write_day(self, day, orders):
+        os.makedirs(self.orders_dir, exist_ok=True)
+        self._write_file(self._day_file(day), self._day_file(day, '.bin'), orders, key='orders')
+
+    def _read_file(self, json_file, binary_file, key=None):
+        # The binary file wins when both exist; the other one is removed on
+        # the next write of the same content
+        if os.path.exists(binary_file):
+            with open(binary_file, 'rb') as f:
+                content = decode_snapshot(f.read())
+            return content[key] if key else content
+        with open(json_file, 'r') as f:
+            return json.load(f)
+
+    def _write_file(self, json_file, binary_file, content, indent=None, key=None):
+        # Write in the configured format and drop the file in the other one
+        if self.snapshot_format == 'binary':
+            buf = encode_snapshot({key: content} if key else content)
+            self._replace_file(binary_file, buf, 'wb')
+            stale_file = json_file
+        else:
+            self._replace_file(json_file,
+                               json.dumps(content, indent=indent, default=str), 'w')
+            stale_file = binary_file
+        if os.path.exists(stale_file):
+            os.remove(stale_file)
+
+    def _replace_file(self, path, content, mode):
+        # Write to a temporary file first so a crash never leaves a torn file
+        tmp_file = path + '.tmp'
+        with open(tmp_file, mode) as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, path)
+
+    def _read_journal(self, path):
+        if not os.path.exists(path):
+            return
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-append
+                    break
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    status TEXT,
+    customer TEXT,
+    total REAL NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_orders_date ON orders(date);
+CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status);
+CREATE INDEX IF NOT EXISTS idx_orders_customer ON orders(customer);
+
+CREATE TABLE IF NOT EXISTS kitchen_orders (
+    position INTEGER PRIMARY KEY,
+    order_id INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS customers (
+    position INTEGER PRIMARY KEY,
+    name TEXT,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_customers_name ON customers(name);
+
+CREATE TABLE IF NOT EXISTS inventory (
+    name TEXT PRIMARY KEY,
+    doc TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS expenses (
+    position INTEGER PRIMARY KEY,
+    date TEXT,
+    amount REAL NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses(date);
+
+CREATE TABLE IF NOT EXISTS employees (
+    position INTEGER PRIMARY KEY,
+    doc TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS daily_sales (
+    date TEXT PRIMARY KEY,
+    total REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS rollups (
+    bucket TEXT PRIMARY KEY,
+    doc TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS customer_stats (
+    customer_id INTEGER PRIMARY KEY,
+    spend REAL NOT NULL,
+    orders INTEGER NOT NULL,
+    last_visit TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS item_sales (
+    name TEXT PRIMARY KEY,
+    quantity INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Data keys that get their own table; everything else is kept in settings
+SQLITE_TABLE_KEYS = ('orders', 'kitchen_orders', 'customers', 'inventory',
+                     'expenses', 'employees', 'daily_sales', 'rollups', 'item_sales', 'customer_stats')
+
+
+class SqliteStore(OrderStore):
+    """SQLite database with one indexed table per collection"""
+
+    def __init__(self, data_file, save_window=0.5):
+        super().__init__(save_window)
+        self.data_file = data_file
+        # Rollup buckets changed by the batch being written
+        self._touched_buckets = {}
+        # Writes happen on the writer thread and queries on the caller's
+        self._db_lock = threading.Lock()
+        self.conn = sqlite3.connect(data_file, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SQLITE_SCHEMA)
+
+    def load(self, today=None):
+        """Load data from the database, or None if it is empty
+
+        Only today's orders and the days with orders still in the kitchen are
+        read; older days are loaded by load_orders().
+        """
+        with self._db_lock:
+            return self._load(today or time.strftime('%Y-%m-%d'))
+
+    def _load(self, today):
+        settings = self.conn.execute('SELECT key, value FROM settings').fetchall()
+        if not settings:
+            return None
+
+        data = {key: json.loads(value) for key, value in settings}
+        data['orders'] = [json.loads(doc) for (doc,) in
+                          self.conn.execute("SELECT doc FROM orders WHERE date = ? OR date IN "
+                                            "(SELECT date FROM orders WHERE status = 'active') "
+                                            "ORDER BY id", (today,))]
+        self.order_days = dict(self.conn.execute('SELECT date, COUNT(*) FROM orders GROUP BY date'))
+        self.open_orders = dict(self.conn.execute("SELECT id, date FROM orders WHERE status = 'active'"))
+        self._index_loaded(data['orders'], [today])
+        data['kitchen_orders'] = [self.orders_by_id[order_id] for (order_id,) in
+                                  self.conn.execute('SELECT order_id FROM kitchen_orders ORDER BY position')
+                                  if order_id in self.orders_by_id]
+        data['customers'] = [json.loads(doc) for (doc,) in
+                             self.conn.execute('SELECT doc FROM customers ORDER BY position')]
+        data['inventory'] = {name: json.loads(doc) for name, doc in
+                             self.conn.execute('SELECT name, doc FROM inventory')}
+        data['expenses'] = [json.loads(doc) for (doc,) in
+                            self.conn.execute('SELECT doc FROM expenses ORDER BY position')]
+        data['employees'] = [json.loads(doc) for (doc,) in
+                             self.conn.execute('SELECT doc FROM employees ORDER BY position')]
+        data['daily_sales'] = dict(self.conn.execute('SELECT date, total FROM daily_sales'))
+        rollups = {'days': {}, 'hours': {}}
+        for bucket, doc in self.conn.execute('SELECT bucket, doc FROM rollups'):
+            period, key = bucket.split(':', 1)
+            rollups[period][key] = json.loads(doc)
+        item_sales = dict(self.conn.execute('SELECT name, quantity FROM item_sales'))
+        # A database written before these existed has orders but no totals
+        has_orders = self.conn.execute('SELECT 1 FROM orders LIMIT 1').fetchone() is not None
+        if rollups['days'] or not has_orders:
+            data['rollups'] = rollups
+        if item_sales or not has_orders:
+            data['item_sales'] = item_sales
+        if 'next_customer_id' in data:
+            data['customer_stats'] = {str(customer_id): {'spend': spend, 'orders': orders, 'last_visit': last_visit}
+                                      for customer_id, spend, orders, last_visit in
+                                      self.conn.execute('SELECT customer_id, spend, orders, last_visit '
+                                                        'FROM customer_stats')}
+
+        self.data = data
+        return data
+
+    def save(self, data):
+        """Replace the database contents with the data in memory
+
+        Orders of days that were never loaded are left alone.
+        """
+        self.flush()
+        self.data = data
+        self._index_saved(data['orders'], group_by_day(data['orders']))
+
+        with self._db_lock, self.conn:
+            for table in SQLITE_TABLE_KEYS + ('settings',):
+                if table != 'orders':
+                    self.conn.execute(f'DELETE FROM {table}')
+
+            for order in data['orders']:
+                self._insert_order(order)
+            self.conn.executemany('INSERT INTO kitchen_orders (order_id) VALUES (?)',
+                                  [(o['id'],) for o in data['kitchen_orders']])
+            for customer in data['customers']:
+                self._insert_customer(customer)
+            for name, item in data['inventory'].items():
+                self._set_inventory_item(name, item)
+            for expense in data['expenses']:
+                self._insert_expense(expense)
+            for employee in data['employees']:
+                self._insert_employee(employee)
+            self.conn.executemany('INSERT INTO daily_sales (date, total) VALUES (?, ?)',
+                                  list(data['daily_sales'].items()))
+            if 'rollups' in data:
+                self.conn.executemany('INSERT INTO rollups (bucket, doc) VALUES (?, ?)',
+                                      [(f'{period}:{key}', json.dumps(bucket))
+                                       for period in ('days', 'hours')
+                                       for key, bucket in data['rollups'][period].items()])
+            if 'item_sales' in data:
+                self.conn.executemany('INSERT INTO item_sales (name, quantity) VALUES (?, ?)',
+                                      list(data['item_sales'].items()))
+            if 'customer_stats' in data:
+                self.conn.executemany('INSERT INTO customer_stats (customer_id, spend, orders, last_visit) '
+                                      'VALUES (?, ?, ?, ?)',
+                                      [(int(customer_id), stats['spend'], stats['orders'], stats['last_visit'])
+                                       for customer_id, stats in data['customer_stats'].items()])
+            self.conn.executemany('INSERT INTO settings (key, value) VALUES (?, ?)',
+                                  [(key, json.dumps(value, default=str)) for key, value in data.items()
+                                   if key not in SQLITE_TABLE_KEYS])
+
+    def _prepare_change(self, change, payload):
+        return change, json.loads(json.dumps(payload, default=str))
+
+    def _write_changes(self, batch):
+        # One transaction for the whole batch; rollup buckets touched by
+        # several orders are read and written once
+        with self._db_lock, self.conn:
+            self._touched_buckets = {}
+            for change, payload in batch:
+                self._write_change(change, payload)
+            self.conn.executemany('INSERT OR REPLACE INTO rollups (bucket, doc) VALUES (?, ?)',
+                                  [(key, json.dumps(bucket)) for key, bucket in self._touched_buckets.items()])
+
+    def _write_change(self, change, payload):
+        if change == 'order_created':
+            self._insert_order(payload)
+            if payload.get('status') == 'active':
+                self.conn.execute('INSERT INTO kitchen_orders (order_id) VALUES (?)', (payload['id'],))
+            self._raise_setting('next_order_id', payload['id'] + 1)
+            self._add_to_rollups(payload)
+            self.conn.executemany('INSERT INTO item_sales (name, quantity) VALUES (?, 1) '
+                                  'ON CONFLICT(name) DO UPDATE SET quantity = quantity + 1',
+                                  [(item['name'],) for item in payload['items']])
+            self.conn.execute('INSERT INTO daily_sales (date, total) VALUES (?, ?) '
+                              'ON CONFLICT(date) DO UPDATE SET total = total + excluded.total',
+                              (payload['date'], payload['total']))
+            if payload.get('customer_id') is not None:
+                visit = f"{payload['date']} {payload.get('time', '')}".strip()
+                self.conn.execute('INSERT INTO customer_stats (customer_id, spend, orders, last_visit) '
+                                  'VALUES (?, ?, 1, ?) ON CONFLICT(customer_id) DO UPDATE SET '
+                                  'spend = spend + excluded.spend, orders = orders + 1, '
+                                  'last_visit = MAX(last_visit, excluded.last_visit)',
+                                  (payload['customer_id'], payload['total'], visit))
+        elif change == 'order_status':
+            row = self.conn.execute('SELECT doc FROM orders WHERE id = ?', (payload['id'],)).fetchone()
+            if row:
+                order = json.loads(row[0])
+                order['status'] = payload['status']
+                self._insert_order(order)
+            if payload['status'] != 'active':
+                self.conn.execute('DELETE FROM kitchen_orders WHERE order_id = ?', (payload['id'],))
+        elif change == 'menu_item_added':
+            menu = json.loads(self.conn.execute("SELECT value FROM settings WHERE key = 'menu'").fetchone()[0])
+            menu.setdefault(payload['category'], []).append(payload['item'])
+            self.conn.execute("UPDATE settings SET value = ? WHERE key = 'menu'",
+                              (json.dumps(menu, default=str),))
+        elif change == 'inventory_item_set':
+            self._set_inventory_item(payload['name'], payload['item'])
+        elif change == 'customer_added':
+            self._insert_customer(payload)
+            if 'id' in payload:
+                self._raise_setting('next_customer_id', payload['id'] + 1)
+        elif change == 'expense_added':
+            self._insert_expense(payload)
+        elif change == 'employee_added':
+            self._insert_employee(payload)
+        else:
+            raise ValueError(f"Unknown change type: {change}")
+
+    def close(self):
+        """Write queued changes and close the database connection"""
+        try:
+            super().close()
+        finally:
+            self.conn.close()
+
+    def _read_day(self, day):
+        with self._db_lock:
+            return [json.loads(doc) for (doc,) in
+                    self.conn.execute('SELECT doc FROM orders WHERE date = ? ORDER BY id', (day,))]
+
+    def _insert_order(self, order):
+        self.conn.execute('INSERT OR REPLACE INTO orders (id, date, status, customer, total, doc) '
+                          'VALUES (?, ?, ?, ?, ?, ?)',
+                          (order['id'], order['date'], order.get('status'), order.get('customer'),
+                           order['total'], json.dumps(order, default=str)))
+
+    def _add_to_rollups(self, order):
+        # Count the order in its day and hour buckets; _write_changes stores them
+        day, hour = order_buckets(order)
+        for bucket_key in (f'days:{day}', f'hours:{hour}'):
+            bucket = self._touched_buckets.get(bucket_key)
+            if bucket is None:
+                row = self.conn.execute('SELECT doc FROM rollups WHERE bucket = ?', (bucket_key,)).fetchone()
+                bucket = self._touched_buckets[bucket_key] = json.loads(row[0]) if row else new_bucket()
+            add_to_bucket(bucket, order)
+
+    def _raise_setting(self, key, value):
+        # Store an integer setting unless the stored value is already higher
+        self.conn.execute("INSERT INTO settings (key, value) VALUES (?, ?) "
+                          "ON CONFLICT(key) DO UPDATE SET value = excluded.value "
+                          "WHERE CAST(excluded.value AS INTEGER) > CAST(value AS INTEGER)",
+                          (key, str(value)))
+
+    def _insert_customer(self, customer):
+        self.conn.execute('INSERT INTO customers (name, doc) VALUES (?, ?)',
+                          (customer.get('name'), json.dumps(customer, default=str)))
+
+    def _set_inventory_item(self, name, item):
+        self.conn.execute('INSERT OR REPLACE INTO inventory (name, doc) VALUES (?, ?)',
+                          (name, json.dumps(item, default=str)))
+
+    def _insert_expense(self, expense):
+        self.conn.execute('INSERT INTO expenses (date, amount, doc) VALUES (?, ?, ?)',
+                          (expense.get('date'), expense['amount'], json.dumps(expense, default=str)))
+
+    def _insert_employee(self, employee):
+        self.conn.execute('INSERT INTO employees (doc) VALUES (?)', (json.dumps(employee, default=str),))
+
+
+STORAGE_BACKENDS = {
+    'json': (JournalStore, 'restaurant_data.json'),
+    'sqlite': (SqliteStore, 'restaurant_data.db'),
+}
+
+
+def open_store(backend='json', data_file=None, **options):
+    """Open the storage backend with the given name"""
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend: {backend}")
+    store_class, default_file = STORAGE_BACKENDS[backend]
+    return store_class(data_file or default_file, **options)
+
+
+def migrate_json_to_sqlite(json_file, db_file):
+    """Copy a JSON data file (and its journal) into a SQLite database, leaving them untouched"""
+    source = JournalStore(json_file, read_only=True)
+    data = source.load()
+    if data is None:
+        raise FileNotFoundError(json_file)
+    source.load_orders()
+    source.close()
+
+    target = SqliteStore(db_file)
+    target.save(data)
+    target.close()
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Restaurant data storage tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    migrate = subparsers.add_parser('migrate', help="Migrate restaurant_data.json into SQLite")
+    migrate.add_argument('source', nargs='?', default=STORAGE_BACKENDS['json'][1])
+    migrate.add_argument('target', nargs='?', default=STORAGE_BACKENDS['sqlite'][1])
+
+    args = parser.parse_args()
+    if args.command == 'migrate':
+        data = migrate_json_to_sqlite(args.source, args.target)
+        print(f"Migrated {len(data['orders'])} orders from {args.source} to {args.target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task's function once the task has been cancelled"""
+
+
+class Task:
+    """Progress and cancellation of one function running on a worker"""
+
+    def __init__(self, name):
+        self.name = name
+        self.progress = 0.0
+        self.done = False
+        self._cancelled = threading.Event()
+
+    def step(self, fraction):
+        """Report progress from 0 to 1; raises TaskCancelled once the task is cancelled"""
+        if self._cancelled.is_set():
+            raise TaskCancelled(self.name)
+        self.progress = fraction
+
+    def cancel(self):
+        """Ask the task to stop at its next step"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+
+def report_progress(task, fraction):
+    """Step a task if there is one, so the same function runs with and without a worker"""
+    if task is not None:
+        task.step(fraction)
+
+
+class TaskRunner:
+    """Run functions on a pool of worker threads and hand the results to the Tk loop
+
+    Workers only put their outcome on a queue; the queue is drained by a
+    poll on the Tk thread, which is where every callback runs. The poll is
+    a scheduler timer in the runner's own scope and only runs while tasks
+    are running.
+    """
+
+    def __init__(self, scheduler, max_workers=3, poll_ms=50):
+        self.scheduler = scheduler
+        self.poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='task')
+        self._results = queue.Queue()
+        self._callbacks = {}
+
+    def submit(self, name, func, on_done, on_error=None, on_progress=None):
+        """Run func(task) on a worker and return the task
+
+        on_done gets the result, on_error the exception and on_progress the
+        task's progress on every poll. Nothing is called for a cancelled task.
+        """
+        task = Task(name)
+        self._callbacks[task] = (on_done, on_error, on_progress)
+        self._executor.submit(self._run, task, func)
+        self.scheduler.every(self, 'poll', self.poll_ms, self._poll)
+        return task
+
+    def active(self):
+        """Number of tasks submitted and not yet handed back"""
+        return len(self._callbacks)
+
+    def shutdown(self):
+        """Cancel every task and stop the workers without waiting for them"""
+        for task in list(self._callbacks):
+            task.cancel()
+        self._callbacks.clear()
+        self.scheduler.cancel(self)
+        self._executor.shutdown(wait=False)
+
+    def _run(self, task, func):
+        # Runs on a worker thread
+        try:
+            self._results.put((task, func(task), None))
+        except TaskCancelled:
+            self._results.put((task, None, None))
+        except Exception as e:
+            self._results.put((task, None, e))
+
+    def _poll(self):
+        # Runs on the Tk thread
+        while True:
+            try:
+                task, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            task.done = True
+            on_done, on_error, _ = self._callbacks.pop(task, (None, None, None))
+            if task.cancelled:
+                continue
+            if error is not None:
+                if on_error is not None:
+                    on_error(error)
+            elif on_done is not None:
+                on_done(result)
+        for task, (_, _, on_progress) in list(self._callbacks.items()):
+            if on_progress is not None and not task.cancelled:
+                on_progress(task.progress)
+        if not self._callbacks:
+            self.scheduler.cancel(self, 'poll')
+
+
+class Scheduler:
+    """Every timer of the application, run by root.after and grouped by scope
+
+    A timer is named within its scope. Scheduling a name that is already
+    pending in the scope keeps the pending timer instead of adding a second
+    one, so repeated refresh requests coalesce and revisiting a screen
+    cannot stack another loop. When the scope is a widget its timers are
+    cancelled as soon as it is destroyed, tying them to the screen that
+    shows it; other scopes are cancelled with cancel().
+    """
+
+    def __init__(self, root):
+        self.root = root
+        # (scope, name) -> [after id, func, interval in ms or None]
+        self._timers = {}
+        self._watched = set()
+
+    def every(self, scope, name, interval_ms, func):
+        """Call func every interval_ms until the scope is cancelled"""
+        self._schedule(scope, name, interval_ms, func, interval_ms)
+
+    def once(self, scope, name, delay_ms, func):
+        """Call func once after delay_ms unless the same timer is already pending"""
+        self._schedule(scope, name, delay_ms, func, None)
+
+    def cancel(self, scope, name=None):
+        """Cancel one timer of a scope, or all of them without a name"""
+        for key in [key for key in self._timers if key[0] == scope and name in (None, key[1])]:
+            self.root.after_cancel(self._timers.pop(key)[0])
+
+    def active(self, scope=None):
+        """Number of pending timers, of one scope or of all"""
+        if scope is None:
+            return len(self._timers)
+        return sum(1 for key in self._timers if key[0] == scope)
+
+    def shutdown(self):
+        """Cancel every timer"""
+        for after_id, _, _ in self._timers.values():
+            self.root.after_cancel(after_id)
+        self._timers.clear()
+
+    def _schedule(self, scope, name, delay_ms, func, interval_ms):
+        key = (scope, name)
+        if key in self._timers:
+            return
+        if hasattr(scope, 'bind') and scope not in self._watched:
+            self._watched.add(scope)
+            scope.bind('<Destroy>', lambda event: self._on_destroy(event, scope), add='+')
+        self._timers[key] = [self.root.after(delay_ms, lambda: self._fire(key)), func, interval_ms]
+
+    def _fire(self, key):
+        timer = self._timers.get(key)
+        if timer is None:
+            return
+        _, func, interval_ms = timer
+        if interval_ms is None:
+            del self._timers[key]
+            func()
+            return
+        try:
+            func()
+        finally:
+            # func may have cancelled its own scope
+            if self._timers.get(key) is timer:
+                timer[0] = self.root.after(interval_ms, lambda: self._fire(key))
+
+    def _on_destroy(self, event, scope):
+        # Destroy is also reported for every child of the scope
+        if event.widget is scope:
+            self._watched.discard(scope)
+            self.cancel(scope)
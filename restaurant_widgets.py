@@ -0,0 +1,330 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class VirtualTreeview:
+    """Treeview that only holds the rows in view
+
+    rows is any sequence (orders, customers, item names) and row_values
+    turns one entry into the values of its row, so only the entries being
+    looked at are formatted and inserted into Tk. The tree holds the
+    visible rows plus `buffer` more below them; the scrollbar, mouse wheel
+    and arrow keys move that window over rows instead of scrolling Tk items.
+    row_tags, when given, returns the tags of an entry's row.
+
+    Each row's iid is the entry's key from row_key (an order or customer
+    id, an item name). Rendering reconciles the window against the rows
+    already in the tree: only new rows are inserted, changed rows updated,
+    rows that left the window deleted and the rest left alone.
+    """
+
+    def __init__(self, parent, columns, row_values, row_key, row_tags=None, column_width=120, buffer=10,
+                 **options):
+        self.row_values = row_values
+        self.row_key = row_key
+        self.row_tags = row_tags
+        self.buffer = buffer
+        self.rows = []
+        self.first = 0
+        self.visible = 20
+        # Index and key of the selected entry; the key keeps it selected across refreshes
+        self.selected_index = None
+        self.selected_key = None
+        # iid -> (values, tags) of every row in the tree, and iid -> index in rows
+        self._shown = {}
+        self._window = {}
+        self.tree = ttk.Treeview(parent, columns=columns, show='headings', **options)
+        for col in columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=column_width)
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self._on_scrollbar)
+
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<MouseWheel>', self._on_wheel)
+        self.tree.bind('<Button-4>', lambda event: self._scroll_event(-3))
+        self.tree.bind('<Button-5>', lambda event: self._scroll_event(3))
+        self.tree.bind('<<TreeviewSelect>>', self._on_select)
+        self.tree.bind('<Up>', lambda event: self.move_selection(-1))
+        self.tree.bind('<Down>', lambda event: self.move_selection(1))
+        self.tree.bind('<Prior>', lambda event: self.move_selection(-self.visible))
+        self.tree.bind('<Next>', lambda event: self.move_selection(self.visible))
+        self.tree.bind('<Home>', lambda event: self.move_selection(-len(self.rows)))
+        self.tree.bind('<End>', lambda event: self.move_selection(len(self.rows)))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def pack(self):
+        """Pack the tree with its scrollbar on the right"""
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+    def tag_configure(self, tag, **options):
+        self.tree.tag_configure(tag, **options)
+
+    def set_rows(self, rows, reset=False):
+        """Show a new sequence of entries, from the top when reset is true
+
+        Otherwise the view stays where it was, so refreshing after a change
+        does not jump back to the first row. A selected entry stays selected
+        if it is still in view.
+        """
+        self.rows = rows
+        if reset:
+            self.first = 0
+            self.selected_key = None
+        self.first = self._clamp(self.first)
+        self.selected_index = None
+        self.render()
+        if self.selected_index is None:
+            self.selected_key = None
+
+    def insert_row(self, index, row):
+        """Add one entry at index without rebuilding the rows"""
+        self.rows.insert(index, row)
+        if self.selected_index is not None and self.selected_index >= index:
+            self.selected_index += 1
+        if index < self.first:
+            # Keep the same entries in view
+            self.first += 1
+        self.render()
+
+    def selected_row(self):
+        """The entry of the selected row, or None"""
+        if self.selected_index is None or self.selected_index >= len(self.rows):
+            return None
+        return self.rows[self.selected_index]
+
+    def scroll(self, delta):
+        """Move the view down by delta rows (up when negative)"""
+        self.scroll_to(self.first + delta)
+
+    def scroll_to(self, first):
+        """Show the rows starting at index first"""
+        first = self._clamp(first)
+        if first != self.first:
+            self.first = first
+            self.render()
+
+    def render(self):
+        """Bring the tree in line with the rows of the current window"""
+        end = min(len(self.rows), self.first + self.visible + self.buffer)
+        window = {}
+        for index in range(self.first, end):
+            window[str(self.row_key(self.rows[index]))] = index
+
+        stale = [iid for iid in self.tree.get_children() if iid not in window]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                del self._shown[iid]
+        order = list(self.tree.get_children())
+        for position, (iid, index) in enumerate(window.items()):
+            row = self.rows[index]
+            shown = (tuple(self.row_values(row)), tuple(self.row_tags(row)) if self.row_tags is not None else ())
+            if iid not in self._shown:
+                self.tree.insert('', position, iid=iid, values=shown[0], tags=shown[1])
+                order.insert(position, iid)
+            else:
+                if self._shown[iid] != shown:
+                    self.tree.item(iid, values=shown[0], tags=shown[1])
+                if order[position] != iid:
+                    self.tree.move(iid, '', position)
+                    order.remove(iid)
+                    order.insert(position, iid)
+            self._shown[iid] = shown
+        self._window = window
+
+        selected = self.selected_key is not None and self.selected_key in window
+        if selected:
+            self.selected_index = window[self.selected_key]
+            if self.tree.selection() != (self.selected_key,):
+                self.tree.selection_set(self.selected_key)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+        self.tree.yview_moveto(0)
+        self._update_scrollbar()
+
+    def _clamp(self, first):
+        return max(0, min(first, len(self.rows) - self.visible))
+
+    def _update_scrollbar(self):
+        total = len(self.rows)
+        if total <= self.visible:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.first / total, (self.first + self.visible) / total)
+
+    def _on_scrollbar(self, action, amount, what=None):
+        if action == 'moveto':
+            self.scroll_to(int(float(amount) * len(self.rows)))
+        elif what == 'pages':
+            self.scroll(int(amount) * self.visible)
+        else:
+            self.scroll(int(amount))
+
+    def _on_resize(self, event):
+        # The heading takes about two rows; anything underestimated is
+        # covered by the buffer rows below the window
+        rowheight = ttk.Style().lookup(self.tree.cget('style') or 'Treeview', 'rowheight') or 20
+        visible = max(1, event.height // int(rowheight) - 2)
+        if visible != self.visible:
+            self.visible = visible
+            self.first = self._clamp(self.first)
+            self.render()
+
+    def _on_wheel(self, event):
+        return self._scroll_event(-3 if event.delta > 0 else 3)
+
+    def _scroll_event(self, delta):
+        self.scroll(delta)
+        return 'break'
+
+    def _on_select(self, event):
+        # Rows scrolled out of the window drop out of Tk's selection, so only
+        # a new selection replaces the remembered one
+        selection = self.tree.selection()
+        if selection and selection[0] in self._window:
+            self.selected_key = selection[0]
+            self.selected_index = self._window[selection[0]]
+
+    def move_selection(self, step):
+        """Select the row step rows below the selected one (above when negative), scrolling to it"""
+        if not self.rows:
+            return 'break'
+        index = 0 if self.selected_index is None else self.selected_index + step
+        index = max(0, min(index, len(self.rows) - 1))
+        self.selected_index = index
+        self.selected_key = str(self.row_key(self.rows[index]))
+        if index < self.first:
+            self.first = index
+        elif index >= self.first + self.visible:
+            self.first = self._clamp(index - self.visible + 1)
+        self.render()
+        self.tree.focus(self.selected_key)
+        self.tree.see(self.selected_key)
+        return 'break'
+
+
+class WidgetPool:
+    """Widgets for a changing list of keyed entries, reused instead of rebuilt
+
+    create(parent) builds one widget (usually a Frame with its children)
+    and populate(widget, entry) shows an entry in it; pack_options (fill,
+    pady, ...) are used whenever a widget is packed. show() keeps the
+    widget each entry already has, hides the widgets of entries that left
+    and hands them to the next new entries, so widgets are only created
+    when more entries are shown at once than ever before. Entries are
+    assumed not to change while they are shown.
+    """
+
+    def __init__(self, parent, create, populate, key, **pack_options):
+        self.parent = parent
+        self.create = create
+        self.populate = populate
+        self.key = key
+        self.pack_options = pack_options
+        # key -> widget, in the order they are packed
+        self.shown = {}
+        self.spare = []
+
+    def show(self, entries):
+        """Show the entries in order"""
+        keys = [self.key(entry) for entry in entries]
+        wanted = set(keys)
+        for key in [key for key in self.shown if key not in wanted]:
+            widget = self.shown.pop(key)
+            widget.pack_forget()
+            self.spare.append(widget)
+
+        kept = [key for key in keys if key in self.shown]
+        if kept != list(self.shown):
+            # Kept entries changed order: pack everything again in the new order
+            for widget in self.shown.values():
+                widget.pack_forget()
+            kept = []
+
+        shown = {}
+        previous = None
+        for key, entry in zip(keys, entries):
+            widget = self.shown.get(key)
+            if widget is None or not kept:
+                if widget is None:
+                    widget = self.spare.pop() if self.spare else self.create(self.parent)
+                    self.populate(widget, entry)
+                if previous is not None:
+                    widget.pack(after=previous, **self.pack_options)
+                elif kept:
+                    widget.pack(before=self.shown[kept[0]], **self.pack_options)
+                else:
+                    widget.pack(**self.pack_options)
+            shown[key] = widget
+            previous = widget
+        self.shown = shown
+
+    def clear(self):
+        """Hide every widget, keeping them for later"""
+        self.show([])
+
+
+class ScreenManager:
+    """Screens built once and then shown or hidden instead of destroyed
+
+    show() builds a screen into its own frame the first time it is asked
+    for and afterwards only swaps frames. version() returns the current data
+    version; a screen shown again after the data changed is brought up to
+    date by its refresh callable, or built again when rebuild is true, and
+    is left as it was when it has neither. on_show runs with the screen's
+    frame every time it is shown. Timers started with the scheduler under
+    that frame are cancelled while the screen is hidden.
+    """
+
+    def __init__(self, parent, version, scheduler=None):
+        self.parent = parent
+        self.version = version
+        self.scheduler = scheduler
+        # name -> frame, data version it is up to date with and how to update it
+        self.screens = {}
+        self.current = None
+
+    def show(self, name, build, refresh=None, rebuild=False, on_show=None):
+        """Show a screen, building or refreshing it first when needed, and return its frame"""
+        if self.current is not None and self.current != name:
+            self._hide(self.current)
+        screen = self.screens.setdefault(name, {'frame': None, 'version': None})
+        screen.update(build=build, refresh=refresh, rebuild=rebuild)
+        self.current = name
+        self._update(screen)
+        if on_show is not None:
+            on_show(screen['frame'])
+        return screen['frame']
+
+    def refresh(self):
+        """Bring the screen in view up to date after a change"""
+        if self.current is not None:
+            self._update(self.screens[self.current])
+
+    def touch(self, name):
+        """Record that a screen has been updated in place and is up to date"""
+        if name in self.screens:
+            self.screens[name]['version'] = self.version()
+
+    def _update(self, screen):
+        version = self.version()
+        if screen['frame'] is not None and screen['version'] != version:
+            if screen['refresh'] is not None:
+                screen['refresh']()
+            elif screen['rebuild']:
+                screen['frame'].destroy()
+                screen['frame'] = None
+        if screen['frame'] is None:
+            screen['frame'] = tk.Frame(self.parent, bg=self.parent.cget('bg'))
+            screen['build'](screen['frame'])
+        screen['version'] = version
+        screen['frame'].pack(fill=tk.BOTH, expand=True)
+
+    def _hide(self, name):
+        frame = self.screens[name]['frame']
+        frame.pack_forget()
+        if self.scheduler is not None:
+            self.scheduler.cancel(frame)
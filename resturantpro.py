@@ -1,10 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, filedialog
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 import os
+import csv
 from collections import defaultdict
 import hashlib
+from restaurant_storage import STORAGE_BACKENDS, open_store
+from restaurant_analytics import EXPENSE_CATEGORIES, period_range
+from restaurant_engine import RestaurantEngine, order_list_row
+from restaurant_instrumentation import OperationTimings, timed
+from restaurant_tasks import Scheduler, TaskRunner
+from restaurant_widgets import ScreenManager, VirtualTreeview, WidgetPool
 
 class RestaurantSystemWithRoles:
     def __init__(self, root):
@@ -27,16 +34,42 @@ class RestaurantSystemWithRoles:
             'text_secondary': '#a0a0a0'
         }
         
-        # Data storage
-        self.data_file = "restaurant_data.json"
+        # Data storage (RESTAURANT_STORAGE=sqlite selects the SQLite backend).
+        # Saves are written in the background; changes made within
+        # RESTAURANT_SAVE_WINDOW seconds of each other share one write.
+        # RESTAURANT_SNAPSHOT_FORMAT=binary writes the JSON backend's files in
+        # the packed binary format.
+        self.storage_backend = os.environ.get('RESTAURANT_STORAGE', 'json')
+        self.save_window = float(os.environ.get('RESTAURANT_SAVE_WINDOW', '0.5'))
+        self.snapshot_format = os.environ.get('RESTAURANT_SNAPSHOT_FORMAT', 'json')
+        self.data_file = STORAGE_BACKENDS[self.storage_backend][1]
         self.users_file = "restaurant_users.json"
+        self.current_date = datetime.now().strftime("%Y-%m-%d")
+        
+        # Operation timings (RESTAURANT_TIMINGS=0 turns them off); anything
+        # slower than RESTAURANT_SLOW_MS is written to the slow-operation log
+        self.timings = OperationTimings(enabled=os.environ.get('RESTAURANT_TIMINGS', '1') != '0',
+                                        slow_threshold=float(os.environ.get('RESTAURANT_SLOW_MS', '250')) / 1000,
+                                        log_file="restaurant_slow_ops.log")
+        self.timings.context = self.operation_context
+        self.current_screen = None
+        self.orders_listed = 0
+        # Every timer goes through the scheduler, tied to the widget it updates
+        self.scheduler = Scheduler(self.root)
+        # Reports are built on these workers so the POS stays responsive
+        self.tasks = TaskRunner(self.scheduler)
         self.load_data()
         self.load_users()
         
         # Current session
-        self.current_date = datetime.now().strftime("%Y-%m-%d")
         self.current_user = None
         self.notifications = []
+        self.orders_range = (self.current_date, self.current_date)
+        # Dates shown on the accounting screen (None means unbounded)
+        self.accounting_range = (None, None)
+        
+        # Make sure queued saves reach the disk when the window is closed
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Apply modern theme
         self.setup_modern_theme()
@@ -112,48 +145,70 @@ class RestaurantSystemWithRoles:
             messagebox.showerror("Error", f"Failed to save users: {e}")
     
     def load_data(self):
-        """Load data from file or initialize empty"""
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r') as f:
-                    self.data = json.load(f)
-            except:
-                self.initialize_empty_data()
-        else:
-            self.initialize_empty_data()
-    
-    def initialize_empty_data(self):
-        """Initialize with empty data"""
-        self.data = {
-            'menu': {
-                'Appetizers': [],
-                'Main Courses': [],
-                'Desserts': [],
-                'Beverages': []
-            },
-            'inventory': {},
-            'orders': [],
-            'employees': [],
-            'tables': {i: {'status': 'available', 'order_id': None} for i in range(1, 11)},
-            'daily_sales': defaultdict(float),
-            'expenses': [],
-            'customers': [],
-            'reservations': [],
-            'suppliers': [],
-            'coupons': [],
-            'tax_settings': {'rate': 0.08, 'name': 'Sales Tax'},
-            'kitchen_orders': []
-        }
-        self.save_data()
+        """Load data through the order engine or initialize empty"""
+        options = {'save_window': self.save_window}
+        if self.storage_backend == 'json':
+            options['snapshot_format'] = self.snapshot_format
+        self.engine = RestaurantEngine(open_store(self.storage_backend, self.data_file, **options), self.timings)
+        self.engine.stock.threshold_observer = self.on_stock_threshold
+        # A missing data file starts an empty restaurant inside engine.load;
+        # a file that cannot be read must never be replaced by an empty one
+        try:
+            self.data = self.engine.load(self.current_date)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load data from {self.data_file}: {e}\n\n"
+                                 "Nothing has been changed. Restore or repair the file and start again.")
+            self.root.destroy()
+            raise SystemExit(1)
     
-    def save_data(self):
-        """Save data to file"""
+    def flush_data(self):
+        """Wait for queued saves to be written"""
         try:
-            with open(self.data_file, 'w') as f:
-                json.dump(self.data, f, indent=2, default=str)
+            self.engine.flush()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save data: {e}")
     
+    def get_save_status(self):
+        """Describe pending writes and the latency of the last save"""
+        status = self.engine.status()
+        latency = status['last_save_latency']
+        text = f"Pending writes: {status['pending_writes']}"
+        text += f"  |  Last save: {latency * 1000:.1f} ms" if latency is not None else "  |  Last save: -"
+        if status['last_error'] is not None:
+            text += f"  |  Last error: {status['last_error']}"
+        return text
+    
+    def operation_context(self):
+        """Describe the current user, screen and data sizes for the slow-operation log"""
+        return {
+            'user': self.current_user['username'] if self.current_user else None,
+            'screen': self.current_screen,
+            'orders_loaded': len(self.data['orders']),
+            'kitchen_orders': len(self.data['kitchen_orders']),
+            'orders_listed': self.orders_listed,
+            'active_timers': self.scheduler.active()
+        }
+    
+    def get_timing_summary(self):
+        """Describe the p50/p95/p99 duration of every timed operation and the active timers"""
+        stats = self.timings.stats()
+        lines = [f"Active timers: {self.scheduler.active()}  |  Running reports: {self.tasks.active()}", ""]
+        if not stats:
+            lines.append("No operations recorded yet")
+            return "\n".join(lines)
+        lines.append(f"{'Operation':28}{'Count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for operation, values in sorted(stats.items()):
+            lines.append(f"{operation:28}{values['count']:>7}{values['p50'] * 1000:>10.1f}"
+                         f"{values['p95'] * 1000:>10.1f}{values['p99'] * 1000:>10.1f}")
+        return "\n".join(lines)
+    
+    def on_stock_threshold(self, name, item, is_low):
+        """Alert when an inventory item falls to or recovers from its minimum stock"""
+        if is_low:
+            self.show_notification(f"Low stock: {name} ({item['quantity']} {item['unit']} left)", 'warning')
+        else:
+            self.show_notification(f"{name} is back above its minimum stock", 'success')
+    
     def show_notification(self, message, type='info'):
         """Show notification"""
         self.notifications.append({'message': message, 'type': type, 'time': datetime.now()})
@@ -287,6 +342,9 @@ class RestaurantSystemWithRoles:
         self.content_area = tk.Frame(main_container, bg=self.colors['bg_primary'])
         self.content_area.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
         
+        # Screens are built once per session and refreshed when the data changed
+        self.screens = ScreenManager(self.content_area, lambda: self.engine.data_version, self.scheduler)
+        
         # Show dashboard
         self.show_dashboard()
     
@@ -334,12 +392,11 @@ class RestaurantSystemWithRoles:
         tk.Label(stats_frame, text="Today's Overview", font=('Segoe UI', 11, 'bold'),
                 bg=self.colors['bg_card'], fg=self.colors['text_primary']).pack(pady=10)
         
-        today_orders = len([o for o in self.data['orders'] if o['date'] == self.current_date])
-        today_sales = self.data['daily_sales'].get(self.current_date, 0)
+        metrics = self.engine.dashboard_metrics(self.current_date)
         
         stats = [
-            ("Orders", str(today_orders), self.colors['accent']),
-            ("Revenue", f"${today_sales:.0f}", self.colors['success']),
+            ("Orders", str(metrics['today_orders']), self.colors['accent']),
+            ("Revenue", f"${metrics['today_revenue']:.0f}", self.colors['success']),
             ("Tables", "10/10", self.colors['warning'])
         ]
         
@@ -393,12 +450,15 @@ class RestaurantSystemWithRoles:
                            activebackground=self.colors['bg_card'], activeforeground=self.colors['accent'])
             btn.pack(fill=tk.X, pady=2, padx=5)
     
+    @timed('show_dashboard', screen='Dashboard')
     def show_dashboard(self):
         """Show main dashboard"""
-        self.clear_content()
-        
+        self.screens.show('Dashboard', self.build_dashboard_screen, rebuild=True)
+    
+    def build_dashboard_screen(self, screen):
+        """Build the Dashboard screen"""
         # Dashboard title
-        title_frame = tk.Frame(self.content_area, bg=self.colors['bg_primary'])
+        title_frame = tk.Frame(screen, bg=self.colors['bg_primary'])
         title_frame.pack(fill=tk.X, pady=20)
         
         tk.Label(title_frame, text="Dashboard", font=('Segoe UI', 24, 'bold'),
@@ -407,22 +467,18 @@ class RestaurantSystemWithRoles:
                 bg=self.colors['bg_primary'], fg=self.colors['text_secondary']).pack(side=tk.RIGHT)
         
         # Key metrics cards
-        metrics_frame = tk.Frame(self.content_area, bg=self.colors['bg_primary'])
+        metrics_frame = tk.Frame(screen, bg=self.colors['bg_primary'])
         metrics_frame.pack(fill=tk.X, pady=10)
         
         # Calculate metrics
-        total_revenue = sum(self.data['daily_sales'].values())
-        total_orders = len(self.data['orders'])
-        avg_order = total_revenue / total_orders if total_orders > 0 else 0
-        today_orders = len([o for o in self.data['orders'] if o['date'] == self.current_date])
-        today_revenue = self.data['daily_sales'].get(self.current_date, 0)
+        values = self.engine.dashboard_metrics(self.current_date)
         
         metrics = [
-            ("Today's Revenue", f"${today_revenue:.2f}", self.colors['success'], "📈"),
-            ("Today's Orders", str(today_orders), self.colors['accent'], "📋"),
-            ("Avg Order Value", f"${avg_order:.2f}", self.colors['warning'], "💰"),
-            ("Total Revenue", f"${total_revenue:.2f}", self.colors['success'], "💵"),
-            ("Total Orders", str(total_orders), self.colors['accent'], "📊"),
+            ("Today's Revenue", f"${values['today_revenue']:.2f}", self.colors['success'], "📈"),
+            ("Today's Orders", str(values['today_orders']), self.colors['accent'], "📋"),
+            ("Avg Order Value", f"${values['avg_order']:.2f}", self.colors['warning'], "💰"),
+            ("Total Revenue", f"${values['total_revenue']:.2f}", self.colors['success'], "💵"),
+            ("Total Orders", str(values['total_orders']), self.colors['accent'], "📊"),
             ("Active Tables", "10/10", self.colors['warning'], "🪑")
         ]
         
@@ -442,7 +498,7 @@ class RestaurantSystemWithRoles:
             metrics_frame.grid_columnconfigure(i, weight=1)
         
         # Quick actions
-        bottom_frame = tk.Frame(self.content_area, bg=self.colors['bg_primary'])
+        bottom_frame = tk.Frame(screen, bg=self.colors['bg_primary'])
         bottom_frame.pack(fill=tk.BOTH, expand=True, pady=20)
         
         actions_frame = tk.LabelFrame(bottom_frame, text="Quick Actions", font=('Segoe UI', 12, 'bold'),
@@ -478,12 +534,15 @@ class RestaurantSystemWithRoles:
                            activebackground=self.colors['accent'], activeforeground=self.colors['bg_primary'])
             btn.pack(fill=tk.X, padx=15, pady=5)
     
+    @timed('open_orders', screen='Orders')
     def open_orders(self):
         """Open orders management"""
-        self.clear_content()
-        
+        self.screens.show('Orders', self.build_orders_screen, refresh=self.update_orders_display)
+    
+    def build_orders_screen(self, screen):
+        """Build the Orders screen"""
         # Title
-        title_frame = tk.Frame(self.content_area, bg=self.colors['bg_primary'])
+        title_frame = tk.Frame(screen, bg=self.colors['bg_primary'])
         title_frame.pack(fill=tk.X, pady=20)
         
         tk.Label(title_frame, text="Order Management", font=('Segoe UI', 24, 'bold'),
@@ -495,30 +554,59 @@ class RestaurantSystemWithRoles:
                      bg=self.colors['success'], fg=self.colors['text_primary'],
                      relief=tk.FLAT, command=self.open_quick_order).pack(side=tk.RIGHT, padx=5)
         
-        # Orders table
-        table_frame = tk.Frame(self.content_area, bg=self.colors['bg_card'])
-        table_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        # Date range filter; older days are loaded from storage on demand
+        filter_frame = tk.Frame(screen, bg=self.colors['bg_primary'])
+        filter_frame.pack(fill=tk.X)
         
-        # Create treeview
-        columns = ('ID', 'Table', 'Customer', 'Items', 'Total', 'Status', 'Time')
-        self.orders_tree = ttk.Treeview(table_frame, columns=columns, show='headings', style='Modern.Treeview')
+        tk.Label(filter_frame, text="From:", font=('Segoe UI', 10),
+                bg=self.colors['bg_primary'], fg=self.colors['text_secondary']).pack(side=tk.LEFT, padx=5)
+        self.orders_from_var = tk.StringVar(value=self.orders_range[0] or '')
+        tk.Entry(filter_frame, textvariable=self.orders_from_var, font=('Segoe UI', 10), width=12,
+                bg=self.colors['bg_secondary'], fg=self.colors['text_primary'],
+                insertbackground=self.colors['text_primary'], relief=tk.FLAT).pack(side=tk.LEFT)
         
-        for col in columns:
-            self.orders_tree.heading(col, text=col)
-            self.orders_tree.column(col, width=100)
+        tk.Label(filter_frame, text="To:", font=('Segoe UI', 10),
+                bg=self.colors['bg_primary'], fg=self.colors['text_secondary']).pack(side=tk.LEFT, padx=5)
+        self.orders_to_var = tk.StringVar(value=self.orders_range[1] or '')
+        tk.Entry(filter_frame, textvariable=self.orders_to_var, font=('Segoe UI', 10), width=12,
+                bg=self.colors['bg_secondary'], fg=self.colors['text_primary'],
+                insertbackground=self.colors['text_primary'], relief=tk.FLAT).pack(side=tk.LEFT)
+        
+        tk.Button(filter_frame, text="Apply", font=('Segoe UI', 9),
+                 bg=self.colors['accent'], fg=self.colors['text_primary'],
+                 relief=tk.FLAT, command=self.apply_orders_filter).pack(side=tk.LEFT, padx=5)
+        
+        last_week = (datetime.strptime(self.current_date, "%Y-%m-%d") - timedelta(days=6)).strftime("%Y-%m-%d")
+        quick_ranges = [
+            ("Today", self.current_date, self.current_date),
+            ("Last 7 Days", last_week, self.current_date),
+            ("This Month", self.current_date[:8] + "01", self.current_date),
+            ("All", None, None)
+        ]
+        for text, start, end in quick_ranges:
+            tk.Button(filter_frame, text=text, font=('Segoe UI', 9),
+                     bg=self.colors['bg_secondary'], fg=self.colors['text_primary'], relief=tk.FLAT,
+                     command=lambda s=start, e=end: self.set_orders_range(s, e)).pack(side=tk.LEFT, padx=2)
         
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.orders_tree.yview)
-        self.orders_tree.configure(yscrollcommand=scrollbar.set)
+        self.orders_count_label = tk.Label(filter_frame, text="", font=('Segoe UI', 10),
+                                          bg=self.colors['bg_primary'], fg=self.colors['text_secondary'])
+        self.orders_count_label.pack(side=tk.RIGHT, padx=5)
         
-        self.orders_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # Orders table
+        table_frame = tk.Frame(screen, bg=self.colors['bg_card'])
+        table_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        # Create treeview; only the rows in view are inserted
+        columns = ('ID', 'Table', 'Customer', 'Items', 'Total', 'Status', 'Time')
+        self.orders_tree = VirtualTreeview(table_frame, columns, order_list_row, lambda order: order['id'],
+                                           column_width=100, style='Modern.Treeview')
+        self.orders_tree.pack()
         
         # Populate orders
         self.update_orders_display()
         
         # Action buttons frame
-        action_frame = tk.Frame(self.content_area, bg=self.colors['bg_primary'])
+        action_frame = tk.Frame(screen, bg=self.colors['bg_primary'])
         action_frame.pack(fill=tk.X, pady=10)
         
         # Print button (available to all users)
@@ -535,22 +623,66 @@ class RestaurantSystemWithRoles:
                      bg=self.colors['bg_secondary'], fg=self.colors['text_primary'],
                      relief=tk.FLAT, command=self.export_orders).pack(side=tk.LEFT, padx=5)
     
-    def update_orders_display(self):
+    def apply_orders_filter(self):
+        """Apply the date range typed into Order Management"""
+        date_range = self.read_date_range(self.orders_from_var, self.orders_to_var)
+        if date_range is not None:
+            self.set_orders_range(*date_range)
+    
+    def read_date_range(self, from_var, to_var):
+        """Dates typed into a pair of From/To entries, or None after reporting an invalid one"""
+        start = from_var.get().strip() or None
+        end = to_var.get().strip() or None
+        try:
+            for value in (start, end):
+                if value is not None:
+                    datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            messagebox.showerror("Invalid Date", "Please enter dates as YYYY-MM-DD")
+            return None
+        return start, end
+    
+    def set_orders_range(self, start, end):
+        """Show the orders between two dates (None means unbounded)"""
+        self.orders_range = (start, end)
+        self.orders_from_var.set(start or '')
+        self.orders_to_var.set(end or '')
+        self.update_orders_display(reset=True)
+    
+    def get_orders_in_range(self):
+        """Orders in the selected date range, newest first"""
+        start, end = self.orders_range
+        return self.engine.recent_orders(start, end)
+    
+    def describe_orders_range(self):
+        """Describe the selected date range for printouts"""
+        start, end = self.orders_range
+        if start is None and end is None:
+            return "All dates"
+        if start == end:
+            return start
+        return f"{start or 'start'} to {end or 'today'}"
+    
+    @timed('update_orders_display')
+    def update_orders_display(self, reset=False):
         """Update orders treeview"""
-        # Clear existing items
-        for item in self.orders_tree.get_children():
-            self.orders_tree.delete(item)
-        
-        # Add orders
-        for order in sorted(self.data['orders'], key=lambda x: x.get('id', 0), reverse=True):
-            items_count = len(order['items'])
-            status = order.get('status', 'active')
-            
-            self.orders_tree.insert('', tk.END, values=(
-                order['id'], order['table'], order.get('customer', 'Walk-in'),
-                items_count, f"${order['total']:.2f}", status.title(),
-                order.get('time', 'N/A')
-            ))
+        orders = self.get_orders_in_range()
+        self.orders_tree.set_rows(orders, reset)
+        self.orders_listed = len(orders)
+        self.update_orders_count()
+    
+    def show_new_order(self, order):
+        """Add a just created order to the top of the orders list if it is in the selected range"""
+        start, end = self.orders_range
+        if (start is None or order['date'] >= start) and (end is None or order['date'] <= end):
+            self.orders_tree.insert_row(0, order)
+            self.orders_listed += 1
+            self.update_orders_count()
+        self.screens.touch('Orders')
+    
+    def update_orders_count(self):
+        """Show how many orders are listed"""
+        self.orders_count_label.config(text=f"{self.orders_listed} order{'s' if self.orders_listed != 1 else ''}")
     
     def print_order_list(self):
         """Print order list"""
@@ -566,7 +698,7 @@ class RestaurantSystemWithRoles:
         
         tk.Label(title_frame, text="ORDER LIST", font=('Arial', 16, 'bold'),
                 bg='white').pack()
-        tk.Label(title_frame, text=f"Date: {self.current_date}", font=('Arial', 10),
+        tk.Label(title_frame, text=f"Date: {self.describe_orders_range()}", font=('Arial', 10),
                 bg='white').pack()
         tk.Label(title_frame, text=f"Printed by: {self.current_user['name']}", font=('Arial', 10),
                 bg='white').pack()
@@ -587,7 +719,7 @@ class RestaurantSystemWithRoles:
         order_content = "ID\tTable\tCustomer\t\tItems\tTotal\tStatus\tTime\n"
         order_content += "-" * 80 + "\n"
         
-        for order in sorted(self.data['orders'], key=lambda x: x.get('id', 0), reverse=True):
+        for order in self.get_orders_in_range():
             items_count = len(order['items'])
             order_content += f"{order['id']}\t{order['table']}\t{order.get('customer', 'Walk-in')}\t\t{items_count}\t${order['total']:.2f}\t{order.get('status', 'active')}\t{order.get('time', 'N/A')}\n"
         
@@ -613,7 +745,7 @@ class RestaurantSystemWithRoles:
                 try:
                     with open(filename, 'w') as f:
                         f.write(f"ORDER LIST\n")
-                        f.write(f"Date: {self.current_date}\n")
+                        f.write(f"Date: {self.describe_orders_range()}\n")
                         f.write(f"Printed by: {self.current_user['name']}\n")
                         f.write("-" * 80 + "\n")
                         f.write(order_content)
@@ -636,19 +768,11 @@ class RestaurantSystemWithRoles:
     
     def view_order_details(self):
         """View order details"""
-        selection = self.orders_tree.selection()
-        if not selection:
-            messagebox.showwarning("No Selection", "Please select an order to view details")
-            return
-        
-        # Get selected order
-        item_values = self.orders_tree.item(selection[0])['values']
-        order_id = item_values[0]
-        
-        # Find order in data
-        order = next((o for o in self.data['orders'] if o['id'] == order_id), None)
+        order = self.orders_tree.selected_row()
         if not order:
+            messagebox.showwarning("No Selection", "Please select an order to view details")
             return
+        order_id = order['id']
         
         # Create details window
         details_window = tk.Toplevel(self.root)
@@ -712,19 +836,22 @@ class RestaurantSystemWithRoles:
                 with open(filename, 'w', newline='') as file:
                     writer = csv.writer(file)
                     writer.writerow(['ID', 'Table', 'Customer', 'Total', 'Date', 'Time', 'Status'])
-                    for order in self.data['orders']:
+                    for order in self.get_orders_in_range():
                         writer.writerow([order['id'], order['table'], order.get('customer', 'Walk-in'),
                                        order['total'], order['date'], order.get('time', ''), order.get('status', '')])
                 self.show_notification("Orders exported successfully", 'success')
             except Exception as e:
                 messagebox.showerror("Export Error", f"Failed to export: {e}")
     
+    @timed('open_menu_management', screen='Menu Management')
     def open_menu_management(self):
         """Open menu management"""
-        self.clear_content()
-        
+        self.screens.show('Menu Management', self.build_menu_screen, rebuild=True)
+    
+    def build_menu_screen(self, screen):
+        """Build the Menu Management screen"""
         # Title
-        title_frame = tk.Frame(self.content_area, bg=self.colors['bg_primary'])
+        title_frame = tk.Frame(screen, bg=self.colors['bg_primary'])
         title_frame.pack(fill=tk.X, pady=20)
         
         tk.Label(title_frame, text="Menu Management", font=('Segoe UI', 24, 'bold'),
@@ -737,7 +864,7 @@ class RestaurantSystemWithRoles:
                      relief=tk.FLAT, command=self.add_menu_item).pack(side=tk.RIGHT, padx=5)
         
         # Category tabs
-        category_frame = tk.Frame(self.content_area, bg=self.colors['bg_primary'])
+        category_frame = tk.Frame(screen, bg=self.colors['bg_primary'])
         category_frame.pack(fill=tk.X, pady=10)
         
         self.selected_category = tk.StringVar(value='Appetizers')
@@ -750,7 +877,7 @@ class RestaurantSystemWithRoles:
                           selectcolor=self.colors['bg_secondary'], font=('Segoe UI', 10)).pack(side=tk.LEFT, padx=10)
         
         # Menu items
-        items_frame = tk.Frame(self.content_area, bg=self.colors['bg_card'])
+        items_frame = tk.Frame(screen, bg=self.colors['bg_card'])
         items_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         
         # Create treeview
@@ -786,17 +913,24 @@ class RestaurantSystemWithRoles:
                 f"${profit:.2f}"
             ))
     
+    @timed('open_inventory', screen='Inventory')
     def open_inventory(self):
         """Open inventory management"""
-        self.clear_content()
-        
+        self.screens.show('Inventory', self.build_inventory_screen, refresh=self.update_inventory_display)
+    
+    def build_inventory_screen(self, screen):
+        """Build the Inventory screen"""
         # Title
-        title_frame = tk.Frame(self.content_area, bg=self.colors['bg_primary'])
+        title_frame = tk.Frame(screen, bg=self.colors['bg_primary'])
         title_frame.pack(fill=tk.X, pady=20)
         
         tk.Label(title_frame, text="Inventory Management", font=('Segoe UI', 24, 'bold'),
                 bg=self.colors['bg_primary'], fg=self.colors['text_primary']).pack(side=tk.LEFT)
         
+        self.low_stock_label = tk.Label(title_frame, font=('Segoe UI', 11),
+                                       bg=self.colors['bg_primary'], fg=self.colors['danger'])
+        self.low_stock_label.pack(side=tk.LEFT, padx=15)
+        
         # Add button only for admin and manager
         if self.current_user['role'] in ['Administrator', 'Manager']:
             tk.Button(title_frame, text="➕ Add Item", font=('Segoe UI', 10, 'bold'),
@@ -804,59 +938,48 @@ class RestaurantSystemWithRoles:
                      relief=tk.FLAT, command=self.add_inventory_item).pack(side=tk.RIGHT, padx=5)
         
         # Inventory table
-        table_frame = tk.Frame(self.content_area, bg=self.colors['bg_card'])
+        table_frame = tk.Frame(screen, bg=self.colors['bg_card'])
         table_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         
         # Create treeview
         columns = ('Item', 'Quantity', 'Unit', 'Min Stock', 'Status')
-        self.inventory_tree = ttk.Treeview(table_frame, columns=columns, show='headings', style='Modern.Treeview')
-        
-        for col in columns:
-            self.inventory_tree.heading(col, text=col)
-            self.inventory_tree.column(col, width=120)
-        
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.inventory_tree.yview)
-        self.inventory_tree.configure(yscrollcommand=scrollbar.set)
-        
-        self.inventory_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.inventory_tree = VirtualTreeview(table_frame, columns, self.inventory_row, lambda name: name,
+                                              row_tags=self.inventory_row_tags, style='Modern.Treeview')
+        self.inventory_tree.pack()
+        self.inventory_tree.tag_configure('low_stock', background='#ffcccc')
+        self.inventory_tree.tag_configure('good_stock', background='#ccffcc')
         
         # Populate inventory
         self.update_inventory_display()
     
     def update_inventory_display(self):
         """Update inventory treeview"""
-        # Clear existing items
-        for item in self.inventory_tree.get_children():
-            self.inventory_tree.delete(item)
+        # Inventory items, closest to running out first
+        stock = self.engine.stock
+        self.inventory_tree.set_rows(stock.by_urgency())
         
-        # Add inventory items
-        for item_name, item_data in self.data['inventory'].items():
-            quantity = item_data['quantity']
-            min_stock = item_data['min_stock']
-            
-            if quantity <= min_stock:
-                status = "Low Stock"
-                tag = 'low_stock'
-            else:
-                status = "Good"
-                tag = 'good_stock'
-            
-            self.inventory_tree.insert('', tk.END, values=(
-                item_name, quantity, item_data['unit'], min_stock, status
-            ), tags=(tag,))
-        
-        # Configure tags
-        self.inventory_tree.tag_configure('low_stock', background='#ffcccc')
-        self.inventory_tree.tag_configure('good_stock', background='#ccffcc')
+        low_count = len(stock.low_stock)
+        self.low_stock_label.config(text=f"⚠ {low_count} item{'s' if low_count != 1 else ''} low" if low_count else "")
+    
+    def inventory_row(self, item_name):
+        """Values shown for an inventory item"""
+        item_data = self.data['inventory'][item_name]
+        status = "Low Stock" if self.engine.stock.is_low(item_name) else "Good"
+        return (item_name, item_data['quantity'], item_data['unit'], item_data['min_stock'], status)
     
+    def inventory_row_tags(self, item_name):
+        """Row colour of an inventory item"""
+        return ('low_stock',) if self.engine.stock.is_low(item_name) else ('good_stock',)
+    
+    @timed('open_customer_management', screen='Customers')
     def open_customer_management(self):
         """Open customer management"""
-        self.clear_content()
-        
+        self.screens.show('Customers', self.build_customer_screen, refresh=self.update_customer_display)
+    
+    def build_customer_screen(self, screen):
+        """Build the Customers screen"""
         # Title
-        title_frame = tk.Frame(self.content_area, bg=self.colors['bg_primary'])
+        title_frame = tk.Frame(screen, bg=self.colors['bg_primary'])
         title_frame.pack(fill=tk.X, pady=20)
         
         tk.Label(title_frame, text="Customer Management", font=('Segoe UI', 24, 'bold'),
@@ -867,46 +990,39 @@ class RestaurantSystemWithRoles:
                  relief=tk.FLAT, command=self.add_customer).pack(side=tk.RIGHT, padx=5)
         
         # Customer table
-        table_frame = tk.Frame(self.content_area, bg=self.colors['bg_card'])
+        table_frame = tk.Frame(screen, bg=self.colors['bg_card'])
         table_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         
         # Create treeview
-        columns = ('Name', 'Phone', 'Email', 'Visits', 'Points')
-        self.customer_tree = ttk.Treeview(table_frame, columns=columns, show='headings', style='Modern.Treeview')
-        
-        for col in columns:
-            self.customer_tree.heading(col, text=col)
-            self.customer_tree.column(col, width=120)
-        
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.customer_tree.yview)
-        self.customer_tree.configure(yscrollcommand=scrollbar.set)
-        
-        self.customer_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        columns = ('Name', 'Phone', 'Email', 'Visits', 'Total Spent', 'Last Visit', 'Points')
+        self.customer_tree = VirtualTreeview(table_frame, columns, self.customer_row,
+                                             lambda customer: customer['id'], style='Modern.Treeview')
+        self.customer_tree.pack()
         
         # Populate customers
         self.update_customer_display()
     
     def update_customer_display(self):
         """Update customer treeview"""
-        # Clear existing items
-        for item in self.customer_tree.get_children():
-            self.customer_tree.delete(item)
-        
-        # Add customers
-        for customer in self.data['customers']:
-            self.customer_tree.insert('', tk.END, values=(
-                customer['name'], customer['phone'], customer['email'],
-                customer['visits'], customer['loyalty_points']
-            ))
+        self.customer_tree.set_rows(self.data['customers'])
     
+    def customer_row(self, customer):
+        """Values shown for a customer, with their lifetime totals"""
+        stats = self.engine.customer_stats(customer)
+        return (customer['name'], customer['phone'], customer['email'],
+                stats['orders'], f"${stats['spend']:.2f}", stats['last_visit'] or 'Never',
+                customer['loyalty_points'])
+    
+    @timed('open_kitchen_display', screen='Kitchen')
     def open_kitchen_display(self):
         """Open kitchen display system"""
-        self.clear_content()
-        
+        self.screens.show('Kitchen', self.build_kitchen_screen, refresh=self.update_kitchen_display,
+                          on_show=self.start_kitchen_timers)
+    
+    def build_kitchen_screen(self, screen):
+        """Build the Kitchen screen"""
         # Title
-        title_frame = tk.Frame(self.content_area, bg=self.colors['bg_primary'])
+        title_frame = tk.Frame(screen, bg=self.colors['bg_primary'])
         title_frame.pack(fill=tk.X, pady=20)
         
         tk.Label(title_frame, text="👨‍🍳 Kitchen Display System", font=('Segoe UI', 24, 'bold'),
@@ -916,10 +1032,9 @@ class RestaurantSystemWithRoles:
         self.time_label = tk.Label(title_frame, text="", font=('Segoe UI', 14),
                                   bg=self.colors['bg_primary'], fg=self.colors['accent'])
         self.time_label.pack(side=tk.RIGHT)
-        self.update_time()
         
         # Orders in progress
-        orders_frame = tk.LabelFrame(self.content_area, text="Orders in Progress", 
+        orders_frame = tk.LabelFrame(screen, text="Orders in Progress", 
                                     font=('Segoe UI', 14, 'bold'),
                                     bg=self.colors['bg_card'], fg=self.colors['text_primary'])
         orders_frame.pack(fill=tk.BOTH, expand=True, pady=10)
@@ -928,76 +1043,113 @@ class RestaurantSystemWithRoles:
         self.kitchen_orders_frame = tk.Frame(orders_frame, bg=self.colors['bg_card'])
         self.kitchen_orders_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        self.update_kitchen_display()
+        self.kitchen_empty_label = tk.Label(self.kitchen_orders_frame, text="No active orders", font=('Segoe UI', 16),
+                                            bg=self.colors['bg_card'], fg=self.colors['text_secondary'])
+        cards_frame = tk.Frame(self.kitchen_orders_frame, bg=self.colors['bg_card'])
+        cards_frame.pack(fill=tk.X)
+        self.kitchen_more_label = tk.Label(self.kitchen_orders_frame, text="", font=('Segoe UI', 10),
+                                           bg=self.colors['bg_card'], fg=self.colors['text_secondary'])
+        self.kitchen_more_label.pack()
         
-        # Auto-refresh
-        self.root.after(30000, self.update_kitchen_display)  # Refresh every 30 seconds
+        # Order cards are kept per order id and reused for the next orders
+        self.kitchen_cards = WidgetPool(cards_frame, self.create_kitchen_card, self.fill_kitchen_card,
+                                        lambda order: order['id'], fill=tk.X, pady=5)
+        
+        self.update_kitchen_display()
+    
+    def start_kitchen_timers(self, screen):
+        """Run the clock and auto-refresh every 30 seconds while the kitchen is shown"""
+        self.update_time()
+        self.scheduler.every(screen, 'clock', 1000, self.update_time)
+        self.scheduler.every(screen, 'refresh', 30000, self.update_kitchen_display)
     
     def update_time(self):
         """Update time display"""
         current_time = datetime.now().strftime("%I:%M %p")
         self.time_label.config(text=current_time)
-        self.root.after(1000, self.update_time)
     
+    @timed('update_kitchen_display')
     def update_kitchen_display(self):
         """Update kitchen display"""
-        # Clear existing orders
-        for widget in self.kitchen_orders_frame.winfo_children():
-            widget.destroy()
-        
         # Get active orders
-        active_orders = [o for o in self.data['orders'] if o.get('status') == 'active']
+        active_orders = self.engine.active_orders()
         
-        if not active_orders:
-            tk.Label(self.kitchen_orders_frame, text="No active orders", font=('Segoe UI', 16),
-                    bg=self.colors['bg_card'], fg=self.colors['text_secondary']).pack(expand=True)
-            return
+        if active_orders:
+            self.kitchen_empty_label.pack_forget()
+        else:
+            self.kitchen_empty_label.pack(expand=True)
         
-        # Display orders
-        for order in active_orders[:6]:  # Show max 6 orders
-            order_card = tk.Frame(self.kitchen_orders_frame, bg=self.colors['bg_secondary'], 
-                                 relief=tk.RAISED, bd=2)
-            order_card.pack(fill=tk.X, pady=5)
-            
-            # Order header
-            header_frame = tk.Frame(order_card, bg=self.colors['bg_secondary'])
-            header_frame.pack(fill=tk.X, padx=10, pady=5)
-            
-            tk.Label(header_frame, text=f"Order #{order['id']} - Table {order['table']}", 
-                    font=('Segoe UI', 12, 'bold'),
-                    bg=self.colors['bg_secondary'], fg=self.colors['accent']).pack(side=tk.LEFT)
-            tk.Label(header_frame, text=order.get('time', ''), font=('Segoe UI', 10),
-                    bg=self.colors['bg_secondary'], fg=self.colors['text_secondary']).pack(side=tk.RIGHT)
-            
-            # Order items
-            items_frame = tk.Frame(order_card, bg=self.colors['bg_secondary'])
-            items_frame.pack(fill=tk.X, padx=10, pady=5)
-            
-            for item in order['items']:
-                item_frame = tk.Frame(items_frame, bg=self.colors['bg_secondary'])
-                item_frame.pack(fill=tk.X, pady=2)
-                
-                tk.Label(item_frame, text=f"• {item['name']}", font=('Segoe UI', 10),
-                        bg=self.colors['bg_secondary'], fg=self.colors['text_primary']).pack(side=tk.LEFT)
-            
-            # Action button
-            tk.Button(order_card, text="Mark Ready", font=('Segoe UI', 10, 'bold'),
-                     bg=self.colors['success'], fg=self.colors['text_primary'],
-                     relief=tk.FLAT, command=lambda o=order: self.mark_order_ready(o)).pack(pady=5)
+        # Display orders, max 6
+        self.kitchen_cards.show(active_orders[:6])
+        waiting = len(active_orders) - 6
+        self.kitchen_more_label.config(text=f"+{waiting} more order{'s' if waiting != 1 else ''} waiting"
+                                       if waiting > 0 else "")
+    
+    def create_kitchen_card(self, parent):
+        """Build an empty kitchen order card"""
+        order_card = tk.Frame(parent, bg=self.colors['bg_secondary'], relief=tk.RAISED, bd=2)
+        
+        # Order header
+        header_frame = tk.Frame(order_card, bg=self.colors['bg_secondary'])
+        header_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        order_card.title_label = tk.Label(header_frame, font=('Segoe UI', 12, 'bold'),
+                                          bg=self.colors['bg_secondary'], fg=self.colors['accent'])
+        order_card.title_label.pack(side=tk.LEFT)
+        order_card.time_label = tk.Label(header_frame, font=('Segoe UI', 10),
+                                         bg=self.colors['bg_secondary'], fg=self.colors['text_secondary'])
+        order_card.time_label.pack(side=tk.RIGHT)
+        
+        # Order items; labels are added as larger orders need them
+        order_card.items_frame = tk.Frame(order_card, bg=self.colors['bg_secondary'])
+        order_card.items_frame.pack(fill=tk.X, padx=10, pady=5)
+        order_card.item_labels = []
+        
+        # Action button
+        order_card.ready_button = tk.Button(order_card, text="Mark Ready", font=('Segoe UI', 10, 'bold'),
+                                            bg=self.colors['success'], fg=self.colors['text_primary'],
+                                            relief=tk.FLAT)
+        order_card.ready_button.pack(pady=5)
+        return order_card
+    
+    def fill_kitchen_card(self, order_card, order):
+        """Show an order on a kitchen card"""
+        order_card.title_label.config(text=f"Order #{order['id']} - Table {order['table']}")
+        order_card.time_label.config(text=order.get('time', ''))
+        
+        labels = order_card.item_labels
+        while len(labels) < len(order['items']):
+            labels.append(tk.Label(order_card.items_frame, font=('Segoe UI', 10), anchor='w',
+                                   bg=self.colors['bg_secondary'], fg=self.colors['text_primary']))
+        for index, label in enumerate(labels):
+            if index < len(order['items']):
+                label.config(text=f"• {order['items'][index]['name']}")
+                label.pack(fill=tk.X, pady=2)
+            else:
+                label.pack_forget()
+        
+        order_card.ready_button.config(command=lambda o=order: self.mark_order_ready(o))
     
     def mark_order_ready(self, order):
         """Mark order as ready"""
-        order['status'] = 'ready'
+        self.engine.mark_ready(order['id'])
         self.show_notification(f"Order #{order['id']} is ready for pickup!", 'success')
-        self.update_kitchen_display()
-        self.save_data()
+        self.refresh_kitchen_soon()
+    
+    def refresh_kitchen_soon(self):
+        """Redraw the kitchen display once the current burst of events is handled"""
+        self.scheduler.once(self.kitchen_orders_frame, 'redraw', 0, self.update_kitchen_display)
+        self.screens.touch('Kitchen')
     
+    @timed('open_accounting', screen='Accounting')
     def open_accounting(self):
         """Open accounting system"""
-        self.clear_content()
-        
+        self.screens.show('Accounting', self.build_accounting_screen, refresh=self.refresh_accounting)
+    
+    def build_accounting_screen(self, screen):
+        """Build the Accounting screen"""
         # Title
-        title_frame = tk.Frame(self.content_area, bg=self.colors['bg_primary'])
+        title_frame = tk.Frame(screen, bg=self.colors['bg_primary'])
         title_frame.pack(fill=tk.X, pady=20)
         
         tk.Label(title_frame, text="Accounting & Finance", font=('Segoe UI', 24, 'bold'),
@@ -1009,59 +1161,123 @@ class RestaurantSystemWithRoles:
                      bg=self.colors['success'], fg=self.colors['text_primary'],
                      relief=tk.FLAT, command=self.add_expense).pack(side=tk.RIGHT, padx=5)
         
-        # Financial summary
-        summary_frame = tk.Frame(self.content_area, bg=self.colors['bg_primary'])
-        summary_frame.pack(fill=tk.X, pady=10)
+        # Period buttons
+        period_frame = tk.Frame(screen, bg=self.colors['bg_primary'])
+        period_frame.pack(fill=tk.X)
         
-        # Calculate metrics
-        total_revenue = sum(self.data['daily_sales'].values())
-        total_expenses = sum(e['amount'] for e in self.data['expenses'])
-        net_profit = total_revenue - total_expenses
+        for text, period in (("Today", 'day'), ("This Week", 'week'), ("This Month", 'month'),
+                             ("This Year", 'year'), ("All Time", 'all')):
+            tk.Button(period_frame, text=text, font=('Segoe UI', 9),
+                     bg=self.colors['bg_secondary'], fg=self.colors['text_primary'], relief=tk.FLAT,
+                     command=lambda period=period: self.show_accounting_period(period)).pack(side=tk.LEFT, padx=2)
         
-        metrics = [
-            ("Total Revenue", f"${total_revenue:.2f}", self.colors['success']),
-            ("Total Expenses", f"${total_expenses:.2f}", self.colors['danger']),
-            ("Net Profit", f"${net_profit:.2f}", self.colors['success'] if net_profit > 0 else self.colors['danger'])
-        ]
+        tk.Label(period_frame, text="From:", font=('Segoe UI', 10),
+                bg=self.colors['bg_primary'], fg=self.colors['text_secondary']).pack(side=tk.LEFT, padx=5)
+        self.accounting_from_var = tk.StringVar()
+        tk.Entry(period_frame, textvariable=self.accounting_from_var, font=('Segoe UI', 10), width=12,
+                bg=self.colors['bg_secondary'], fg=self.colors['text_primary'],
+                insertbackground=self.colors['text_primary'], relief=tk.FLAT).pack(side=tk.LEFT)
+        
+        tk.Label(period_frame, text="To:", font=('Segoe UI', 10),
+                bg=self.colors['bg_primary'], fg=self.colors['text_secondary']).pack(side=tk.LEFT, padx=5)
+        self.accounting_to_var = tk.StringVar()
+        tk.Entry(period_frame, textvariable=self.accounting_to_var, font=('Segoe UI', 10), width=12,
+                bg=self.colors['bg_secondary'], fg=self.colors['text_primary'],
+                insertbackground=self.colors['text_primary'], relief=tk.FLAT).pack(side=tk.LEFT)
         
-        for title, value, color in metrics:
+        tk.Button(period_frame, text="Apply", font=('Segoe UI', 9),
+                 bg=self.colors['accent'], fg=self.colors['text_primary'],
+                 relief=tk.FLAT, command=self.apply_accounting_range).pack(side=tk.LEFT, padx=5)
+        
+        self.accounting_period_label = tk.Label(period_frame, font=('Segoe UI', 10),
+                                               bg=self.colors['bg_primary'], fg=self.colors['text_secondary'])
+        self.accounting_period_label.pack(side=tk.LEFT, padx=10)
+        
+        # Financial summary
+        summary_frame = tk.Frame(screen, bg=self.colors['bg_primary'])
+        summary_frame.pack(fill=tk.X, pady=10)
+        
+        self.accounting_cards = {}
+        for key, title in (('revenue', "Total Revenue"), ('expenses', "Total Expenses"), ('net_profit', "Net Profit")):
             card = tk.Frame(summary_frame, bg=self.colors['bg_card'], relief=tk.RAISED, bd=1)
             card.pack(side=tk.LEFT, padx=10, fill=tk.BOTH, expand=True)
             
             tk.Label(card, text=title, font=('Segoe UI', 10),
                     bg=self.colors['bg_card'], fg=self.colors['text_secondary']).pack(pady=10)
-            tk.Label(card, text=value, font=('Segoe UI', 16, 'bold'),
-                    bg=self.colors['bg_card'], fg=color).pack(pady=(0, 10))
+            self.accounting_cards[key] = tk.Label(card, font=('Segoe UI', 16, 'bold'), bg=self.colors['bg_card'])
+            self.accounting_cards[key].pack(pady=(0, 10))
+        
+        self.show_accounting_range(*self.accounting_range)
         
         # Expense list
-        expense_frame = tk.LabelFrame(self.content_area, text="Recent Expenses", 
+        expense_frame = tk.LabelFrame(screen, text="Recent Expenses", 
                                      font=('Segoe UI', 12, 'bold'),
                                      bg=self.colors['bg_card'], fg=self.colors['text_primary'])
         expense_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         
         # Create treeview
-        columns = ('Date', 'Description', 'Amount')
-        expense_tree = ttk.Treeview(expense_frame, columns=columns, show='headings', style='Modern.Treeview')
+        columns = ('Date', 'Category', 'Description', 'Amount')
+        self.expense_tree = ttk.Treeview(expense_frame, columns=columns, show='headings', style='Modern.Treeview')
         
         for col in columns:
-            expense_tree.heading(col, text=col)
-            expense_tree.column(col, width=120)
+            self.expense_tree.heading(col, text=col)
+            self.expense_tree.column(col, width=120)
         
-        # Add expenses
-        for expense in reversed(self.data['expenses'][-10:]):
-            expense_tree.insert('', tk.END, values=(
-                expense['date'], expense['description'],
+        self.update_expense_display()
+        self.expense_tree.pack(fill=tk.BOTH, expand=True)
+    
+    def refresh_accounting(self):
+        """Bring the accounting screen up to date"""
+        self.show_accounting_range(*self.accounting_range)
+        self.update_expense_display()
+    
+    def update_expense_display(self):
+        """Update the recent expenses treeview"""
+        self.expense_tree.delete(*self.expense_tree.get_children())
+        
+        # Add expenses, newest first
+        for expense in self.engine.recent_expenses(10):
+            self.expense_tree.insert('', tk.END, values=(
+                expense['date'], expense.get('category') or 'Other', expense['description'],
                 f"${expense['amount']:.2f}"
             ))
-        
-        expense_tree.pack(fill=tk.BOTH, expand=True)
     
+    def show_accounting_period(self, period):
+        """Show profit and loss for the day, week, month or year so far, or all time"""
+        self.show_accounting_range(*period_range(period, self.current_date))
+    
+    def apply_accounting_range(self):
+        """Show profit and loss for the dates typed into the accounting screen"""
+        date_range = self.read_date_range(self.accounting_from_var, self.accounting_to_var)
+        if date_range is not None:
+            self.show_accounting_range(*date_range)
+    
+    def show_accounting_range(self, start, end):
+        """Show profit and loss between two dates (None means unbounded)"""
+        self.accounting_range = (start, end)
+        self.accounting_from_var.set(start or '')
+        self.accounting_to_var.set(end or '')
+        pnl = self.engine.profit_and_loss(start, end)
+        
+        if start is None and end is None:
+            self.accounting_period_label.config(text="All dates")
+        else:
+            self.accounting_period_label.config(text=f"{start or 'first day'} to {end or 'today'}")
+        self.accounting_cards['revenue'].config(text=f"${pnl['revenue']:.2f}", fg=self.colors['success'])
+        self.accounting_cards['expenses'].config(text=f"${pnl['expenses']:.2f}", fg=self.colors['danger'])
+        self.accounting_cards['net_profit'].config(
+            text=f"${pnl['net_profit']:.2f}",
+            fg=self.colors['success'] if pnl['net_profit'] > 0 else self.colors['danger'])
+    
+    @timed('open_employee_management', screen='Employees')
     def open_employee_management(self):
         """Open employee management (admin only)"""
-        self.clear_content()
-        
+        self.screens.show('Employees', self.build_employee_screen, refresh=self.update_employee_display)
+    
+    def build_employee_screen(self, screen):
+        """Build the Employees screen"""
         # Title
-        title_frame = tk.Frame(self.content_area, bg=self.colors['bg_primary'])
+        title_frame = tk.Frame(screen, bg=self.colors['bg_primary'])
         title_frame.pack(fill=tk.X, pady=20)
         
         tk.Label(title_frame, text="Employee Management", font=('Segoe UI', 24, 'bold'),
@@ -1072,66 +1288,56 @@ class RestaurantSystemWithRoles:
                  relief=tk.FLAT, command=self.add_employee).pack(side=tk.RIGHT, padx=5)
         
         # Employee table
-        table_frame = tk.Frame(self.content_area, bg=self.colors['bg_card'])
+        table_frame = tk.Frame(screen, bg=self.colors['bg_card'])
         table_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         
         # Create treeview
         columns = ('Name', 'Position', 'Email', 'Phone', 'Salary', 'Status')
-        self.employee_tree = ttk.Treeview(table_frame, columns=columns, show='headings', style='Modern.Treeview')
-        
-        for col in columns:
-            self.employee_tree.heading(col, text=col)
-            self.employee_tree.column(col, width=120)
-        
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.employee_tree.yview)
-        self.employee_tree.configure(yscrollcommand=scrollbar.set)
-        
-        self.employee_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.employee_tree = VirtualTreeview(table_frame, columns, self.employee_row,
+                                             lambda employee: employee['id'],
+                                             row_tags=lambda employee: ('active' if employee['status'] == 'active'
+                                                                        else 'inactive',),
+                                             style='Modern.Treeview')
+        self.employee_tree.pack()
+        self.employee_tree.tag_configure('active', foreground=self.colors['success'])
+        self.employee_tree.tag_configure('inactive', foreground=self.colors['text_secondary'])
         
         # Populate employees
         self.update_employee_display()
     
     def update_employee_display(self):
         """Update employee treeview"""
-        # Clear existing items
-        for item in self.employee_tree.get_children():
-            self.employee_tree.delete(item)
-        
-        # Add employees
-        for employee in self.data['employees']:
-            status_color = 'active' if employee['status'] == 'active' else 'inactive'
-            
-            self.employee_tree.insert('', tk.END, values=(
-                employee['name'], employee['position'], employee['email'],
-                employee['phone'], f"${employee['salary']:.2f}", employee['status'].title()
-            ), tags=(status_color,))
-        
-        # Configure tags
-        self.employee_tree.tag_configure('active', foreground=self.colors['success'])
-        self.employee_tree.tag_configure('inactive', foreground=self.colors['text_secondary'])
+        self.employee_tree.set_rows(self.data['employees'])
     
+    def employee_row(self, employee):
+        """Values shown for an employee"""
+        return (employee['name'], employee['position'], employee['email'],
+                employee['phone'], f"${employee['salary']:.2f}", employee['status'].title())
+    
+    @timed('open_reports', screen='Reports')
     def open_reports(self):
         """Open reports (manager only)"""
-        self.clear_content()
-        
+        self.screens.show('Reports', self.build_reports_screen)
+    
+    def build_reports_screen(self, screen):
+        """Build the Reports screen"""
         # Title
-        title_frame = tk.Frame(self.content_area, bg=self.colors['bg_primary'])
+        title_frame = tk.Frame(screen, bg=self.colors['bg_primary'])
         title_frame.pack(fill=tk.X, pady=20)
         
         tk.Label(title_frame, text="Reports & Analytics", font=('Segoe UI', 24, 'bold'),
                 bg=self.colors['bg_primary'], fg=self.colors['text_primary']).pack(side=tk.LEFT)
         
         # Report types
-        reports_frame = tk.Frame(self.content_area, bg=self.colors['bg_primary'])
+        reports_frame = tk.Frame(screen, bg=self.colors['bg_primary'])
         reports_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         
         report_types = [
             ("📊 Sales Report", self.generate_sales_report),
             ("📦 Inventory Report", self.generate_inventory_report),
             ("👥 Customer Report", self.generate_customer_report),
-            ("💰 Financial Report", self.generate_financial_report)
+            ("💰 Financial Report", self.generate_financial_report),
+            ("📈 Period Analytics", self.generate_analytics_report)
         ]
         
         for i, (title, command) in enumerate(report_types):
@@ -1150,20 +1356,24 @@ class RestaurantSystemWithRoles:
         reports_frame.grid_columnconfigure(1, weight=1)
         reports_frame.grid_rowconfigure(0, weight=1)
         reports_frame.grid_rowconfigure(1, weight=1)
+        reports_frame.grid_rowconfigure(2, weight=1)
     
+    @timed('open_settings', screen='Settings')
     def open_settings(self):
         """Open settings (admin only)"""
-        self.clear_content()
-        
+        self.screens.show('Settings', self.build_settings_screen, rebuild=True)
+    
+    def build_settings_screen(self, screen):
+        """Build the Settings screen"""
         # Title
-        title_frame = tk.Frame(self.content_area, bg=self.colors['bg_primary'])
+        title_frame = tk.Frame(screen, bg=self.colors['bg_primary'])
         title_frame.pack(fill=tk.X, pady=20)
         
         tk.Label(title_frame, text="Settings", font=('Segoe UI', 24, 'bold'),
                 bg=self.colors['bg_primary'], fg=self.colors['text_primary']).pack(side=tk.LEFT)
         
         # Settings content
-        settings_frame = tk.Frame(self.content_area, bg=self.colors['bg_card'])
+        settings_frame = tk.Frame(screen, bg=self.colors['bg_card'])
         settings_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         
         # Restaurant info
@@ -1202,6 +1412,57 @@ class RestaurantSystemWithRoles:
                 bg=self.colors['bg_secondary'], fg=self.colors['text_primary'],
                 insertbackground=self.colors['text_primary'], relief=tk.FLAT, width=10).pack(side=tk.LEFT)
         
+        # Storage status
+        storage_frame = tk.LabelFrame(settings_frame, text="Storage", font=('Segoe UI', 12, 'bold'),
+                                     bg=self.colors['bg_card'], fg=self.colors['text_primary'])
+        storage_frame.pack(fill=tk.X, padx=20, pady=20)
+        
+        storage_label = tk.Label(storage_frame, text=self.get_save_status(), font=('Segoe UI', 10),
+                                bg=self.colors['bg_card'], fg=self.colors['text_secondary'])
+        storage_label.pack(side=tk.LEFT, padx=10)
+        tk.Button(storage_frame, text="Refresh", font=('Segoe UI', 9),
+                 bg=self.colors['bg_secondary'], fg=self.colors['text_primary'], relief=tk.FLAT,
+                 command=lambda: storage_label.config(text=self.get_save_status())).pack(side=tk.RIGHT, padx=10)
+        
+        # Operation timings
+        timings_frame = tk.LabelFrame(settings_frame, text="Performance", font=('Segoe UI', 12, 'bold'),
+                                     bg=self.colors['bg_card'], fg=self.colors['text_primary'])
+        timings_frame.pack(fill=tk.X, padx=20, pady=20)
+        
+        controls_frame = tk.Frame(timings_frame, bg=self.colors['bg_card'])
+        controls_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        timings_var = tk.BooleanVar(value=self.timings.enabled)
+        tk.Checkbutton(controls_frame, text="Record operation timings", variable=timings_var,
+                      font=('Segoe UI', 10), bg=self.colors['bg_card'], fg=self.colors['text_primary'],
+                      command=lambda: setattr(self.timings, 'enabled', timings_var.get())).pack(side=tk.LEFT)
+        
+        tk.Label(controls_frame, text="Slow threshold (ms):", font=('Segoe UI', 10),
+                bg=self.colors['bg_card'], fg=self.colors['text_secondary']).pack(side=tk.LEFT, padx=(20, 5))
+        threshold_var = tk.StringVar(value=f"{self.timings.slow_threshold * 1000:g}")
+        tk.Entry(controls_frame, textvariable=threshold_var, font=('Segoe UI', 10),
+                bg=self.colors['bg_secondary'], fg=self.colors['text_primary'],
+                insertbackground=self.colors['text_primary'], relief=tk.FLAT, width=8).pack(side=tk.LEFT)
+        
+        timings_text = tk.Text(timings_frame, font=('Courier', 9), height=8,
+                              bg=self.colors['bg_secondary'], fg=self.colors['text_primary'])
+        timings_text.pack(fill=tk.X, padx=10, pady=5)
+        
+        def refresh_timings():
+            try:
+                self.timings.slow_threshold = float(threshold_var.get()) / 1000
+            except ValueError:
+                messagebox.showerror("Error", "Please enter a valid threshold")
+            timings_text.config(state=tk.NORMAL)
+            timings_text.delete('1.0', tk.END)
+            timings_text.insert(tk.END, self.get_timing_summary())
+            timings_text.config(state=tk.DISABLED)
+        
+        refresh_timings()
+        tk.Button(controls_frame, text="Apply / Refresh", font=('Segoe UI', 9),
+                 bg=self.colors['bg_secondary'], fg=self.colors['text_primary'], relief=tk.FLAT,
+                 command=refresh_timings).pack(side=tk.RIGHT)
+        
         # Save button
         tk.Button(settings_frame, text="Save Settings", font=('Segoe UI', 10, 'bold'),
                  bg=self.colors['success'], fg=self.colors['text_primary'],
@@ -1212,7 +1473,7 @@ class RestaurantSystemWithRoles:
         """Open quick order dialog"""
         dialog = tk.Toplevel(self.root)
         dialog.title("Quick Order")
-        dialog.geometry("600x500")
+        dialog.geometry("600x650")
         dialog.configure(bg=self.colors['bg_primary'])
         dialog.transient(self.root)
         dialog.grab_set()
@@ -1249,33 +1510,14 @@ class RestaurantSystemWithRoles:
                                  bg=self.colors['bg_card'], fg=self.colors['text_primary'])
         menu_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         
+        self.quick_order_items = []
+        
         # Show message if no menu items
         if not any(self.data['menu'].values()):
             tk.Label(menu_frame, text="No menu items available. Please add menu items first.", 
                     font=('Segoe UI', 11), bg=self.colors['bg_card'], fg=self.colors['warning']).pack(pady=20)
         else:
-            # Display menu items
-            for category, items in self.data['menu'].items():
-                if items:
-                    cat_frame = tk.Frame(menu_frame, bg=self.colors['bg_card'])
-                    cat_frame.pack(fill=tk.X, pady=5)
-                    
-                    tk.Label(cat_frame, text=category, font=('Segoe UI', 10, 'bold'),
-                            bg=self.colors['bg_card'], fg=self.colors['accent']).pack(anchor='w')
-                    
-                    for item in items:
-                        item_frame = tk.Frame(cat_frame, bg=self.colors['bg_secondary'])
-                        item_frame.pack(fill=tk.X, pady=2)
-                        
-                        tk.Label(item_frame, text=f"{item['name']} - ${item['price']:.2f}", 
-                                font=('Segoe UI', 9), bg=self.colors['bg_secondary'], 
-                                fg=self.colors['text_primary']).pack(side=tk.LEFT, padx=10)
-                        
-                        self.quick_order_items = []
-                        tk.Button(item_frame, text="Add", font=('Segoe UI', 8),
-                                 bg=self.colors['accent'], fg=self.colors['text_primary'],
-                                 relief=tk.FLAT, 
-                                 command=lambda i=item: self.add_quick_order_item(i)).pack(side=tk.RIGHT, padx=5)
+            self.create_menu_picker(menu_frame)
         
         # Order summary
         summary_frame = tk.LabelFrame(form_frame, text="Order Summary", font=('Segoe UI', 11, 'bold'),
@@ -1301,6 +1543,60 @@ class RestaurantSystemWithRoles:
                  bg=self.colors['success'], fg=self.colors['text_primary'],
                  relief=tk.FLAT, command=lambda: self.confirm_quick_order(dialog, customer_var, table_var)).pack(side=tk.LEFT, padx=5)
     
+    def create_menu_picker(self, parent):
+        """Search box over the menu with the matching items in a virtualized list
+        
+        Typing filters the list; Down moves into it, Enter adds the selected
+        item (or the best match from the search box) and Escape clears the search.
+        """
+        index = self.engine.menu_index()
+        
+        search_var = tk.StringVar()
+        search_entry = tk.Entry(parent, textvariable=search_var, font=('Segoe UI', 10),
+                               bg=self.colors['bg_secondary'], fg=self.colors['text_primary'],
+                               insertbackground=self.colors['text_primary'], relief=tk.FLAT)
+        search_entry.pack(fill=tk.X, padx=10, pady=5)
+        
+        list_frame = tk.Frame(parent, bg=self.colors['bg_card'])
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        # Rows are entry numbers of the index
+        def row(number):
+            category, item = index.entries[number]
+            return (item['name'], category, f"${item['price']:.2f}")
+        
+        columns = ('Item', 'Category', 'Price')
+        picker = VirtualTreeview(list_frame, columns, row, lambda number: number,
+                                 column_width=150, style='Modern.Treeview', height=8)
+        picker.pack()
+        
+        def search(*args):
+            picker.set_rows(index.search(search_var.get()), reset=True)
+        
+        def add_item(number):
+            if number is not None:
+                self.add_quick_order_item(index.entries[number][1])
+            return 'break'
+        
+        def enter_list(event):
+            picker.tree.focus_set()
+            return picker.move_selection(1)
+        
+        def clear_search(event):
+            search_var.set('')
+            return 'break'
+        
+        search_var.trace_add('write', search)
+        search_entry.bind('<Return>', lambda event: add_item(picker.rows[0] if len(picker) else None))
+        search_entry.bind('<Down>', enter_list)
+        search_entry.bind('<Escape>', clear_search)
+        picker.tree.bind('<Return>', lambda event: add_item(picker.selected_row()))
+        picker.tree.bind('<Double-1>', lambda event: add_item(picker.selected_row()))
+        picker.tree.bind('<Escape>', lambda event: search_entry.focus_set())
+        
+        search()
+        search_entry.focus_set()
+    
     def add_quick_order_item(self, item):
         """Add item to quick order"""
         if not hasattr(self, 'quick_order_items'):
@@ -1341,41 +1637,27 @@ class RestaurantSystemWithRoles:
             messagebox.showwarning("No Items", "Please add items to the order")
             return
         
-        total = sum(item['price'] for item in self.quick_order_items)
-        
-        # Create order
-        order = {
-            'id': len(self.data['orders']) + 1,
-            'table': table_var.get(),
-            'customer': customer_var.get() or 'Walk-in',
-            'items': self.quick_order_items.copy(),
-            'total': total,
-            'date': self.current_date,
-            'time': datetime.now().strftime("%H:%M"),
-            'status': 'active'
-        }
-        
-        # Save order
-        self.data['orders'].append(order)
-        self.data['daily_sales'][self.current_date] += total
-        
-        # Add to kitchen orders for display
-        self.data['kitchen_orders'].append(order)
+        # Only creating the order and updating the display are timed, not the dialog
+        with self.timings.measure('confirm_quick_order'):
+            # Create order and send it to the kitchen
+            order = self.engine.create_order(self.quick_order_items, table_var.get(),
+                                             customer_var.get(), date=self.current_date)
+            
+            # Clear and close
+            self.clear_quick_order(dialog)
+            dialog.destroy()
+            self.show_notification(f"New order #{order['id']} created", 'success')
+            
+            # Refresh the screen in view; the orders list only gets the new row
+            if self.screens.current == 'Orders':
+                self.show_new_order(order)
+            elif self.screens.current == 'Kitchen':
+                self.refresh_kitchen_soon()
+            else:
+                self.screens.refresh()
         
         # Show confirmation
-        messagebox.showinfo("Order Confirmed", f"Order #{order['id']} has been confirmed!\nTotal: ${total:.2f}")
-        
-        # Clear and close
-        self.clear_quick_order(dialog)
-        dialog.destroy()
-        self.save_data()
-        self.show_notification(f"New order #{order['id']} created", 'success')
-        
-        # Refresh displays
-        if hasattr(self, 'orders_tree'):
-            self.update_orders_display()
-        if hasattr(self, 'kitchen_orders_frame'):
-            self.update_kitchen_display()
+        messagebox.showinfo("Order Confirmed", f"Order #{order['id']} has been confirmed!\nTotal: ${order['total']:.2f}")
     
     def add_menu_item(self):
         """Add new menu item"""
@@ -1437,19 +1719,10 @@ class RestaurantSystemWithRoles:
                     'cost': float(cost_var.get())
                 }
                 
-                # Add to menu
-                self.data['menu'][category_var.get()].append(new_item)
-                
-                # Add to inventory if not exists
-                if new_item['name'] not in self.data['inventory']:
-                    self.data['inventory'][new_item['name']] = {
-                        'quantity': 50,
-                        'unit': 'servings',
-                        'min_stock': 10
-                    }
+                # Add to menu, and to inventory if not exists
+                self.engine.add_menu_item(category_var.get(), new_item)
                 
-                self.save_data()
-                self.update_menu_display()
+                self.screens.refresh()
                 dialog.destroy()
                 self.show_notification(f"Menu item '{new_item['name']}' added successfully", 'success')
             except ValueError:
@@ -1517,14 +1790,13 @@ class RestaurantSystemWithRoles:
         
         def save_item():
             try:
-                self.data['inventory'][name_var.get()] = {
+                self.engine.set_inventory_item(name_var.get(), {
                     'quantity': int(quantity_var.get()),
                     'unit': unit_var.get(),
                     'min_stock': int(min_stock_var.get())
-                }
+                })
                 
-                self.save_data()
-                self.update_inventory_display()
+                self.screens.refresh()
                 dialog.destroy()
                 self.show_notification(f"Inventory item '{name_var.get()}' added successfully", 'success')
             except ValueError:
@@ -1584,9 +1856,8 @@ class RestaurantSystemWithRoles:
                 'visits': 0
             }
             
-            self.data['customers'].append(new_customer)
-            self.save_data()
-            self.update_customer_display()
+            self.engine.add_customer(new_customer)
+            self.screens.refresh()
             dialog.destroy()
             self.show_notification(f"Customer {new_customer['name']} added successfully", 'success')
         
@@ -1598,7 +1869,7 @@ class RestaurantSystemWithRoles:
         """Add new expense"""
         dialog = tk.Toplevel(self.root)
         dialog.title("Add Expense")
-        dialog.geometry("400x250")
+        dialog.geometry("400x340")
         dialog.configure(bg=self.colors['bg_primary'])
         dialog.transient(self.root)
         dialog.grab_set()
@@ -1626,15 +1897,23 @@ class RestaurantSystemWithRoles:
                 bg=self.colors['bg_secondary'], fg=self.colors['text_primary'],
                 insertbackground=self.colors['text_primary'], relief=tk.FLAT).pack(fill=tk.X, pady=(0, 10))
         
+        tk.Label(form_frame, text="Category:", font=('Segoe UI', 10),
+                bg=self.colors['bg_card'], fg=self.colors['text_secondary']).pack(anchor='w', pady=(10, 5))
+        
+        category_var = tk.StringVar(value="Supplies")
+        ttk.Combobox(form_frame, textvariable=category_var, values=EXPENSE_CATEGORIES,
+                    font=('Segoe UI', 10)).pack(fill=tk.X, pady=(0, 10))
+        
         def add_expense():
             try:
                 expense = {
                     'description': desc_var.get(),
                     'amount': float(amount_var.get()),
+                    'category': category_var.get().strip() or 'Other',
                     'date': self.current_date
                 }
-                self.data['expenses'].append(expense)
-                self.save_data()
+                self.engine.add_expense(expense)
+                self.screens.refresh()
                 dialog.destroy()
                 self.show_notification("Expense added successfully", 'success')
             except ValueError:
@@ -1708,7 +1987,6 @@ class RestaurantSystemWithRoles:
         def save_employee():
             try:
                 new_employee = {
-                    'id': len(self.data['employees']) + 1,
                     'name': name_var.get(),
                     'position': position_var.get(),
                     'email': email_var.get(),
@@ -1717,9 +1995,8 @@ class RestaurantSystemWithRoles:
                     'status': 'active'
                 }
                 
-                self.data['employees'].append(new_employee)
-                self.save_data()
-                self.update_employee_display()
+                new_employee = self.engine.add_employee(new_employee)
+                self.screens.refresh()
                 dialog.destroy()
                 self.show_notification(f"Employee {new_employee['name']} added successfully", 'success')
             except ValueError:
@@ -1733,181 +2010,79 @@ class RestaurantSystemWithRoles:
                  bg=self.colors['danger'], fg=self.colors['text_primary'],
                  relief=tk.FLAT, command=dialog.destroy).pack(side=tk.LEFT, padx=10)
     
+    @timed('generate_sales_report')
     def generate_sales_report(self):
         """Generate sales report"""
-        dialog = tk.Toplevel(self.root)
-        dialog.title("Sales Report")
-        dialog.geometry("600x500")
-        dialog.configure(bg=self.colors['bg_primary'])
-        dialog.transient(self.root)
-        dialog.grab_set()
-        
-        tk.Label(dialog, text="Sales Report", font=('Segoe UI', 16, 'bold'),
-                bg=self.colors['bg_primary'], fg=self.colors['text_primary']).pack(pady=20)
-        
-        # Report content
-        report_frame = tk.Frame(dialog, bg=self.colors['bg_card'])
-        report_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
-        
-        # Create text widget for report
-        report_text = tk.Text(report_frame, font=('Courier', 10),
-                             bg=self.colors['bg_secondary'], fg=self.colors['text_primary'],
-                             wrap=tk.WORD)
-        report_text.pack(fill=tk.BOTH, expand=True)
-        
-        # Generate report content
-        report_content = "SALES REPORT\n"
-        report_content += "=" * 50 + "\n"
-        report_content += f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-        
-        # Calculate metrics
-        total_revenue = sum(self.data['daily_sales'].values())
-        total_orders = len(self.data['orders'])
-        avg_order = total_revenue / total_orders if total_orders > 0 else 0
-        
-        report_content += f"Total Revenue: ${total_revenue:.2f}\n"
-        report_content += f"Total Orders: {total_orders}\n"
-        report_content += f"Average Order Value: ${avg_order:.2f}\n\n"
-        
-        # Today's sales
-        today_sales = self.data['daily_sales'].get(self.current_date, 0)
-        report_content += f"Today's Sales: ${today_sales:.2f}\n\n"
-        
-        # Top selling items
-        item_sales = defaultdict(int)
-        for order in self.data['orders']:
-            for item in order['items']:
-                item_sales[item['name']] += 1
-        
-        if item_sales:
-            report_content += "TOP SELLING ITEMS:\n"
-            for item, count in sorted(item_sales.items(), key=lambda x: x[1], reverse=True)[:10]:
-                report_content += f"  {item}: {count} orders\n"
-        
-        # Insert report
-        report_text.insert(tk.END, report_content)
-        report_text.config(state=tk.DISABLED)
-        
-        # Export button
-        tk.Button(dialog, text="Export Report", font=('Segoe UI', 11, 'bold'),
-                 bg=self.colors['success'], fg=self.colors['text_primary'],
-                 relief=tk.FLAT, command=lambda: self.export_report(report_content, "sales_report")).pack(pady=10)
+        self.show_report("Sales Report", "sales_report",
+                         lambda task: self.engine.sales_report(self.current_date, task=task))
     
+    @timed('generate_inventory_report')
     def generate_inventory_report(self):
         """Generate inventory report"""
-        dialog = tk.Toplevel(self.root)
-        dialog.title("Inventory Report")
-        dialog.geometry("600x500")
-        dialog.configure(bg=self.colors['bg_primary'])
-        dialog.transient(self.root)
-        dialog.grab_set()
-        
-        tk.Label(dialog, text="Inventory Report", font=('Segoe UI', 16, 'bold'),
-                bg=self.colors['bg_primary'], fg=self.colors['text_primary']).pack(pady=20)
-        
-        # Report content
-        report_frame = tk.Frame(dialog, bg=self.colors['bg_card'])
-        report_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
-        
-        # Create text widget for report
-        report_text = tk.Text(report_frame, font=('Courier', 10),
-                             bg=self.colors['bg_secondary'], fg=self.colors['text_primary'],
-                             wrap=tk.WORD)
-        report_text.pack(fill=tk.BOTH, expand=True)
-        
-        # Generate report content
-        report_content = "INVENTORY REPORT\n"
-        report_content += "=" * 50 + "\n"
-        report_content += f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-        
-        # Total items
-        total_items = len(self.data['inventory'])
-        report_content += f"Total Items: {total_items}\n\n"
-        
-        # Low stock items
-        low_stock = []
-        for item_name, item_data in self.data['inventory'].items():
-            if item_data['quantity'] <= item_data['min_stock']:
-                low_stock.append(f"{item_name}: {item_data['quantity']} {item_data['unit']}")
-        
-        if low_stock:
-            report_content += f"LOW STOCK ITEMS ({len(low_stock)}):\n"
-            for item in low_stock:
-                report_content += f"  {item}\n"
-        else:
-            report_content += "No items are low in stock\n"
-        
-        # Insert report
-        report_text.insert(tk.END, report_content)
-        report_text.config(state=tk.DISABLED)
-        
-        # Export button
-        tk.Button(dialog, text="Export Report", font=('Segoe UI', 11, 'bold'),
-                 bg=self.colors['success'], fg=self.colors['text_primary'],
-                 relief=tk.FLAT, command=lambda: self.export_report(report_content, "inventory_report")).pack(pady=10)
+        self.show_report("Inventory Report", "inventory_report",
+                         lambda task: self.engine.inventory_report(task=task))
     
+    @timed('generate_customer_report')
     def generate_customer_report(self):
         """Generate customer report"""
+        self.show_report("Customer Report", "customer_report",
+                         lambda task: self.engine.customer_report(task=task))
+    
+    @timed('generate_financial_report')
+    def generate_financial_report(self):
+        """Generate financial report"""
+        periods = [(text, period_range(period, self.current_date)) for text, period in
+                   (("Today", 'day'), ("This Week", 'week'), ("This Month", 'month'),
+                    ("This Year", 'year'), ("All Time", 'all'))]
+        self.show_report("Financial Report", "financial_report",
+                         lambda task, start, end: self.engine.financial_report(start, end, task=task),
+                         periods=periods, default_period=len(periods) - 1)
+    
+    @timed('generate_analytics_report')
+    def generate_analytics_report(self):
+        """Generate period analytics report"""
+        today = datetime.strptime(self.current_date, "%Y-%m-%d")
+        periods = [
+            ("This Month", (today.strftime("%Y-%m-01"), self.current_date)),
+            ("Last 30 Days", ((today - timedelta(days=29)).strftime("%Y-%m-%d"), self.current_date)),
+            ("This Year", (today.strftime("%Y-01-01"), self.current_date)),
+            ("All Time", (None, None))
+        ]
+        self.show_report("Period Analytics", "analytics_report",
+                         lambda task, start, end: self.engine.analytics_report(start, end, task=task),
+                         periods=periods, geometry="700x600")
+    
+    def show_report(self, title, filename_prefix, build, periods=None, default_period=0, geometry="600x500"):
+        """Open a report window and build the report on a worker thread
+        
+        The window is not modal, so orders can be taken and other reports
+        opened while it is being built. build gets the task, plus the start
+        and end date of the chosen period when periods are given; the
+        period can then also be typed into From/To entries.
+        """
         dialog = tk.Toplevel(self.root)
-        dialog.title("Customer Report")
-        dialog.geometry("600x500")
+        dialog.title(title)
+        dialog.geometry(geometry)
         dialog.configure(bg=self.colors['bg_primary'])
         dialog.transient(self.root)
-        dialog.grab_set()
         
-        tk.Label(dialog, text="Customer Report", font=('Segoe UI', 16, 'bold'),
+        tk.Label(dialog, text=title, font=('Segoe UI', 16, 'bold'),
                 bg=self.colors['bg_primary'], fg=self.colors['text_primary']).pack(pady=20)
         
-        # Report content
-        report_frame = tk.Frame(dialog, bg=self.colors['bg_card'])
-        report_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        # Period buttons
+        period_frame = tk.Frame(dialog, bg=self.colors['bg_primary'])
+        period_frame.pack(fill=tk.X, padx=20)
         
-        # Create text widget for report
-        report_text = tk.Text(report_frame, font=('Courier', 10),
-                             bg=self.colors['bg_secondary'], fg=self.colors['text_primary'],
-                             wrap=tk.WORD)
-        report_text.pack(fill=tk.BOTH, expand=True)
+        # Custom period
+        range_frame = tk.Frame(dialog, bg=self.colors['bg_primary'])
+        range_frame.pack(fill=tk.X, padx=20, pady=(5, 0))
         
-        # Generate report content
-        report_content = "CUSTOMER REPORT\n"
-        report_content += "=" * 50 + "\n"
-        report_content += f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-        
-        # Total customers
-        report_content += f"Total Customers: {len(self.data['customers'])}\n\n"
-        
-        # Top customers by spending
-        customer_spending = defaultdict(float)
-        for customer in self.data['customers']:
-            total_spent = sum(order['total'] for order in self.data['orders'] 
-                            if order.get('customer') == customer['name'])
-            customer_spending[customer['name']] = total_spent
-        
-        if customer_spending:
-            report_content += "TOP CUSTOMERS BY SPENDING:\n"
-            for name, amount in sorted(customer_spending.items(), key=lambda x: x[1], reverse=True)[:10]:
-                report_content += f"  {name}: ${amount:.2f}\n"
-        
-        # Insert report
-        report_text.insert(tk.END, report_content)
-        report_text.config(state=tk.DISABLED)
-        
-        # Export button
-        tk.Button(dialog, text="Export Report", font=('Segoe UI', 11, 'bold'),
-                 bg=self.colors['success'], fg=self.colors['text_primary'],
-                 relief=tk.FLAT, command=lambda: self.export_report(report_content, "customer_report")).pack(pady=10)
-    
-    def generate_financial_report(self):
-        """Generate financial report"""
-        dialog = tk.Toplevel(self.root)
-        dialog.title("Financial Report")
-        dialog.geometry("600x500")
-        dialog.configure(bg=self.colors['bg_primary'])
-        dialog.transient(self.root)
-        dialog.grab_set()
+        # Progress and cancel
+        progress_frame = tk.Frame(dialog, bg=self.colors['bg_primary'])
+        progress_frame.pack(fill=tk.X, padx=20, pady=(10, 0))
         
-        tk.Label(dialog, text="Financial Report", font=('Segoe UI', 16, 'bold'),
-                bg=self.colors['bg_primary'], fg=self.colors['text_primary']).pack(pady=20)
+        progress = ttk.Progressbar(progress_frame, maximum=1.0, mode='determinate')
+        progress.pack(side=tk.LEFT, fill=tk.X, expand=True)
         
         # Report content
         report_frame = tk.Frame(dialog, bg=self.colors['bg_card'])
@@ -1916,33 +2091,101 @@ class RestaurantSystemWithRoles:
         # Create text widget for report
         report_text = tk.Text(report_frame, font=('Courier', 10),
                              bg=self.colors['bg_secondary'], fg=self.colors['text_primary'],
-                             wrap=tk.WORD)
+                             wrap=tk.NONE if periods else tk.WORD)
         report_text.pack(fill=tk.BOTH, expand=True)
         
-        # Generate report content
-        report_content = "FINANCIAL REPORT\n"
-        report_content += "=" * 50 + "\n"
-        report_content += f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+        report = {'content': '', 'task': None}
+        
+        def show_text(text):
+            report_text.config(state=tk.NORMAL)
+            report_text.delete('1.0', tk.END)
+            report_text.insert(tk.END, text)
+            report_text.config(state=tk.DISABLED)
+        
+        def on_done(content):
+            report['content'] = content
+            report['task'] = None
+            progress.config(value=1.0)
+            cancel_button.config(state=tk.DISABLED)
+            export_button.config(state=tk.NORMAL)
+            show_text(content)
+        
+        def on_error(error):
+            report['task'] = None
+            cancel_button.config(state=tk.DISABLED)
+            show_text(f"Failed to generate report: {error}")
+        
+        def on_progress(fraction):
+            progress.config(value=fraction)
+        
+        def run(*period):
+            cancel()
+            progress.config(value=0)
+            cancel_button.config(state=tk.NORMAL)
+            export_button.config(state=tk.DISABLED)
+            show_text("Generating report...")
+            report['task'] = self.tasks.submit(filename_prefix, lambda task: build(task, *period),
+                                               on_done, on_error, on_progress)
+        
+        def cancel():
+            if report['task'] is not None:
+                report['task'].cancel()
+                report['task'] = None
+                cancel_button.config(state=tk.DISABLED)
+                show_text("Report cancelled")
+        
+        def close():
+            cancel()
+            dialog.destroy()
         
-        # Calculate metrics
-        total_revenue = sum(self.data['daily_sales'].values())
-        total_expenses = sum(e['amount'] for e in self.data['expenses'])
-        net_profit = total_revenue - total_expenses
-        tax_collected = total_revenue * self.data['tax_settings']['rate']
+        def choose(start, end):
+            from_var.set(start or '')
+            to_var.set(end or '')
+            run(start, end)
         
-        report_content += f"Total Revenue: PKR{total_revenue:.2f}\n"
-        report_content += f"Total Expenses: PKR{total_expenses:.2f}\n"
-        report_content += f"Net Profit: PKR{net_profit:.2f}\n"
-        report_content += f"Tax Collected: PKR{tax_collected:.2f}\n"
+        def apply_range():
+            date_range = self.read_date_range(from_var, to_var)
+            if date_range is not None:
+                run(*date_range)
         
-        # Insert report
-        report_text.insert(tk.END, report_content)
-        report_text.config(state=tk.DISABLED)
+        cancel_button = tk.Button(progress_frame, text="Cancel", font=('Segoe UI', 9),
+                                 bg=self.colors['danger'], fg=self.colors['text_primary'],
+                                 relief=tk.FLAT, command=cancel)
+        cancel_button.pack(side=tk.LEFT, padx=(10, 0))
         
         # Export button
-        tk.Button(dialog, text="Export Report", font=('Segoe UI', 11, 'bold'),
-                 bg=self.colors['success'], fg=self.colors['text_primary'],
-                 relief=tk.FLAT, command=lambda: self.export_report(report_content, "financial_report")).pack(pady=10)
+        export_button = tk.Button(dialog, text="Export Report", font=('Segoe UI', 11, 'bold'),
+                                 bg=self.colors['success'], fg=self.colors['text_primary'], relief=tk.FLAT,
+                                 command=lambda: self.export_report(report['content'], filename_prefix))
+        export_button.pack(pady=10)
+        
+        for text, (start, end) in periods or []:
+            tk.Button(period_frame, text=text, font=('Segoe UI', 9),
+                     bg=self.colors['bg_secondary'], fg=self.colors['text_primary'], relief=tk.FLAT,
+                     command=lambda start=start, end=end: choose(start, end)).pack(side=tk.LEFT, padx=2)
+        
+        from_var = tk.StringVar()
+        to_var = tk.StringVar()
+        if periods:
+            tk.Label(range_frame, text="From:", font=('Segoe UI', 10),
+                    bg=self.colors['bg_primary'], fg=self.colors['text_secondary']).pack(side=tk.LEFT, padx=(0, 5))
+            tk.Entry(range_frame, textvariable=from_var, font=('Segoe UI', 10), width=12,
+                    bg=self.colors['bg_secondary'], fg=self.colors['text_primary'],
+                    insertbackground=self.colors['text_primary'], relief=tk.FLAT).pack(side=tk.LEFT)
+            tk.Label(range_frame, text="To:", font=('Segoe UI', 10),
+                    bg=self.colors['bg_primary'], fg=self.colors['text_secondary']).pack(side=tk.LEFT, padx=5)
+            tk.Entry(range_frame, textvariable=to_var, font=('Segoe UI', 10), width=12,
+                    bg=self.colors['bg_secondary'], fg=self.colors['text_primary'],
+                    insertbackground=self.colors['text_primary'], relief=tk.FLAT).pack(side=tk.LEFT)
+            tk.Button(range_frame, text="Apply", font=('Segoe UI', 9),
+                     bg=self.colors['accent'], fg=self.colors['text_primary'],
+                     relief=tk.FLAT, command=apply_range).pack(side=tk.LEFT, padx=5)
+        
+        dialog.protocol("WM_DELETE_WINDOW", close)
+        if periods:
+            choose(*periods[default_period][1])
+        else:
+            run()
     
     def export_report(self, content, filename_prefix):
         """Export report to file"""
@@ -1962,13 +2205,19 @@ class RestaurantSystemWithRoles:
     
     def logout(self):
         """Logout user"""
+        self.flush_data()
         self.current_user = None
         self.show_login()
     
-    def clear_content(self):
-        """Clear content area"""
-        for widget in self.content_area.winfo_children():
-            widget.destroy()
+    def on_close(self):
+        """Write queued saves and close the application"""
+        self.tasks.shutdown()
+        self.scheduler.shutdown()
+        try:
+            self.engine.close()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save data: {e}")
+        self.root.destroy()
     
     def clear_window(self):
         """Clear all widgets from window"""
@@ -0,0 +1,333 @@
+import os
+import tempfile
+import unittest
+
+from restaurant_analytics import (DailyTotals, ExpenseLedger, SalesMetrics, add_customer_order, add_item_sales, add_to_rollups,
+                                  build_customer_stats, build_rollups, hourly_orders, merge_buckets, new_bucket,
+                                  period_range, rollup_range, top_items, top_items_in_range)
+from restaurant_engine import RestaurantEngine
+from restaurant_storage import JournalStore
+
+TODAY = '2024-03-02'
+BURGER = {'name': 'Burger', 'price': 12.5, 'cost': 4.0}
+SODA = {'name': 'Soda', 'price': 2.5, 'cost': 0.5}
+
+
+def make_order(number, date, items, table=1, time='12:00', customer=None):
+    """An order dict as the engine stores it"""
+    return {'id': number, 'table': str(table), 'customer': customer or 'Walk-in', 'items': items,
+            'total': sum(item['price'] for item in items), 'date': date, 'time': time, 'status': 'completed'}
+
+
+ORDERS = [
+    make_order(1, '2024-02-28', [BURGER, SODA], 1, '11:30'),
+    make_order(2, '2024-02-28', [BURGER], 2, '11:45'),
+    make_order(3, '2024-03-01', [SODA, SODA], 1, '19:05'),
+    make_order(4, TODAY, [BURGER, BURGER, SODA], 3, '12:10'),
+    make_order(5, TODAY, [SODA], 2, '12:55')
+]
+
+
+class SalesMetricsTest(unittest.TestCase):
+    """Running totals against a scan of the same orders"""
+
+    def test_added_orders_match_a_rebuild(self):
+        metrics = SalesMetrics()
+        for order in ORDERS:
+            metrics.add_order(order)
+        day_orders, daily_sales = {}, {}
+        for order in ORDERS:
+            day_orders[order['date']] = day_orders.get(order['date'], 0) + 1
+            daily_sales[order['date']] = daily_sales.get(order['date'], 0) + order['total']
+        rebuilt = SalesMetrics()
+        rebuilt.rebuild(day_orders, daily_sales)
+        self.assertEqual(metrics.summary(TODAY), rebuilt.summary(TODAY))
+
+        summary = metrics.summary(TODAY)
+        self.assertEqual(summary['total_orders'], 5)
+        self.assertAlmostEqual(summary['total_revenue'], 62.5)
+        self.assertAlmostEqual(summary['avg_order'], 12.5)
+        self.assertEqual(summary['today_orders'], 2)
+        self.assertAlmostEqual(summary['today_revenue'], 30.0)
+        self.assertEqual(metrics.count_orders('2024-02-28'), 2)
+        self.assertEqual(metrics.count_orders('2024-02-29'), 0)
+        self.assertAlmostEqual(metrics.revenue_in_range('2024-02-29', '2024-03-01'), 5.0)
+
+    def test_empty_summary(self):
+        summary = SalesMetrics().summary(TODAY)
+        self.assertEqual((summary['total_orders'], summary['avg_order'], summary['today_revenue']), (0, 0, 0))
+
+
+class RollupTest(unittest.TestCase):
+    """Day and hour buckets against the raw orders"""
+
+    def test_incremental_rollups_match_a_rebuild(self):
+        rollups = {'days': {}, 'hours': {}}
+        for order in ORDERS:
+            add_to_rollups(rollups, order)
+        self.assertEqual(rollups, build_rollups(ORDERS))
+        self.assertEqual(sorted(rollups['days']), ['2024-02-28', '2024-03-01', TODAY])
+        self.assertEqual(sorted(rollups['hours']), ['2024-02-28 11', '2024-03-01 19', f"{TODAY} 12"])
+
+    def test_rollup_range(self):
+        rollups = build_rollups(ORDERS)
+        bucket = rollup_range(rollups, '2024-03-01', TODAY)
+        self.assertEqual(bucket['orders'], 3)
+        self.assertAlmostEqual(bucket['revenue'], 35.0)
+        self.assertEqual(bucket['items'], {'Soda': 4, 'Burger': 2})
+        self.assertEqual(bucket['tables'], {'1': 5.0, '3': 27.5, '2': 2.5})
+        self.assertEqual(rollup_range(rollups, '2024-02-29', '2024-02-29'), new_bucket())
+        everything = rollup_range(rollups)
+        self.assertEqual(everything['orders'], len(ORDERS))
+        self.assertEqual(everything['items'], {'Burger': 4, 'Soda': 5})
+
+    def test_merge_buckets(self):
+        rollups = build_rollups(ORDERS)
+        merged = merge_buckets(rollups['hours'].values())
+        self.assertEqual(merged, rollup_range(rollups))
+
+    def test_hourly_orders(self):
+        rollups = build_rollups(ORDERS + [make_order(6, TODAY, [BURGER], 1, '08:00')])
+        self.assertEqual(hourly_orders(rollups, TODAY), {'08': (1, 12.5), '12': (2, 30.0)})
+        self.assertEqual(hourly_orders(rollups, '2024-02-29'), {})
+
+
+class TopItemsTest(unittest.TestCase):
+    """Best sellers from the lifetime counter and from the day rollups"""
+
+    def test_counter_matches_a_scan(self):
+        item_sales = {}
+        for order in ORDERS:
+            add_item_sales(item_sales, order)
+        scanned = {}
+        for order in ORDERS:
+            for item in order['items']:
+                scanned[item['name']] = scanned.get(item['name'], 0) + 1
+        self.assertEqual(item_sales, scanned)
+
+    def test_top_items(self):
+        item_sales = {f"Item {number}": number for number in range(50)}
+        self.assertEqual(top_items(item_sales, 3), [('Item 49', 49), ('Item 48', 48), ('Item 47', 47)])
+        self.assertEqual(len(top_items(item_sales)), 10)
+        self.assertEqual(top_items({}, 5), [])
+
+    def test_top_items_in_range(self):
+        rollups = build_rollups(ORDERS)
+        self.assertEqual(top_items_in_range(rollups, '2024-02-28', '2024-02-28'), [('Burger', 2), ('Soda', 1)])
+        self.assertEqual(top_items_in_range(rollups, '2024-03-01', '2024-03-01', k=1), [('Soda', 2)])
+        self.assertEqual(top_items_in_range(rollups, '2024-04-01'), [])
+
+
+class CustomerStatsTest(unittest.TestCase):
+    """Per-customer spend, order count and last visit"""
+
+    def test_orders_are_counted_by_customer_id(self):
+        customer_stats = {}
+        for order in ORDERS:
+            add_customer_order(customer_stats, order)
+        self.assertEqual(customer_stats, {})
+
+        ada = [{**order, 'customer': 'Ada', 'customer_id': 1} for order in ORDERS[2:]]
+        for order in reversed(ada):
+            add_customer_order(customer_stats, order)
+        self.assertEqual(customer_stats, {'1': {'spend': 35.0, 'orders': 3, 'last_visit': f"{TODAY} 12:55"}})
+
+    def test_legacy_orders_are_matched_by_name(self):
+        orders = [{**ORDERS[0], 'customer': 'Ada'}, {**ORDERS[1], 'customer': 'Bob'},
+                  {**ORDERS[2], 'customer': 'Ada', 'customer_id': 7}]
+        customer_stats = build_customer_stats(orders, {'Ada': 1})
+        self.assertEqual(customer_stats, {
+            '1': {'spend': 15.0, 'orders': 1, 'last_visit': '2024-02-28 11:30'},
+            '7': {'spend': 5.0, 'orders': 1, 'last_visit': '2024-03-01 19:05'}
+        })
+        self.assertNotIn('customer_id', orders[0])
+
+
+EXPENSES = [
+    {'date': '2024-02-29', 'amount': 120.0, 'category': 'Supplies'},
+    {'date': TODAY, 'amount': 40.0, 'category': 'Utilities'},
+    {'date': '2024-01-15', 'amount': 900.0, 'category': 'Rent'},
+    {'date': TODAY, 'amount': 15.5},
+    {'date': '2024-03-01', 'amount': 60.0, 'category': 'Supplies'}
+]
+
+
+class DailyTotalsTest(unittest.TestCase):
+    """Range sums against a scan, with amounts added in any order"""
+
+    def test_totals_match_a_scan(self):
+        amounts = [('2024-03-01', 5.0), ('2024-02-27', 2.0), ('2024-03-04', 1.0), ('2024-02-27', 3.0),
+                   ('2024-02-29', 10.0), ('2024-03-04', 4.0)]
+        totals = DailyTotals()
+        for day, amount in amounts:
+            totals.add(day, amount)
+        self.assertEqual(totals.days, ['2024-02-27', '2024-02-29', '2024-03-01', '2024-03-04'])
+        ranges = [(None, None), ('2024-02-28', '2024-03-01'), ('2024-03-01', '2024-03-01'), (None, '2024-02-26'),
+                  ('2024-03-05', None), ('2024-03-02', '2024-03-03'), ('2024-03-04', '2024-02-27')]
+        for start, end in ranges:
+            expected = sum(amount for day, amount in amounts
+                           if (start is None or day >= start) and (end is None or day <= end))
+            self.assertAlmostEqual(totals.total(start, end), expected, msg=(start, end))
+
+    def test_built_from_a_mapping(self):
+        totals = DailyTotals({'2024-03-01': 5.0, '2024-02-01': 1.0})
+        self.assertEqual(totals.amounts, {'2024-02-01': 1.0, '2024-03-01': 5.0})
+        self.assertEqual(totals.total('2024-02-15'), 5.0)
+
+
+class ExpenseLedgerTest(unittest.TestCase):
+    """Expense totals by period and category"""
+
+    def setUp(self):
+        self.ledger = ExpenseLedger(EXPENSES)
+
+    def test_totals(self):
+        self.assertAlmostEqual(self.ledger.total(), 1135.5)
+        self.assertAlmostEqual(self.ledger.total('2024-03-01', TODAY), 115.5)
+
+    def test_by_category(self):
+        self.assertEqual(self.ledger.by_category(),
+                         [('Rent', 900.0), ('Supplies', 180.0), ('Utilities', 40.0), ('Other', 15.5)])
+        self.assertEqual(self.ledger.by_category('2024-02-01', '2024-02-29'), [('Supplies', 120.0)])
+        self.assertEqual(self.ledger.by_category('2025-01-01'), [])
+
+    def test_recent(self):
+        recent = self.ledger.recent(3)
+        self.assertEqual([(e['date'], e['amount']) for e in recent],
+                         [(TODAY, 15.5), (TODAY, 40.0), ('2024-03-01', 60.0)])
+        self.ledger.add({'date': '2024-01-01', 'amount': 1.0, 'category': 'Other'})
+        self.assertEqual(self.ledger.recent(10)[-1]['date'], '2024-01-01')
+
+
+class PeriodRangeTest(unittest.TestCase):
+    """First and last day of the accounting periods"""
+
+    def test_periods(self):
+        # 2024-03-02 was a Saturday
+        self.assertEqual(period_range('day', TODAY), (TODAY, TODAY))
+        self.assertEqual(period_range('week', TODAY), ('2024-02-26', TODAY))
+        self.assertEqual(period_range('month', TODAY), ('2024-03-01', TODAY))
+        self.assertEqual(period_range('year', TODAY), ('2024-01-01', TODAY))
+        self.assertEqual(period_range('all', TODAY), (None, None))
+        with self.assertRaises(ValueError):
+            period_range('fortnight', TODAY)
+
+
+class EngineMetricsTest(unittest.TestCase):
+    """Dashboard figures and rollups kept by the engine across a reload"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.tmp.name, 'restaurant_data.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def open_engine(self):
+        engine = RestaurantEngine(JournalStore(self.data_file, save_window=0))
+        engine.load(TODAY)
+        return engine
+
+    def test_metrics_survive_reload(self):
+        engine = self.open_engine()
+        for order in ORDERS:
+            engine.create_order(order['items'], order['table'], date=order['date'], time=order['time'])
+        before = engine.dashboard_metrics(TODAY)
+        engine.close()
+
+        engine = self.open_engine()
+        try:
+            self.assertEqual(engine.dashboard_metrics(TODAY), before)
+            self.assertEqual(before['total_orders'], 5)
+            self.assertEqual(engine.count_orders(TODAY), 2)
+        finally:
+            engine.close()
+
+    def test_rollups_are_rebuilt_from_the_orders(self):
+        engine = self.open_engine()
+        for order in ORDERS:
+            engine.create_order(order['items'], order['table'], date=order['date'], time=order['time'])
+        kept = engine.data['rollups']
+        # Saved before the rollups existed
+        engine.data.pop('rollups')
+        engine.data.pop('item_sales')
+        engine.save()
+        engine.close()
+
+        engine = self.open_engine()
+        try:
+            self.assertEqual(engine.data['rollups'], kept)
+            self.assertEqual(engine.data['item_sales'], {'Burger': 4, 'Soda': 5})
+            self.assertEqual(engine.sales_in_range(TODAY, TODAY)['orders'], 2)
+            self.assertEqual(engine.hourly_sales('2024-03-01'), {'19': (1, 5.0)})
+            self.assertEqual(engine.top_selling_items(1), [('Soda', 5)])
+            self.assertEqual(engine.top_selling_items(start=TODAY, end=TODAY), [('Burger', 2), ('Soda', 2)])
+        finally:
+            engine.close()
+
+    def test_customers_get_ids_and_totals(self):
+        engine = self.open_engine()
+        engine.add_customer({'name': 'Ada'})
+        engine.add_customer({'name': 'Bob'})
+        engine.create_order([BURGER], 1, 'Ada', TODAY, '12:00')
+        engine.create_order([SODA], 2, 'Bob', TODAY, '12:30')
+        engine.create_order([BURGER, SODA], 1, 'Ada', TODAY, '18:00')
+        engine.create_order([SODA], 4, None, TODAY, '19:00')
+        ada, bob = engine.data['customers']
+        self.assertEqual((ada['id'], bob['id']), (1, 2))
+        self.assertEqual(engine.customer_stats(ada), {'spend': 27.5, 'orders': 2, 'last_visit': f"{TODAY} 18:00"})
+        self.assertEqual([customer['name'] for customer, _ in engine.top_customers(1)], ['Ada'])
+        engine.close()
+
+        engine = self.open_engine()
+        try:
+            self.assertEqual(engine.customer_stats(engine.data['customers'][1])['orders'], 1)
+            self.assertEqual(engine.customer_stats({'name': 'Nobody'})['orders'], 0)
+        finally:
+            engine.close()
+
+    def test_customers_saved_without_ids_are_numbered(self):
+        engine = self.open_engine()
+        engine.add_customer({'name': 'Ada'})
+        engine.create_order([BURGER], 1, 'Ada', TODAY, '12:00')
+        # Saved before customers had ids
+        for customer in engine.data['customers']:
+            del customer['id']
+        for order in engine.data['orders']:
+            del order['customer_id']
+        del engine.data['next_customer_id']
+        engine.save()
+        engine.close()
+
+        engine = self.open_engine()
+        try:
+            self.assertEqual(engine.data['customers'], [{'id': 1, 'name': 'Ada'}])
+            self.assertEqual(engine.customer_stats(engine.data['customers'][0])['spend'], 12.5)
+            self.assertEqual(engine.add_customer({'name': 'Bob'})['id'], 2)
+        finally:
+            engine.close()
+
+    def test_profit_and_loss(self):
+        engine = self.open_engine()
+        for order in ORDERS:
+            engine.create_order(order['items'], order['table'], date=order['date'], time=order['time'])
+        for expense in EXPENSES:
+            engine.add_expense(expense)
+        engine.close()
+
+        engine = self.open_engine()
+        try:
+            pnl = engine.profit_and_loss('2024-03-01', TODAY)
+            self.assertAlmostEqual(pnl['revenue'], 35.0)
+            self.assertAlmostEqual(pnl['expenses'], 115.5)
+            self.assertAlmostEqual(pnl['net_profit'], -80.5)
+            self.assertAlmostEqual(pnl['tax'], 35.0 * engine.data['tax_settings']['rate'])
+            self.assertEqual(pnl['by_category'], [('Supplies', 60.0), ('Utilities', 40.0), ('Other', 15.5)])
+            self.assertAlmostEqual(engine.profit_and_loss()['revenue'], 62.5)
+            self.assertIn('Period: 2024-03-01 to 2024-03-02', engine.financial_report('2024-03-01', TODAY))
+        finally:
+            engine.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
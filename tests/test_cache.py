@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+
+from restaurant_cache import ReportCache, cached_report
+from restaurant_engine import RestaurantEngine
+from restaurant_storage import JournalStore
+
+TODAY = '2024-03-02'
+BURGER = {'name': 'Burger', 'price': 12.5, 'cost': 4.0}
+
+
+class ReportCacheTest(unittest.TestCase):
+    """Least recently used eviction and hit counting"""
+
+    def test_least_recently_used_entry_goes_first(self):
+        cache = ReportCache(max_entries=2)
+        cache.put('sales', 'sales text')
+        cache.put('inventory', 'inventory text')
+        self.assertEqual(cache.get('sales'), 'sales text')
+        cache.put('customers', 'customers text')
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('inventory'))
+        self.assertEqual(cache.get('sales'), 'sales text')
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+        cache.clear()
+        self.assertIsNone(cache.get('sales'))
+
+
+class Reports:
+    """Owner of a cached report, counting how often it is really built"""
+
+    def __init__(self):
+        self.reports = ReportCache()
+        self.data_version = 0
+        self.builds = 0
+
+    @cached_report('sales')
+    def sales_report(self, start=None, end=None, task=None):
+        self.builds += 1
+        return f"sales {start} {end} v{self.data_version}"
+
+
+class CachedReportTest(unittest.TestCase):
+    """Report text keyed by name, arguments and data version"""
+
+    def test_report_is_built_once_per_version_and_arguments(self):
+        reports = Reports()
+        self.assertEqual(reports.sales_report(), 'sales None None v0')
+        self.assertEqual(reports.sales_report(task=object()), 'sales None None v0')
+        self.assertEqual(reports.builds, 1)
+        reports.sales_report('2024-03-01', TODAY)
+        reports.sales_report(start='2024-03-01', end=TODAY)
+        self.assertEqual(reports.builds, 3)
+        reports.data_version += 1
+        self.assertEqual(reports.sales_report(), 'sales None None v1')
+        self.assertEqual(reports.builds, 4)
+
+
+class EngineReportTest(unittest.TestCase):
+    """Engine reports stay cached until the data changes"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = RestaurantEngine(JournalStore(os.path.join(self.tmp.name, 'restaurant_data.json'),
+                                                    save_window=0))
+        self.engine.load(TODAY)
+
+    def tearDown(self):
+        self.engine.close()
+        self.tmp.cleanup()
+
+    def test_changes_invalidate_reports(self):
+        engine = self.engine
+        engine.create_order([BURGER], 1, date=TODAY, time='12:00')
+        report = engine.sales_report(TODAY)
+        self.assertIs(engine.sales_report(TODAY), report)
+        self.assertEqual(engine.reports.hits, 1)
+
+        engine.create_order([BURGER], 2, date=TODAY, time='12:30')
+        updated = engine.sales_report(TODAY)
+        self.assertIn('Total Orders: 2', updated)
+        self.assertNotEqual(updated, report)
+
+        financial = engine.financial_report()
+        engine.add_expense({'date': TODAY, 'amount': 10.0, 'category': 'Supplies'})
+        self.assertIn('Total Expenses: PKR10.00', engine.financial_report())
+        self.assertNotEqual(engine.financial_report(), financial)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import random
+import unittest
+from datetime import date, timedelta
+from unittest import mock
+
+import restaurant_columns
+from restaurant_columns import GROUP_KEYS, OrderColumns, WEEKDAYS
+
+MENU = [{'name': 'Burger', 'price': 12.5}, {'name': 'Soda', 'price': 2.5},
+        {'name': 'Salad', 'price': 8.0}, {'name': 'Cake', 'price': 6.25}]
+CUSTOMERS = ['Walk-in', 'Ada', 'Bob', 'Cy']
+
+
+def random_orders(count, seed=7):
+    """Orders spread over the end of January to the start of April, in no particular order"""
+    rng = random.Random(seed)
+    orders = []
+    for number in range(1, count + 1):
+        items = [rng.choice(MENU) for _ in range(rng.randint(1, 4))]
+        day = date(2024, 1, 25) + timedelta(days=rng.randrange(70))
+        orders.append({'id': number, 'table': str(rng.randint(1, 8)), 'customer': rng.choice(CUSTOMERS),
+                       'items': items, 'total': sum(item['price'] for item in items), 'date': day.isoformat(),
+                       'time': f"{rng.randint(8, 22):02d}:{rng.randrange(60):02d}", 'status': 'completed'})
+    return orders
+
+
+def label_of(key, order):
+    # The group an order falls into, worked out from the order dict alone
+    if key == 'day':
+        return order['date']
+    if key == 'month':
+        return order['date'][:7]
+    if key == 'weekday':
+        return WEEKDAYS[date.fromisoformat(order['date']).weekday()]
+    if key == 'hour':
+        return order['time'][:2]
+    if key == 'table':
+        return order['table']
+    return order['customer']
+
+
+def scan_groups(orders, key, start=None, end=None):
+    """What OrderColumns.group_by should return, by looping over the orders"""
+    groups = {}
+    for order in orders:
+        if (start is not None and order['date'] < start) or (end is not None and order['date'] > end):
+            continue
+        if key == 'item':
+            pairs = [(item['name'], item['price']) for item in order['items']]
+        else:
+            pairs = [(label_of(key, order), order['total'])]
+        for label, amount in pairs:
+            count, revenue = groups.get(label, (0, 0.0))
+            groups[label] = (count + 1, revenue + amount)
+    return groups
+
+
+class OrderColumnsTests:
+    """Column queries against a scan of the same orders, run with and without NumPy below"""
+
+    def setUp(self):
+        self.orders = random_orders(2000)
+        self.columns = OrderColumns(self.orders)
+
+    def assertGroupsEqual(self, groups, expected):
+        self.assertEqual(sorted(groups), sorted(expected))
+        for label, (count, revenue) in expected.items():
+            self.assertEqual(groups[label][0], count, label)
+            self.assertAlmostEqual(groups[label][1], revenue, places=6, msg=label)
+
+    def test_rows_are_sorted_by_time(self):
+        ordered = sorted(self.orders, key=lambda o: (o['date'], o['time']))
+        self.assertEqual(len(self.columns), 2000)
+        self.assertEqual(sorted(list(self.columns.ids)), list(range(1, 2001)))
+        days = [o['date'] for o in ordered]
+        first, last = self.columns.row_range('2024-02-01', '2024-02-29')
+        self.assertEqual((first, last), (days.index('2024-02-01'), len(days) - days[::-1].index('2024-02-29')))
+
+    def test_totals_in_range(self):
+        for start, end in ((None, None), ('2024-02-10', '2024-03-05'), ('2024-03-05', '2024-02-10')):
+            expected = [o['total'] for o in self.orders
+                        if (start is None or o['date'] >= start) and (end is None or o['date'] <= end)]
+            count, revenue = self.columns.totals_in_range(start, end)
+            self.assertEqual(count, len(expected))
+            self.assertAlmostEqual(revenue, sum(expected), places=6)
+
+    def test_group_by_matches_a_scan(self):
+        for key in GROUP_KEYS:
+            for start, end in ((None, None), ('2024-02-27', '2024-03-02'), ('2024-03-15', None)):
+                with self.subTest(key=key, start=start, end=end):
+                    self.assertGroupsEqual(self.columns.group_by(key, start, end),
+                                           scan_groups(self.orders, key, start, end))
+
+    def test_group_by_keeps_the_natural_order(self):
+        self.assertEqual(list(self.columns.group_by('month')), ['2024-01', '2024-02', '2024-03', '2024-04'])
+        days = list(self.columns.group_by('day', '2024-02-27', '2024-03-02'))
+        self.assertEqual(days, sorted(days))
+
+    def test_empty_range(self):
+        self.assertEqual(self.columns.totals_in_range('2025-01-01', '2025-12-31'), (0, 0.0))
+        for key in GROUP_KEYS:
+            self.assertEqual(self.columns.group_by(key, '2025-01-01'), {})
+        self.assertEqual(OrderColumns([]).group_by('day'), {})
+
+    def test_top(self):
+        expected = scan_groups(self.orders, 'customer', '2024-02-01', '2024-02-29')
+        by_revenue = sorted(expected, key=lambda label: expected[label][1], reverse=True)
+        top = self.columns.top('customer', 2, '2024-02-01', '2024-02-29')
+        self.assertEqual([label for label, _, _ in top], by_revenue[:2])
+        by_orders = self.columns.top('item', 1, by='orders')
+        items = scan_groups(self.orders, 'item')
+        self.assertEqual(by_orders[0][:2], max(((label, count) for label, (count, _) in items.items()),
+                                               key=lambda pair: pair[1]))
+
+    def test_unknown_key(self):
+        with self.assertRaises(ValueError):
+            self.columns.group_by('waiter')
+
+    def test_progress_is_reported(self):
+        fractions = []
+        OrderColumns(random_orders(restaurant_columns.PROGRESS_ROWS + 1), fractions.append)
+        self.assertEqual(fractions[0], 0)
+        self.assertEqual(fractions, sorted(fractions))
+        self.assertLess(fractions[-1], 1)
+
+
+@unittest.skipIf(restaurant_columns.np is None, 'NumPy is not installed')
+class NumpyOrderColumnsTest(OrderColumnsTests, unittest.TestCase):
+    pass
+
+
+class PurePythonOrderColumnsTest(OrderColumnsTests, unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(restaurant_columns, 'np', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super().setUp()
+
+
+if __name__ == '__main__':
+    unittest.main()
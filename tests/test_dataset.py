@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from benchmarks.dataset import generate_data, write_dataset
+from restaurant_engine import RestaurantEngine
+from restaurant_storage import open_store
+
+TODAY = date(2024, 3, 2)
+
+
+class GenerateDataTest(unittest.TestCase):
+    """The synthetic dataset behind the benchmarks"""
+
+    def test_same_seed_same_data(self):
+        self.assertEqual(generate_data(500, seed=3, today=TODAY), generate_data(500, seed=3, today=TODAY))
+        self.assertNotEqual(generate_data(500, seed=3, today=TODAY)['orders'],
+                            generate_data(500, seed=4, today=TODAY)['orders'])
+
+    def test_orders_and_totals(self):
+        data = generate_data(1000, days=30, today=TODAY)
+        orders = data['orders']
+        self.assertEqual([o['id'] for o in orders], list(range(1, 1001)))
+        self.assertEqual(data['next_order_id'], 1001)
+        days = sorted({o['date'] for o in orders})
+        self.assertEqual((len(days), days[0], days[-1]), (30, '2024-02-02', '2024-03-02'))
+        self.assertAlmostEqual(sum(data['daily_sales'].values()), sum(o['total'] for o in orders))
+        self.assertTrue(data['kitchen_orders'])
+        self.assertTrue(all(o['status'] == 'active' and o['date'] == '2024-03-02' for o in data['kitchen_orders']))
+        self.assertEqual(sum(data['item_sales'].values()), sum(len(o['items']) for o in orders))
+
+    def test_written_dataset_opens_in_the_engine(self):
+        data = generate_data(300, days=10, today=TODAY)
+        with tempfile.TemporaryDirectory() as tmp:
+            for backend, name in (('json', 'restaurant_data.json'), ('sqlite', 'restaurant_data.db')):
+                data_file = write_dataset(data, backend, os.path.join(tmp, name))
+                engine = RestaurantEngine(open_store(backend, data_file))
+                try:
+                    engine.load(TODAY.isoformat())
+                    self.assertEqual(engine.count_orders(), 300)
+                    self.assertEqual(len(engine.orders_in_range()), 300)
+                    self.assertEqual(len(engine.active_orders()), len(data['kitchen_orders']))
+                    self.assertEqual(engine.data['customer_stats'], data['customer_stats'])
+                finally:
+                    engine.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+from restaurant_engine import RestaurantEngine
+from restaurant_storage import JournalStore
+
+TODAY = '2024-03-02'
+BURGER = {'name': 'Burger', 'price': 12.5, 'cost': 4.0}
+SODA = {'name': 'Soda', 'price': 2.5, 'cost': 0.5}
+
+
+class EngineTestCase(unittest.TestCase):
+    """An engine over a journal store in a temporary directory"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.tmp.name, 'restaurant_data.json')
+        self.engine = self.open_engine()
+
+    def tearDown(self):
+        self.engine.close()
+        self.tmp.cleanup()
+
+    def open_engine(self):
+        engine = RestaurantEngine(JournalStore(self.data_file, save_window=0))
+        engine.load(TODAY)
+        return engine
+
+    def reopen(self):
+        self.engine.close()
+        self.engine = self.open_engine()
+
+
+class OrderIdTest(EngineTestCase):
+    """Order ids are handed out once, even across threads and reloads"""
+
+    def test_ids_stay_unique_across_threads(self):
+        def take_orders():
+            for number in range(2000):
+                self.engine.create_order([BURGER], number % 10 + 1, date=TODAY, time='12:00')
+
+        # Switch threads as often as possible so an unlocked id allocation shows
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=take_orders) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+
+        ids = [o['id'] for o in self.engine.data['orders']]
+        self.assertEqual(sorted(ids), list(range(1, 8001)))
+        self.assertEqual(len(self.engine.store.orders_by_id), 8000)
+        self.assertEqual(self.engine.count_orders(), 8000)
+        self.assertEqual(self.engine.data['next_order_id'], 8001)
+
+    def test_sequence_survives_reload(self):
+        for _ in range(3):
+            self.engine.create_order([BURGER], 1, date=TODAY, time='12:00')
+        self.reopen()
+        self.assertEqual(self.engine.create_order([SODA], 2, date=TODAY, time='12:05')['id'], 4)
+
+    def test_find_order(self):
+        order = self.engine.create_order([BURGER, SODA], 3, date=TODAY, time='12:00')
+        self.assertIs(self.engine.find_order(order['id']), order)
+        self.assertIsNone(self.engine.find_order(order['id'] + 1))
+        self.engine.mark_ready(order['id'])
+        self.reopen()
+        self.assertEqual(self.engine.find_order(order['id'])['status'], 'ready')
+        with self.assertRaises(KeyError):
+            self.engine.mark_ready(order['id'] + 1)
+
+
+class LoadTest(EngineTestCase):
+    """Starting empty only when there is no data file"""
+
+    def test_missing_file_starts_empty(self):
+        self.assertEqual(self.engine.data['orders'], [])
+        self.assertTrue(os.path.exists(self.data_file))
+
+    def test_unreadable_file_is_left_alone(self):
+        self.engine.create_order([BURGER], 1, date=TODAY, time='12:00')
+        self.engine.close()
+        with open(self.data_file, 'w') as f:
+            f.write('{"menu": {"Main Courses": [')
+        with self.assertRaises(ValueError):
+            self.engine = self.open_engine()
+        with open(self.data_file) as f:
+            self.assertEqual(f.read(), '{"menu": {"Main Courses": [')
+
+
+class OrderBatchTest(unittest.TestCase):
+    """create_orders_batch() against the same orders created one at a time"""
+
+    SPECS = [
+        {'items': [BURGER, SODA], 'table': 1, 'customer': 'Ada', 'date': '2024-03-01', 'time': '12:00'},
+        {'items': [BURGER], 'table': 2, 'date': '2024-03-01', 'time': '13:30', 'status': 'completed'},
+        {'items': [SODA, SODA], 'table': 1, 'customer': 'Ada', 'date': TODAY, 'time': '09:15'},
+        {'items': [BURGER], 'table': 4, 'date': TODAY, 'time': '19:45', 'status': 'ready'}
+    ]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def open_engine(self, name):
+        engine = RestaurantEngine(JournalStore(os.path.join(self.tmp.name, name), save_window=0))
+        engine.load(TODAY)
+        return engine
+
+    def test_batch_matches_single_orders(self):
+        single = self.open_engine('single.json')
+        single.add_customer({'name': 'Ada'})
+        for spec in self.SPECS:
+            order = single.create_order(spec['items'], spec['table'], spec.get('customer'),
+                                        spec['date'], spec['time'])
+            if 'status' in spec:
+                single.apply('order_status', {'id': order['id'], 'date': order['date'], 'status': spec['status']})
+        batch = self.open_engine('batch.json')
+        batch.add_customer({'name': 'Ada'})
+        version = batch.data_version
+        created = batch.create_orders_batch(self.SPECS)
+        try:
+            self.assertEqual([o['id'] for o in created], [1, 2, 3, 4])
+            self.assertGreater(batch.data_version, version)
+            self.assertEqual(batch.data['orders'], single.data['orders'])
+            for key in ('daily_sales', 'rollups', 'item_sales', 'customer_stats', 'next_order_id'):
+                self.assertEqual(batch.data[key], single.data[key], key)
+            self.assertEqual([o['id'] for o in batch.data['kitchen_orders']], [1, 3])
+            self.assertEqual(batch.dashboard_metrics(TODAY), single.dashboard_metrics(TODAY))
+        finally:
+            single.close()
+            batch.close()
+
+        batch = self.open_engine('batch.json')
+        try:
+            self.assertEqual(batch.orders_in_range(), created)
+            self.assertEqual([o['id'] for o in batch.active_orders()], [1, 3])
+        finally:
+            batch.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import json
+import os
+import tempfile
+import unittest
+
+from restaurant_instrumentation import OperationTimings, percentile, timed
+
+
+class PercentileTest(unittest.TestCase):
+
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertIsNone(percentile([], 50))
+
+
+class OperationTimingsTest(unittest.TestCase):
+    """Rolling statistics and the slow-operation log"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.tmp.name, 'slow_operations.log')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_log(self):
+        with open(self.log_file) as f:
+            return [json.loads(line) for line in f]
+
+    def test_stats_cover_the_window_and_count_everything(self):
+        timings = OperationTimings(slow_threshold=60, window=10)
+        for number in range(1, 21):
+            timings.record('save', number / 1000)
+        stats = timings.stats()['save']
+        self.assertEqual(stats['count'], 20)
+        self.assertEqual(stats['p50'], 0.015)
+        self.assertEqual(stats['max'], 0.02)
+        timings.reset()
+        self.assertEqual(timings.stats(), {})
+
+    def test_slow_operations_are_logged_with_context(self):
+        timings = OperationTimings(slow_threshold=0.1, log_file=self.log_file)
+        timings.context = lambda: {'user': 'admin', 'screen': 'orders'}
+        timings.record('open_orders', 0.05)
+        timings.record('open_orders', 0.3, {'rows': 1200})
+        entries = self.read_log()
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]['operation'], 'open_orders')
+        self.assertEqual(entries[0]['ms'], 300.0)
+        self.assertEqual((entries[0]['user'], entries[0]['screen'], entries[0]['rows']), ('admin', 'orders', 1200))
+
+    def test_failing_context_does_not_break_recording(self):
+        timings = OperationTimings(slow_threshold=0, log_file=self.log_file)
+        timings.context = lambda: 1 / 0
+        timings.record('save', 0.5)
+        self.assertEqual(timings.stats()['save']['count'], 1)
+
+    def test_disabled_timings_record_nothing(self):
+        timings = OperationTimings(enabled=False, slow_threshold=0, log_file=self.log_file)
+        with timings.measure('report'):
+            pass
+        self.assertEqual(timings.stats(), {})
+        self.assertFalse(os.path.exists(self.log_file))
+
+    def test_measure_and_timed(self):
+        class Screen:
+            current_screen = None
+
+            def __init__(self):
+                self.timings = OperationTimings(slow_threshold=60)
+
+            @timed('open_inventory', screen='inventory')
+            def open_inventory(self):
+                return 'opened'
+
+        screen = Screen()
+        self.assertEqual(screen.open_inventory(), 'opened')
+        self.assertEqual(screen.current_screen, 'inventory')
+        with screen.timings.measure('report'):
+            pass
+        self.assertEqual(sorted(screen.timings.stats()), ['open_inventory', 'report'])
+
+
+if __name__ == '__main__':
+    unittest.main()
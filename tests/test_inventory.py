@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+
+from restaurant_engine import RestaurantEngine
+from restaurant_inventory import StockMonitor
+from restaurant_storage import JournalStore
+
+TODAY = '2024-03-02'
+INVENTORY = {
+    'Buns': {'quantity': 40, 'unit': 'pcs', 'min_stock': 20},
+    'Cheese': {'quantity': 5, 'unit': 'kg', 'min_stock': 5},
+    'Lettuce': {'quantity': 1, 'unit': 'kg', 'min_stock': 3},
+    'Soda': {'quantity': 30, 'unit': 'cans', 'min_stock': 24}
+}
+
+
+class StockMonitorTest(unittest.TestCase):
+    """Low-stock set, urgency order and threshold crossings"""
+
+    def setUp(self):
+        self.monitor = StockMonitor(INVENTORY)
+        self.crossings = []
+        self.monitor.threshold_observer = lambda name, item, is_low: self.crossings.append((name, is_low))
+
+    def check_against_a_scan(self):
+        items = self.monitor.items
+        self.assertEqual(self.monitor.low_stock,
+                         {name for name, item in items.items() if item['quantity'] <= item['min_stock']})
+        self.assertEqual(self.monitor.by_urgency(),
+                         sorted(items, key=lambda name: (items[name]['quantity'] - items[name]['min_stock'], name)))
+
+    def test_initial_state(self):
+        self.assertEqual(self.monitor.low_items(), ['Lettuce', 'Cheese'])
+        self.assertEqual(self.monitor.by_urgency(), ['Lettuce', 'Cheese', 'Soda', 'Buns'])
+        self.assertTrue(self.monitor.is_low('Cheese'))
+        self.assertFalse(self.monitor.is_low('Buns'))
+        self.check_against_a_scan()
+
+    def test_crossings_are_reported_once(self):
+        self.monitor.update('Buns', {'quantity': 25, 'unit': 'pcs', 'min_stock': 20})
+        self.monitor.update('Buns', {'quantity': 20, 'unit': 'pcs', 'min_stock': 20})
+        self.monitor.update('Buns', {'quantity': 12, 'unit': 'pcs', 'min_stock': 20})
+        self.monitor.update('Lettuce', {'quantity': 10, 'unit': 'kg', 'min_stock': 3})
+        self.monitor.update('Cheese', {'quantity': 5, 'unit': 'kg', 'min_stock': 2})
+        self.assertEqual(self.crossings, [('Buns', True), ('Lettuce', False), ('Cheese', False)])
+        self.assertEqual(self.monitor.low_items(), ['Buns'])
+        self.check_against_a_scan()
+
+    def test_new_items(self):
+        self.monitor.update('Tomatoes', {'quantity': 0, 'unit': 'kg', 'min_stock': 4})
+        self.monitor.update('Napkins', {'quantity': 500, 'unit': 'pcs', 'min_stock': 100})
+        self.assertEqual(self.crossings, [('Tomatoes', True)])
+        self.assertEqual(self.monitor.low_items(), ['Tomatoes', 'Lettuce', 'Cheese'])
+        self.check_against_a_scan()
+
+    def test_rebuild_does_not_notify(self):
+        self.monitor.rebuild({'Buns': {'quantity': 0, 'unit': 'pcs', 'min_stock': 20}})
+        self.assertEqual(self.crossings, [])
+        self.assertEqual(self.monitor.low_items(), ['Buns'])
+
+
+class EngineStockTest(unittest.TestCase):
+    """The engine keeps its stock monitor in step with the inventory"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.tmp.name, 'restaurant_data.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def open_engine(self):
+        engine = RestaurantEngine(JournalStore(self.data_file, save_window=0))
+        engine.load(TODAY)
+        return engine
+
+    def test_inventory_changes_survive_reload(self):
+        engine = self.open_engine()
+        for name, item in INVENTORY.items():
+            engine.set_inventory_item(name, item)
+        engine.set_inventory_item('Soda', {'quantity': 6, 'unit': 'cans', 'min_stock': 24})
+        self.assertEqual(engine.stock.low_items(), ['Soda', 'Lettuce', 'Cheese'])
+        engine.close()
+
+        engine = self.open_engine()
+        try:
+            self.assertEqual(engine.stock.low_items(), ['Soda', 'Lettuce', 'Cheese'])
+            self.assertEqual(engine.data['inventory']['Soda']['quantity'], 6)
+        finally:
+            engine.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
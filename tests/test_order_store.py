@@ -0,0 +1,189 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from restaurant_engine import RestaurantEngine
+from restaurant_storage import BackgroundWriter, DayIndex, JournalStore, SqliteStore
+
+TODAY = '2024-03-02'
+BURGER = {'name': 'Burger', 'price': 12.5, 'cost': 4.0}
+
+
+class RecordingWriter(BackgroundWriter):
+    """Writer that keeps its batches in memory, failing while failing is set"""
+
+    def __init__(self, save_window=0.05):
+        super().__init__(save_window)
+        self.batches = []
+        self.failing = False
+
+    def _prepare_change(self, change, payload):
+        return change, payload
+
+    def _write_changes(self, batch):
+        if self.failing:
+            raise OSError(28, 'No space left on device')
+        self.batches.append(batch)
+
+
+class BackgroundWriterTest(unittest.TestCase):
+    """Coalescing changes and writing them on the writer thread"""
+
+    def test_burst_is_written_as_one_batch(self):
+        writer = RecordingWriter(save_window=0.2)
+        for number in range(5):
+            writer.append('expense_added', {'amount': float(number)})
+        writer.flush()
+        self.assertEqual(len(writer.batches), 1)
+        self.assertEqual([payload['amount'] for _, payload in writer.batches[0]], [0.0, 1.0, 2.0, 3.0, 4.0])
+        self.assertEqual(writer.pending_writes, 0)
+        self.assertIsNotNone(writer.status()['last_save_latency'])
+        writer.close()
+
+    def test_failed_write_is_kept_and_retried(self):
+        writer = RecordingWriter(save_window=0)
+        writer.failing = True
+        writer.append('expense_added', {'amount': 1.0})
+        with self.assertRaises(OSError):
+            writer.flush()
+        self.assertEqual(writer.pending_writes, 1)
+        self.assertIsInstance(writer.status()['last_error'], OSError)
+
+        writer.failing = False
+        writer.flush()
+        self.assertEqual(writer.batches, [[('expense_added', {'amount': 1.0})]])
+        self.assertIsNone(writer.status()['last_error'])
+        writer.close()
+
+    def test_close_returns_when_writes_keep_failing(self):
+        writer = RecordingWriter()
+        writer.failing = True
+        writer.append('expense_added', {'amount': 1.0})
+        started = time.monotonic()
+        with self.assertRaises(OSError):
+            writer.close()
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(writer.pending_writes, 1)
+
+
+class DayIndexTest(unittest.TestCase):
+    """Orders grouped by sorted day"""
+
+    def setUp(self):
+        self.index = DayIndex()
+        for day in ('2024-02-10', '2024-01-05', '2024-02-01'):
+            self.index.add_known_day(day)
+        self.index.set_day('2024-02-20', [{'id': 7, 'date': '2024-02-20'}])
+
+    def test_days_stay_sorted(self):
+        self.assertEqual(self.index.days, ['2024-01-05', '2024-02-01', '2024-02-10', '2024-02-20'])
+        self.assertEqual(self.index.days_in_range('2024-02-01', '2024-02-19'), ['2024-02-01', '2024-02-10'])
+        self.assertEqual(self.index.days_in_range(end='2024-01-31'), ['2024-01-05'])
+        self.assertEqual(self.index.days_in_range('2024-03-01'), [])
+
+    def test_unloaded_days(self):
+        self.assertTrue(self.index.needs_loading('2024-02-10'))
+        self.assertFalse(self.index.needs_loading('2024-02-20'))
+        self.assertFalse(self.index.needs_loading('2024-03-01'))
+        self.assertEqual(self.index.unloaded_days('2024-02-01'), ['2024-02-01', '2024-02-10'])
+        self.index.set_day('2024-02-10', [])
+        self.assertEqual(self.index.unloaded_days('2024-02-01'), ['2024-02-01'])
+
+    def test_orders_in_range(self):
+        self.index.add_order({'id': 8, 'date': '2024-02-20'})
+        self.index.add_order({'id': 9, 'date': '2024-01-30'})
+        self.assertEqual([o['id'] for o in self.index.orders_in_range()], [9, 7, 8])
+        self.assertEqual([o['id'] for o in self.index.orders_in_range('2024-02-01')], [7, 8])
+        self.assertEqual(self.index.days[1], '2024-01-30')
+
+
+class OrderStoreTests:
+    """Behaviour shared by every store, run against each backend below"""
+
+    def open_store(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        engine = RestaurantEngine(self.open_store())
+        engine.load(TODAY)
+        for day in ('2024-02-01', '2024-02-02', '2024-02-03'):
+            for _ in range(3):
+                engine.mark_ready(engine.create_order([BURGER], 1, date=day, time='12:00')['id'])
+        self.open_id = engine.create_order([BURGER], 2, date='2024-02-02', time='13:00')['id']
+        engine.create_order([BURGER], 3, date=TODAY, time='12:00')
+        # A full save, so no journal tail makes the journal store read older days
+        engine.save()
+        engine.close()
+
+        self.store = self.open_store()
+        self.data = self.store.load(TODAY)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_loads_today_and_open_days_only(self):
+        self.assertEqual(sorted(o['date'] for o in self.data['orders']), ['2024-02-02'] * 4 + [TODAY])
+        self.assertEqual(self.store.count_orders(), 11)
+        self.assertEqual(self.store.count_orders('2024-02-01'), 3)
+        self.assertEqual(self.store.order_counts_by_day(),
+                         {'2024-02-01': 3, '2024-02-02': 4, '2024-02-03': 3, TODAY: 1})
+        self.assertEqual([o['id'] for o in self.store.orders_with_status('active')], [self.open_id, 11])
+        self.assertIsNone(self.store.find_order(1))
+
+    def test_load_orders_keeps_the_days(self):
+        orders = self.store.load_orders('2024-02-01', '2024-02-01')
+        self.assertEqual([o['id'] for o in orders], [1, 2, 3])
+        self.assertIs(self.store.find_order(1), orders[0])
+        self.assertEqual(len(self.data['orders']), 8)
+
+    def test_read_orders_does_not_keep_the_days(self):
+        orders = self.store.read_orders('2024-02-01', '2024-02-03')
+        self.assertEqual(sorted(o['id'] for o in orders), list(range(1, 11)))
+        self.assertEqual(len(self.data['orders']), 5)
+        self.assertIsNone(self.store.find_order(1))
+
+    def test_concurrent_loads_read_each_day_once(self):
+        threads = [threading.Thread(target=self.store.load_orders) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        ids = [o['id'] for o in self.data['orders']]
+        self.assertEqual(sorted(ids), list(range(1, 12)))
+
+    def test_new_order_on_an_older_day_loads_it_first(self):
+        order = {'id': 12, 'table': '1', 'customer': 'Walk-in', 'items': [BURGER], 'total': 12.5,
+                 'date': '2024-02-01', 'time': '18:00', 'status': 'active'}
+        self.data['orders'].append(order)
+        self.store.append('order_created', order)
+        self.assertEqual([o['id'] for o in self.store.load_orders('2024-02-01', '2024-02-01')], [1, 2, 3, 12])
+        self.assertEqual(self.store.count_orders('2024-02-01'), 4)
+        self.assertEqual([o['id'] for o in self.store.orders_with_status('active')], [self.open_id, 11, 12])
+
+    def test_engine_range_filter(self):
+        engine = RestaurantEngine(self.store)
+        engine.load(TODAY)
+        self.assertEqual([o['id'] for o in engine.recent_orders('2024-02-02', '2024-02-03')],
+                         [self.open_id, 9, 8, 7, 6, 5, 4])
+        self.assertEqual([o['id'] for o in engine.recent_orders(TODAY, TODAY)], [11])
+        self.assertEqual(engine.orders_in_range('2024-02-04', '2024-03-01'), [])
+
+
+class JournalStoreTest(OrderStoreTests, unittest.TestCase):
+
+    def open_store(self):
+        return JournalStore(os.path.join(self.tmp.name, 'restaurant_data.json'), save_window=0)
+
+
+class SqliteStoreTest(OrderStoreTests, unittest.TestCase):
+
+    def open_store(self):
+        return SqliteStore(os.path.join(self.tmp.name, 'restaurant_data.db'), save_window=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+from restaurant_engine import RestaurantEngine
+from restaurant_search import MenuIndex
+from restaurant_storage import JournalStore
+
+TODAY = '2024-03-02'
+MENU = {
+    'Main Courses': [{'name': 'Chicken Burger', 'price': 12.5}, {'name': 'Beef Burger', 'price': 14.0},
+                     {'name': 'Chicken Karahi', 'price': 18.0}],
+    'Beverages': [{'name': 'Mint Lemonade', 'price': 4.0}, {'name': 'Cola', 'price': 2.5}],
+    'Desserts': [{'name': 'Chocolate Cake', 'price': 6.0}]
+}
+
+
+class MenuIndexTest(unittest.TestCase):
+    """Prefix matches first, then trigram matches for typos and inner text"""
+
+    def setUp(self):
+        self.index = MenuIndex(MENU)
+
+    def names(self, query, limit=None):
+        return [self.index.entries[number][1]['name'] for number in self.index.search(query, limit)]
+
+    def test_entries_keep_menu_order(self):
+        self.assertEqual([category for category, _ in self.index.entries],
+                         ['Main Courses'] * 3 + ['Beverages'] * 2 + ['Desserts'])
+
+    def test_prefix_of_any_word(self):
+        self.assertEqual(self.names('bur'), ['Chicken Burger', 'Beef Burger'])
+        self.assertEqual(self.names('CH'), ['Chicken Burger', 'Chicken Karahi', 'Chocolate Cake'])
+        self.assertEqual(self.names('lem'), ['Mint Lemonade'])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.names('beef bur'), ['Beef Burger'])
+        # Chicken Karahi only shares trigrams with the query, so it comes after the full match
+        self.assertEqual(self.names('chi bur'), ['Chicken Burger', 'Chicken Karahi'])
+
+    def test_typo_and_inner_text(self):
+        self.assertEqual(self.names('burgr'), ['Chicken Burger', 'Beef Burger'])
+        self.assertEqual(self.names('monade'), ['Mint Lemonade'])
+        self.assertEqual(self.names('xyz'), [])
+
+    def test_empty_query_and_limit(self):
+        self.assertEqual(len(self.names('')), 6)
+        self.assertEqual(self.names('   ', limit=2), ['Chicken Burger', 'Beef Burger'])
+        self.assertEqual(self.names('ch', limit=1), ['Chicken Burger'])
+
+    def test_matches_a_scan_for_every_word_prefix(self):
+        for category, item in self.index.entries:
+            for word in item['name'].lower().split():
+                for length in range(1, len(word) + 1):
+                    prefix = word[:length]
+                    expected = [entry[1]['name'] for entry in self.index.entries
+                                if any(w.startswith(prefix) for w in entry[1]['name'].lower().split())]
+                    self.assertEqual(self.names(prefix)[:len(expected)], expected, prefix)
+
+
+class EngineMenuIndexTest(unittest.TestCase):
+    """The engine's index follows menu changes"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = RestaurantEngine(JournalStore(os.path.join(self.tmp.name, 'restaurant_data.json'),
+                                                    save_window=0))
+        self.engine.load(TODAY)
+
+    def tearDown(self):
+        self.engine.close()
+        self.tmp.cleanup()
+
+    def test_new_items_are_found(self):
+        index = self.engine.menu_index()
+        self.assertIs(self.engine.menu_index(), index)
+        self.engine.add_menu_item('Main Courses', {'name': 'Zinger Wrap', 'price': 9.0, 'cost': 3.0})
+        index = self.engine.menu_index()
+        self.assertEqual([index.entries[number][1]['name'] for number in index.search('zing')], ['Zinger Wrap'])
+
+
+if __name__ == '__main__':
+    unittest.main()
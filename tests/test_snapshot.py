@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+
+from restaurant_storage import JournalStore, decode_snapshot, encode_snapshot, is_packable_order
+
+TODAY = '2024-03-02'
+BURGER = {'name': 'Burger', 'price': 12.5, 'cost': 4.0}
+SODA = {'name': 'Soda', 'price': 2.5, 'cost': 0.5}
+
+
+class BinarySnapshotTest(unittest.TestCase):
+    """Encoding and decoding the packed binary format"""
+
+    def test_round_trip(self):
+        data = {
+            'menu': {'Main Courses': [BURGER]},
+            'tax_settings': {'rate': 0.08, 'name': 'Sales Tax'},
+            'orders': [
+                {'id': 1, 'table': '4', 'customer': 'Walk-in', 'items': [BURGER, SODA], 'total': 15.0,
+                 'date': TODAY, 'time': '12:30', 'status': 'active'},
+                {'id': 2, 'table': '2', 'customer': 'Ada', 'customer_id': 7, 'items': [SODA], 'total': 2.5,
+                 'date': TODAY, 'time': '12:45', 'status': 'completed'},
+                {'id': 3, 'table': '1', 'customer': 'Walk-in', 'items': [], 'total': 0.0,
+                 'date': '2024-03-01', 'time': '09:00', 'status': 'ready'}
+            ]
+        }
+        self.assertEqual(decode_snapshot(encode_snapshot(data)), data)
+
+    def test_unpackable_orders_keep_their_place(self):
+        orders = [
+            {'id': 1, 'table': '4', 'customer': 'Walk-in', 'items': [BURGER], 'total': 12.5,
+             'date': TODAY, 'time': '12:30', 'status': 'active'},
+            # An extra key, an integer total, an item with a quantity and a missing field
+            {'id': 2, 'table': '2', 'customer': 'Ada', 'items': [SODA], 'total': 2.5,
+             'date': TODAY, 'time': '12:45', 'status': 'active', 'note': 'no ice'},
+            {'id': 3, 'table': '3', 'customer': 'Walk-in', 'items': [BURGER], 'total': 12,
+             'date': TODAY, 'time': '13:00', 'status': 'active'},
+            {'id': 4, 'table': '3', 'customer': 'Walk-in', 'items': [dict(SODA, quantity=2)], 'total': 5.0,
+             'date': TODAY, 'time': '13:05', 'status': 'active'},
+            {'id': 5, 'table': '3', 'customer': 'Walk-in', 'items': [], 'total': 0.0, 'date': TODAY},
+            {'id': 6, 'table': '5', 'customer': 'Walk-in', 'items': [SODA], 'total': 2.5,
+             'date': TODAY, 'time': '13:10', 'status': 'active'}
+        ]
+        decoded = decode_snapshot(encode_snapshot({'orders': orders}))
+        self.assertEqual(decoded['orders'], orders)
+        self.assertIs(type(decoded['orders'][2]['total']), int)
+
+    def test_rejects_other_files(self):
+        with self.assertRaises(ValueError):
+            decode_snapshot(b'{"orders": []}')
+
+    def test_packable_orders(self):
+        order = {'id': 1, 'table': '4', 'customer': 'Walk-in', 'items': [BURGER], 'total': 12.5,
+                 'date': TODAY, 'time': '12:30', 'status': 'active'}
+        self.assertTrue(is_packable_order(order))
+        self.assertTrue(is_packable_order(dict(order, customer_id=3)))
+        self.assertFalse(is_packable_order(dict(order, customer_id=0)))
+        self.assertFalse(is_packable_order(dict(order, total=12)))
+        self.assertFalse(is_packable_order(dict(order, table=4)))
+
+
+class BinaryStoreTest(unittest.TestCase):
+    """The journal store writing binary snapshot and day files"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.tmp.name, 'restaurant_data.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def save(self, snapshot_format, data):
+        store = JournalStore(self.data_file, snapshot_format=snapshot_format)
+        store.save(data)
+        store.close()
+
+    def load(self):
+        store = JournalStore(self.data_file)
+        data = store.load(TODAY)
+        store.load_orders()
+        store.close()
+        return data
+
+    def test_either_format_is_read_back(self):
+        data = {'menu': {'Beverages': [SODA]}, 'kitchen_orders': [], 'daily_sales': {TODAY: 2.5},
+                'orders': [{'id': 1, 'table': '4', 'customer': 'Walk-in', 'items': [SODA], 'total': 2.5,
+                            'date': TODAY, 'time': '12:30', 'status': 'completed'}]}
+        self.save('binary', data)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, 'restaurant_data.snap')))
+        self.assertFalse(os.path.exists(self.data_file))
+        self.assertEqual(self.load()['orders'], data['orders'])
+
+        # Switching back replaces the binary files with JSON ones
+        self.save('json', data)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, 'restaurant_data.snap')))
+        loaded = self.load()
+        self.assertEqual(loaded['orders'], data['orders'])
+        self.assertEqual(loaded['menu'], data['menu'])
+
+    def test_unknown_format_is_rejected(self):
+        with self.assertRaises(ValueError):
+            JournalStore(self.data_file, snapshot_format='xml')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+
+from restaurant_engine import RestaurantEngine
+from restaurant_storage import SqliteStore
+
+TODAY = '2024-03-02'
+BURGER = {'name': 'Burger', 'price': 12.5, 'cost': 4.0}
+SODA = {'name': 'Soda', 'price': 2.5, 'cost': 0.5}
+
+
+def open_engine(store):
+    """Engine over a store, loaded as of TODAY"""
+    engine = RestaurantEngine(store)
+    engine.load(TODAY)
+    return engine
+
+
+def take_orders(engine, count, date=TODAY):
+    """Create count orders on a date and return them"""
+    return [engine.create_order([BURGER, SODA] if number % 2 else [BURGER], number % 10 + 1,
+                                date=date, time=f"{10 + number % 12:02d}:{number % 60:02d}")
+            for number in range(count)]
+
+
+class SqliteRoundTripTest(unittest.TestCase):
+    """Saving everything to SQLite and loading it back"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.tmp.name, 'restaurant_data.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_save_and_load(self):
+        engine = open_engine(SqliteStore(self.data_file, save_window=0))
+        engine.add_menu_item('Main Courses', BURGER)
+        engine.add_menu_item('Beverages', SODA)
+        engine.add_customer({'name': 'Ada', 'phone': '555-0100'})
+        engine.add_employee({'name': 'Sam', 'role': 'Chef'})
+        engine.add_expense({'date': TODAY, 'amount': 40.0, 'category': 'Supplies'})
+        take_orders(engine, 4, '2024-03-01')
+        ada_order = engine.create_order([BURGER], 3, customer='Ada', date=TODAY, time='19:30')
+        engine.mark_ready(take_orders(engine, 3)[0]['id'])
+        engine.save()
+        saved = engine.data
+        engine.close()
+
+        engine = open_engine(SqliteStore(self.data_file))
+        try:
+            data = engine.data
+            for key in ('menu', 'inventory', 'customers', 'employees', 'expenses', 'tax_settings',
+                        'next_order_id', 'next_customer_id', 'rollups', 'item_sales', 'customer_stats'):
+                self.assertEqual(data[key], saved[key], key)
+            self.assertEqual(dict(data['daily_sales']), dict(saved['daily_sales']))
+            self.assertEqual([o['id'] for o in data['kitchen_orders']], [o['id'] for o in saved['kitchen_orders']])
+            self.assertEqual(engine.orders_in_range(), sorted(saved['orders'], key=lambda o: (o['date'], o['id'])))
+            self.assertEqual(engine.find_order(ada_order['id'])['customer_id'], 1)
+            self.assertEqual(engine.store.order_counts_by_day(), {'2024-03-01': 4, TODAY: 4})
+        finally:
+            engine.close()
+
+    def test_changes_are_written_without_a_save(self):
+        engine = open_engine(SqliteStore(self.data_file, save_window=0))
+        engine.add_menu_item('Main Courses', BURGER)
+        engine.add_customer({'name': 'Ada', 'phone': '555-0100'})
+        orders = take_orders(engine, 3, '2024-03-01') + take_orders(engine, 2)
+        engine.create_order([SODA], 5, customer='Ada', date=TODAY, time='20:00')
+        engine.mark_ready(orders[0]['id'])
+        for order in take_orders(engine, 2, '2024-02-20'):
+            engine.mark_ready(order['id'])
+        expected = {key: engine.data[key] for key in ('menu', 'inventory', 'customers', 'next_order_id',
+                                                      'next_customer_id', 'rollups', 'item_sales', 'customer_stats')}
+        engine.close()
+
+        engine = open_engine(SqliteStore(self.data_file))
+        try:
+            for key, value in expected.items():
+                self.assertEqual(engine.data[key], value, key)
+            self.assertEqual(engine.count_orders(), 8)
+            self.assertEqual(engine.store.count_orders('2024-03-01'), 3)
+            self.assertEqual(engine.find_order(orders[0]['id'])['status'], 'ready')
+            self.assertEqual([o['id'] for o in engine.active_orders()], [o['id'] for o in orders[1:]] + [6])
+            # Only today and the days with open orders are read on load
+            self.assertEqual(len(engine.data['orders']), 6)
+            self.assertEqual([o['id'] for o in engine.orders_in_range('2024-02-20', '2024-02-20')], [7, 8])
+            self.assertEqual(len(engine.data['orders']), 8)
+        finally:
+            engine.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+import json
+import os
+import tempfile
+import unittest
+
+from restaurant_engine import RestaurantEngine
+from restaurant_storage import JournalStore, SqliteStore, migrate_json_to_sqlite
+
+TODAY = '2024-03-02'
+BURGER = {'name': 'Burger', 'price': 12.5, 'cost': 4.0}
+SODA = {'name': 'Soda', 'price': 2.5, 'cost': 0.5}
+
+
+def open_engine(store):
+    """Engine over a store, loaded as of TODAY"""
+    engine = RestaurantEngine(store)
+    engine.load(TODAY)
+    return engine
+
+
+def take_orders(engine, count, date=TODAY):
+    """Create count orders on a date and return them"""
+    return [engine.create_order([BURGER, SODA] if number % 2 else [BURGER], number % 10 + 1,
+                                date=date, time=f"{10 + number % 12:02d}:{number % 60:02d}")
+            for number in range(count)]
+
+
+class JournalReplayTest(unittest.TestCase):
+    """Changes written to the journal but never folded into the snapshot"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.tmp.name, 'restaurant_data.json')
+        self.journal_file = os.path.join(self.tmp.name, 'restaurant_data.journal')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_orders(self):
+        # Snapshot first, then orders that only ever reach the journal
+        engine = open_engine(JournalStore(self.data_file, save_window=0))
+        orders = take_orders(engine, 3) + take_orders(engine, 2, '2024-03-01')
+        engine.mark_ready(orders[0]['id'])
+        engine.flush()
+        engine.close()
+        return orders
+
+    def test_replay_after_crash(self):
+        orders = self.write_orders()
+        with open(self.data_file) as f:
+            self.assertEqual(json.load(f)['_journal_seq'], 0)
+
+        engine = open_engine(JournalStore(self.data_file))
+        try:
+            loaded = engine.orders_in_range()
+            self.assertEqual(sorted(o['id'] for o in loaded), [o['id'] for o in orders])
+            self.assertEqual(engine.find_order(orders[0]['id'])['status'], 'ready')
+            self.assertEqual([o['id'] for o in engine.active_orders()], [o['id'] for o in orders[1:]])
+            self.assertEqual(engine.data['next_order_id'], orders[-1]['id'] + 1)
+            self.assertAlmostEqual(engine.data['daily_sales'][TODAY], sum(o['total'] for o in orders[:3]))
+            self.assertEqual(engine.count_orders(), len(orders))
+        finally:
+            engine.close()
+
+    def test_torn_final_line_is_ignored(self):
+        orders = self.write_orders()
+        with open(self.journal_file, 'a') as f:
+            f.write('{"seq": 99, "change": "order_created", "data": {"id": 99, "tab')
+
+        engine = open_engine(JournalStore(self.data_file))
+        try:
+            self.assertEqual(engine.count_orders(), len(orders))
+            self.assertIsNone(engine.find_order(99))
+            self.assertEqual(engine.data['next_order_id'], orders[-1]['id'] + 1)
+        finally:
+            engine.close()
+
+    def test_interrupted_compaction_is_replayed(self):
+        orders = self.write_orders()
+        os.replace(self.journal_file, self.journal_file + '.compacting')
+
+        engine = open_engine(JournalStore(self.data_file))
+        try:
+            self.assertEqual(len(engine.orders_in_range()), len(orders))
+            self.assertEqual(engine.find_order(orders[0]['id'])['status'], 'ready')
+        finally:
+            engine.close()
+
+
+class CompactionTest(unittest.TestCase):
+    """Folding the journal into the snapshot and day files"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.tmp.name, 'restaurant_data.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def check_reload(self, snapshot_format):
+        store = JournalStore(self.data_file, compact_every=5, save_window=0, snapshot_format=snapshot_format)
+        engine = open_engine(store)
+        orders = take_orders(engine, 7) + take_orders(engine, 6, '2024-02-28')
+        engine.mark_ready(orders[2]['id'])
+        engine.add_expense({'date': TODAY, 'amount': 40.0, 'category': 'Supplies'})
+        engine.flush()
+        store.wait_for_compaction()
+        engine.close()
+        self.assertFalse(os.path.exists(store.compacting_file))
+
+        engine = open_engine(JournalStore(self.data_file, snapshot_format=snapshot_format))
+        try:
+            self.assertEqual(engine.store.order_counts_by_day(), {TODAY: 7, '2024-02-28': 6})
+            loaded = sorted(engine.orders_in_range(), key=lambda o: o['id'])
+            self.assertEqual(loaded, sorted(orders, key=lambda o: o['id']))
+            self.assertEqual(len(engine.active_orders()), len(orders) - 1)
+            self.assertEqual(engine.data['expenses'], [{'date': TODAY, 'amount': 40.0, 'category': 'Supplies'}])
+            self.assertEqual(engine.data['item_sales'], {'Burger': 13, 'Soda': 6})
+        finally:
+            engine.close()
+
+    def test_reload_after_compaction(self):
+        self.check_reload('json')
+
+    def test_reload_after_binary_compaction(self):
+        self.check_reload('binary')
+
+
+class LegacyDataFileTest(unittest.TestCase):
+    """A data file written before orders were split by day"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.tmp.name, 'restaurant_data.json')
+        orders = [{'id': number, 'table': '1', 'customer': 'Walk-in', 'items': [BURGER], 'total': 12.5,
+                   'date': f"2024-03-0{number % 2 + 1}", 'time': '12:00',
+                   'status': 'active' if number == 4 else 'completed'} for number in range(1, 6)]
+        self.legacy = {'menu': {'Main Courses': [BURGER]}, 'inventory': {}, 'customers': [], 'expenses': [],
+                       'employees': [], 'daily_sales': {'2024-03-01': 25.0, TODAY: 37.5},
+                       'orders': orders, 'kitchen_orders': [orders[3]]}
+        with open(self.data_file, 'w') as f:
+            json.dump(self.legacy, f)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_orders_are_split_by_day(self):
+        store = JournalStore(self.data_file)
+        data = store.load(TODAY)
+        store.close()
+        self.assertEqual(sorted(os.listdir(os.path.join(self.tmp.name, 'restaurant_data_orders'))),
+                         ['2024-03-01.json', '2024-03-02.json'])
+        with open(self.data_file) as f:
+            self.assertNotIn('orders', json.load(f))
+        self.assertEqual(sorted(o['id'] for o in data['orders']), [1, 2, 3, 4, 5])
+        self.assertEqual([o['id'] for o in data['kitchen_orders']], [4])
+        self.assertEqual(store.order_counts_by_day(), {'2024-03-01': 2, TODAY: 3})
+
+    def test_migration_leaves_the_source_alone(self):
+        with open(self.data_file, 'rb') as f:
+            before = f.read()
+        db_file = os.path.join(self.tmp.name, 'restaurant_data.db')
+        migrate_json_to_sqlite(self.data_file, db_file)
+
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ['restaurant_data.db', 'restaurant_data.json'])
+        with open(self.data_file, 'rb') as f:
+            self.assertEqual(f.read(), before)
+        store = SqliteStore(db_file)
+        try:
+            store.load(TODAY)
+            self.assertEqual(sorted(o['id'] for o in store.load_orders()), [1, 2, 3, 4, 5])
+            self.assertEqual([o['id'] for o in store.orders_with_status('active')], [4])
+        finally:
+            store.close()
+
+    def test_read_only_store_refuses_writes(self):
+        store = JournalStore(self.data_file, read_only=True)
+        data = store.load(TODAY)
+        try:
+            with self.assertRaises(ValueError):
+                store.append('expense_added', {'amount': 1.0})
+            with self.assertRaises(ValueError):
+                store.save(data)
+        finally:
+            store.close()
+        self.assertEqual(os.listdir(self.tmp.name), ['restaurant_data.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,209 @@
+import threading
+import time
+import unittest
+
+from restaurant_tasks import Scheduler, TaskCancelled, TaskRunner, report_progress
+
+
+class FakeRoot:
+    """Stands in for the Tk root: after() callbacks run on a virtual clock"""
+
+    def __init__(self):
+        self.now = 0
+        self.pending = {}
+        self.next_id = 0
+
+    def after(self, delay_ms, func):
+        self.next_id += 1
+        self.pending[self.next_id] = (self.now + delay_ms, self.next_id, func)
+        return self.next_id
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def advance(self, ms):
+        """Run every callback due in the next ms milliseconds, in time order"""
+        until = self.now + ms
+        while self.pending:
+            due, after_id, func = min(self.pending.values())
+            if due > until:
+                break
+            del self.pending[after_id]
+            self.now = due
+            func()
+        self.now = until
+
+    def run_until(self, condition, timeout=5):
+        """Keep firing timers until condition() holds, giving worker threads real time to finish"""
+        deadline = time.monotonic() + timeout
+        while not condition() and self.pending and time.monotonic() < deadline:
+            self.advance(min(due for due, _, _ in self.pending.values()) - self.now)
+            time.sleep(0.001)
+        return condition()
+
+
+class FakeWidget:
+    """A scope with Tk's bind() and a destroy() that fires <Destroy> like Tk does"""
+
+    def __init__(self, parent=None):
+        self.bindings = []
+        self.children = []
+        if parent is not None:
+            parent.children.append(self)
+
+    def bind(self, sequence, func, add=None):
+        self.bindings.append(func)
+
+    def destroy(self):
+        for child in self.children:
+            child.destroy()
+        # Tk reports the destruction of every child to the parent's bindings too
+        for widget in [self] + self.children:
+            event = type('Event', (), {'widget': widget})()
+            for func in self.bindings:
+                func(event)
+
+
+class SchedulerTest(unittest.TestCase):
+    """Named timers grouped by scope"""
+
+    def setUp(self):
+        self.root = FakeRoot()
+        self.scheduler = Scheduler(self.root)
+        self.calls = []
+
+    def test_every_repeats_until_cancelled(self):
+        self.scheduler.every('clock', 'tick', 1000, lambda: self.calls.append(self.root.now))
+        self.root.advance(3500)
+        self.assertEqual(self.calls, [1000, 2000, 3000])
+        self.scheduler.cancel('clock')
+        self.root.advance(5000)
+        self.assertEqual(len(self.calls), 3)
+        self.assertEqual(self.root.pending, {})
+
+    def test_duplicates_coalesce(self):
+        for _ in range(5):
+            self.scheduler.once('kitchen', 'refresh', 200, lambda: self.calls.append('refresh'))
+            self.scheduler.every('kitchen', 'poll', 1000, lambda: self.calls.append('poll'))
+        self.assertEqual(self.scheduler.active('kitchen'), 2)
+        self.root.advance(1000)
+        self.assertEqual(self.calls, ['refresh', 'poll'])
+        # Once it has fired, the same name can be scheduled again
+        self.scheduler.once('kitchen', 'refresh', 200, lambda: self.calls.append('refresh'))
+        self.assertEqual(self.scheduler.active('kitchen'), 2)
+
+    def test_cancel_one_name_or_a_whole_scope(self):
+        self.scheduler.every('kitchen', 'poll', 100, lambda: self.calls.append('poll'))
+        self.scheduler.every('kitchen', 'clock', 100, lambda: self.calls.append('clock'))
+        self.scheduler.every('orders', 'poll', 100, lambda: self.calls.append('orders'))
+        self.scheduler.cancel('kitchen', 'poll')
+        self.root.advance(100)
+        self.assertEqual(sorted(self.calls), ['clock', 'orders'])
+        self.scheduler.cancel('kitchen')
+        self.assertEqual((self.scheduler.active('kitchen'), self.scheduler.active()), (0, 1))
+        self.scheduler.shutdown()
+        self.assertEqual((self.scheduler.active(), self.root.pending), (0, {}))
+
+    def test_timer_can_cancel_its_own_scope(self):
+        def tick():
+            self.calls.append('tick')
+            self.scheduler.cancel('kitchen')
+
+        self.scheduler.every('kitchen', 'poll', 100, tick)
+        self.root.advance(1000)
+        self.assertEqual(self.calls, ['tick'])
+        self.assertEqual(self.root.pending, {})
+
+    def test_failing_timer_keeps_repeating(self):
+        def tick():
+            self.calls.append('tick')
+            raise RuntimeError('widget gone')
+
+        self.scheduler.every('clock', 'tick', 100, tick)
+        with self.assertRaises(RuntimeError):
+            self.root.advance(100)
+        self.assertEqual(self.scheduler.active('clock'), 1)
+
+    def test_destroying_a_widget_cancels_its_timers(self):
+        screen = FakeWidget()
+        label = FakeWidget(screen)
+        self.scheduler.every(screen, 'clock', 1000, lambda: self.calls.append('clock'))
+        self.scheduler.every(screen, 'refresh', 30000, lambda: self.calls.append('refresh'))
+        self.scheduler.every(label, 'blink', 500, lambda: self.calls.append('blink'))
+        self.assertEqual(len(screen.bindings), 1)
+        screen.destroy()
+        self.assertEqual(self.scheduler.active(), 0)
+        self.root.advance(60000)
+        self.assertEqual(self.calls, [])
+
+
+class TaskRunnerTest(unittest.TestCase):
+    """Results, errors and progress handed back through the scheduler"""
+
+    def setUp(self):
+        self.root = FakeRoot()
+        self.scheduler = Scheduler(self.root)
+        self.runner = TaskRunner(self.scheduler, poll_ms=10)
+        self.results = []
+        self.errors = []
+
+    def tearDown(self):
+        self.runner.shutdown()
+
+    def test_result_is_handed_back(self):
+        task = self.runner.submit('sum', lambda task: sum(range(10)), self.results.append, self.errors.append)
+        self.assertEqual(self.scheduler.active(self.runner), 1)
+        self.assertTrue(self.root.run_until(lambda: self.results))
+        self.assertEqual(self.results, [45])
+        self.assertEqual(self.errors, [])
+        self.assertTrue(task.done)
+        self.assertEqual(self.runner.active(), 0)
+        # The poll stops once nothing is running
+        self.assertEqual(self.scheduler.active(), 0)
+
+    def test_error_is_handed_back(self):
+        self.runner.submit('fail', lambda task: 1 / 0, self.results.append, self.errors.append)
+        self.assertTrue(self.root.run_until(lambda: self.errors))
+        self.assertIsInstance(self.errors[0], ZeroDivisionError)
+        self.assertEqual(self.results, [])
+
+    def test_progress_and_cancel(self):
+        started = threading.Event()
+        release = threading.Event()
+        progress = []
+
+        def work(task):
+            report_progress(task, 0.5)
+            started.set()
+            release.wait(5)
+            report_progress(task, 0.9)
+            return 'finished'
+
+        task = self.runner.submit('report', work, self.results.append, self.errors.append, progress.append)
+        started.wait(5)
+        self.root.advance(10)
+        self.assertEqual(progress, [0.5])
+        task.cancel()
+        release.set()
+        self.assertTrue(self.root.run_until(lambda: task.done))
+        self.assertEqual((self.results, self.errors), ([], []))
+        with self.assertRaises(TaskCancelled):
+            task.step(1)
+
+    def test_callback_can_submit_another_task(self):
+        self.runner.submit('first', lambda task: 1, lambda result: (
+            self.results.append(result), self.runner.submit('second', lambda task: 2, self.results.append)))
+        self.assertTrue(self.root.run_until(lambda: len(self.results) == 2))
+        self.assertEqual(self.results, [1, 2])
+
+    def test_shutdown_cancels_running_tasks(self):
+        release = threading.Event()
+        task = self.runner.submit('slow', lambda task: release.wait(5), self.results.append)
+        self.runner.shutdown()
+        release.set()
+        self.assertTrue(task.cancelled)
+        self.assertEqual((self.runner.active(), self.scheduler.active()), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,422 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import restaurant_widgets
+from restaurant_engine import RestaurantEngine
+from restaurant_storage import JournalStore
+from restaurant_widgets import ScreenManager, VirtualTreeview, WidgetPool
+
+TODAY = '2024-03-02'
+BURGER = {'name': 'Burger', 'price': 12.5, 'cost': 4.0}
+
+
+class FakeFrame:
+    """Records what ScreenManager does with a frame, without a display"""
+
+    def __init__(self, parent=None, bg=None):
+        self.packed = False
+        self.destroyed = False
+
+    def cget(self, option):
+        return '#ffffff'
+
+    def pack(self, **options):
+        self.packed = True
+
+    def pack_forget(self):
+        self.packed = False
+
+    def destroy(self):
+        self.destroyed = True
+
+
+class FakeTreeview:
+    """The parts of ttk.Treeview that VirtualTreeview uses, counting every row operation"""
+
+    def __init__(self, parent, columns, show=None, **options):
+        self.children = []
+        self.rows = {}
+        self.selected = ()
+        self.operations = {'insert': 0, 'item': 0, 'delete': 0, 'move': 0}
+
+    def heading(self, column, **options):
+        pass
+
+    def column(self, column, **options):
+        pass
+
+    def bind(self, sequence, func):
+        pass
+
+    def get_children(self):
+        return tuple(self.children)
+
+    def insert(self, parent, position, iid, values, tags):
+        self.operations['insert'] += 1
+        self.children.insert(position, iid)
+        self.rows[iid] = values
+
+    def item(self, iid, values, tags):
+        self.operations['item'] += 1
+        self.rows[iid] = values
+
+    def delete(self, *iids):
+        self.operations['delete'] += len(iids)
+        for iid in iids:
+            self.children.remove(iid)
+            del self.rows[iid]
+        self.selected = tuple(iid for iid in self.selected if iid not in iids)
+
+    def move(self, iid, parent, position):
+        self.operations['move'] += 1
+        self.children.remove(iid)
+        self.children.insert(position, iid)
+
+    def selection(self):
+        return self.selected
+
+    def selection_set(self, iid):
+        self.selected = (iid,)
+
+    def selection_remove(self, *iids):
+        self.selected = ()
+
+    def yview_moveto(self, fraction):
+        pass
+
+    def focus(self, iid):
+        pass
+
+    def see(self, iid):
+        pass
+
+
+class FakeScrollbar:
+
+    def __init__(self, parent, orient=None, command=None):
+        self.position = None
+
+    def set(self, first, last):
+        self.position = (first, last)
+
+
+class TreeTestCase(unittest.TestCase):
+    """A VirtualTreeview over 1000 orders, on a fake tree"""
+
+    def setUp(self):
+        for name, fake in (('Treeview', FakeTreeview), ('Scrollbar', FakeScrollbar)):
+            patcher = mock.patch.object(restaurant_widgets.ttk, name, fake)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.orders = [{'id': number, 'total': number * 2.5} for number in range(1, 1001)]
+        self.view = VirtualTreeview(None, ('ID', 'Total'), lambda o: (o['id'], f"{o['total']:.2f}"),
+                                    lambda o: o['id'], buffer=5)
+        self.view.set_rows(self.orders)
+
+    def shown_ids(self):
+        return [int(iid) for iid in self.view.tree.get_children()]
+
+
+class VirtualTreeviewTest(TreeTestCase):
+    """Only the rows in view, plus the buffer, are put in the tree"""
+
+    def test_only_the_window_is_inserted(self):
+        self.assertEqual(len(self.view), 1000)
+        self.assertEqual(self.shown_ids(), list(range(1, 26)))
+        self.assertEqual(self.view.tree.rows['3'], (3, '7.50'))
+        self.assertEqual(self.view.scrollbar.position, (0, 0.02))
+
+    def test_scrolling_moves_the_window(self):
+        self.view.scroll(10)
+        self.assertEqual(self.shown_ids(), list(range(11, 36)))
+        self.view._on_scrollbar('moveto', '0.5')
+        self.assertEqual(self.shown_ids()[0], 501)
+        self.view._on_scrollbar('scroll', '1', 'pages')
+        self.assertEqual(self.view.first, 520)
+        self.view.scroll_to(5000)
+        self.assertEqual(self.shown_ids(), list(range(981, 1001)))
+        self.view.scroll(-5000)
+        self.assertEqual(self.view.first, 0)
+
+    def test_refresh_keeps_the_position_unless_reset(self):
+        self.view.scroll(100)
+        self.view.set_rows(self.orders[:500])
+        self.assertEqual(self.view.first, 100)
+        self.view.set_rows(self.orders[:50])
+        self.assertEqual(self.view.first, 30)
+        self.view.set_rows(self.orders, reset=True)
+        self.assertEqual(self.view.first, 0)
+
+    def test_keyboard_selection_scrolls_with_it(self):
+        self.assertIsNone(self.view.selected_row())
+        self.view.move_selection(1)
+        self.assertEqual(self.view.selected_row()['id'], 1)
+        self.view.move_selection(25)
+        self.assertEqual(self.view.selected_row()['id'], 26)
+        self.assertEqual(self.view.first, 6)
+        self.assertEqual(self.view.tree.selection(), ('26',))
+        self.view.move_selection(len(self.orders))
+        self.assertEqual(self.view.selected_row()['id'], 1000)
+        self.view.move_selection(-len(self.orders))
+        self.assertEqual((self.view.selected_row()['id'], self.view.first), (1, 0))
+
+
+class TreeReconcileTest(TreeTestCase):
+    """Refreshing touches only the rows that changed"""
+
+    def operations(self):
+        counts = dict(self.view.tree.operations)
+        for name in self.view.tree.operations:
+            self.view.tree.operations[name] = 0
+        return counts
+
+    def test_unchanged_refresh_does_nothing(self):
+        self.operations()
+        self.view.set_rows(list(self.orders))
+        self.assertEqual(self.operations(), {'insert': 0, 'item': 0, 'delete': 0, 'move': 0})
+
+    def test_one_changed_row_is_updated(self):
+        self.operations()
+        self.orders[2] = {'id': 3, 'total': 99.0}
+        self.view.set_rows(self.orders)
+        self.assertEqual(self.operations(), {'insert': 0, 'item': 1, 'delete': 0, 'move': 0})
+        self.assertEqual(self.view.tree.rows['3'], (3, '99.00'))
+
+    def test_new_row_at_the_top(self):
+        self.operations()
+        self.view.insert_row(0, {'id': 1001, 'total': 1.0})
+        # One row in, the last row of the window out, nothing else touched
+        self.assertEqual(self.operations(), {'insert': 1, 'item': 0, 'delete': 1, 'move': 0})
+        self.assertEqual(self.shown_ids(), [1001] + list(range(1, 25)))
+
+    def test_new_row_above_the_window_keeps_the_view(self):
+        self.view.scroll(100)
+        self.operations()
+        self.view.insert_row(0, {'id': 1001, 'total': 1.0})
+        self.assertEqual(self.operations(), {'insert': 0, 'item': 0, 'delete': 0, 'move': 0})
+        self.assertEqual(self.shown_ids()[0], 101)
+
+    def test_reordered_rows_are_moved(self):
+        self.operations()
+        self.view.set_rows(self.orders[1::-1] + self.orders[2:])
+        counts = self.operations()
+        self.assertEqual((counts['insert'], counts['delete'], counts['item']), (0, 0, 0))
+        self.assertEqual(self.shown_ids()[:3], [2, 1, 3])
+
+    def test_selection_follows_the_entry(self):
+        self.view.move_selection(1)
+        self.view.move_selection(4)
+        self.view.insert_row(0, {'id': 1001, 'total': 1.0})
+        self.assertEqual(self.view.selected_row()['id'], 5)
+        self.assertEqual(self.view.tree.selection(), ('5',))
+        self.view.set_rows([order for order in self.orders if order['id'] != 5])
+        self.assertIsNone(self.view.selected_row())
+        self.assertEqual(self.view.tree.selection(), ())
+
+
+class FakeCard:
+    """A packable widget that keeps its parent's packing order"""
+
+    def __init__(self, parent):
+        self.parent = parent
+        self.entry = None
+
+    def pack(self, after=None, before=None, **options):
+        packed = self.parent.packed
+        if self in packed:
+            packed.remove(self)
+        if after is not None:
+            packed.insert(packed.index(after) + 1, self)
+        elif before is not None:
+            packed.insert(packed.index(before), self)
+        else:
+            packed.append(self)
+
+    def pack_forget(self):
+        if self in self.parent.packed:
+            self.parent.packed.remove(self)
+
+
+class WidgetPoolTest(unittest.TestCase):
+    """Kitchen cards kept per order and reused for new orders"""
+
+    def setUp(self):
+        self.parent = type('Parent', (), {})()
+        self.parent.packed = []
+        self.created = 0
+        self.filled = []
+        self.pool = WidgetPool(self.parent, self.create, self.fill, lambda order: order['id'], fill='x')
+
+    def create(self, parent):
+        self.created += 1
+        return FakeCard(parent)
+
+    def fill(self, card, order):
+        self.filled.append(order['id'])
+        card.entry = order
+
+    def shown(self):
+        return [card.entry['id'] for card in self.parent.packed]
+
+    def orders(self, *ids):
+        return [{'id': number} for number in ids]
+
+    def test_cards_are_kept_and_reused(self):
+        self.pool.show(self.orders(1, 2, 3))
+        self.assertEqual((self.shown(), self.created), ([1, 2, 3], 3))
+        cards = dict(self.pool.shown)
+
+        # Order 2 is ready and order 4 comes in: 4 takes over 2's card
+        self.filled.clear()
+        self.pool.show(self.orders(1, 3, 4))
+        self.assertEqual(self.shown(), [1, 3, 4])
+        self.assertEqual(self.created, 3)
+        self.assertEqual(self.filled, [4])
+        self.assertIs(self.pool.shown[1], cards[1])
+        self.assertIs(self.pool.shown[4], cards[2])
+
+    def test_new_entries_keep_their_place(self):
+        self.pool.show(self.orders(2, 4))
+        self.pool.show(self.orders(1, 2, 3, 4, 5))
+        self.assertEqual(self.shown(), [1, 2, 3, 4, 5])
+        self.assertEqual(self.filled, [2, 4, 1, 3, 5])
+
+    def test_reordered_entries(self):
+        self.pool.show(self.orders(1, 2, 3))
+        self.filled.clear()
+        self.pool.show(self.orders(3, 1, 2))
+        self.assertEqual(self.shown(), [3, 1, 2])
+        self.assertEqual((self.filled, self.created), ([], 3))
+
+    def test_clear_keeps_the_cards(self):
+        self.pool.show(self.orders(1, 2))
+        self.pool.clear()
+        self.assertEqual(self.shown(), [])
+        self.pool.show(self.orders(7, 8, 9))
+        self.assertEqual((self.shown(), self.created), ([7, 8, 9], 3))
+
+
+class FakeScheduler:
+
+    def __init__(self):
+        self.cancelled = []
+
+    def cancel(self, scope, name=None):
+        self.cancelled.append(scope)
+
+
+class ScreenManagerTest(unittest.TestCase):
+    """Screens built once, refreshed or rebuilt only when the data version moved"""
+
+    def setUp(self):
+        patcher = mock.patch.object(restaurant_widgets.tk, 'Frame', FakeFrame)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.version = 0
+        self.scheduler = FakeScheduler()
+        self.screens = ScreenManager(FakeFrame(), lambda: self.version, self.scheduler)
+        self.calls = []
+
+    def build(self, name):
+        return lambda frame: self.calls.append(('build', name))
+
+    def refresh(self, name):
+        return lambda: self.calls.append(('refresh', name))
+
+    def test_screens_are_built_once(self):
+        orders = self.screens.show('orders', self.build('orders'), self.refresh('orders'))
+        menu = self.screens.show('menu', self.build('menu'))
+        self.assertFalse(orders.packed)
+        self.assertEqual(self.scheduler.cancelled, [orders])
+        self.assertIs(self.screens.show('orders', self.build('orders'), self.refresh('orders')), orders)
+        self.assertTrue(orders.packed)
+        self.assertFalse(menu.packed)
+        self.assertEqual(self.calls, [('build', 'orders'), ('build', 'menu')])
+
+    def test_changed_data_refreshes_or_rebuilds(self):
+        orders = self.screens.show('orders', self.build('orders'), self.refresh('orders'))
+        reports = self.screens.show('reports', self.build('reports'), rebuild=True)
+        settings = self.screens.show('settings', self.build('settings'))
+        self.calls.clear()
+        self.version += 1
+
+        self.assertIs(self.screens.show('orders', self.build('orders'), self.refresh('orders')), orders)
+        self.assertIsNot(self.screens.show('reports', self.build('reports'), rebuild=True), reports)
+        self.assertTrue(reports.destroyed)
+        self.assertIs(self.screens.show('settings', self.build('settings')), settings)
+        self.assertEqual(self.calls, [('refresh', 'orders'), ('build', 'reports')])
+
+        # Up to date now, so showing them again does nothing
+        self.calls.clear()
+        self.screens.show('orders', self.build('orders'), self.refresh('orders'))
+        self.assertEqual(self.calls, [])
+
+    def test_refresh_and_touch(self):
+        self.screens.show('kitchen', self.build('kitchen'), self.refresh('kitchen'))
+        self.screens.refresh()
+        self.version += 1
+        self.screens.refresh()
+        self.assertEqual(self.calls, [('build', 'kitchen'), ('refresh', 'kitchen')])
+
+        # A screen that updated itself in place is not refreshed again
+        self.version += 1
+        self.screens.touch('kitchen')
+        self.screens.show('kitchen', self.build('kitchen'), self.refresh('kitchen'))
+        self.assertEqual(len(self.calls), 2)
+
+    def test_on_show_runs_every_time(self):
+        shown = []
+        for _ in range(3):
+            self.screens.show('kitchen', self.build('kitchen'), on_show=shown.append)
+        self.assertEqual(len(shown), 3)
+        self.assertEqual(len(set(map(id, shown))), 1)
+
+
+class DataVersionTest(unittest.TestCase):
+    """Every change to the engine's data moves its version"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = RestaurantEngine(JournalStore(os.path.join(self.tmp.name, 'restaurant_data.json'),
+                                                    save_window=0))
+        self.engine.load(TODAY)
+
+    def tearDown(self):
+        self.engine.close()
+        self.tmp.cleanup()
+
+    def test_changes_bump_the_version(self):
+        engine = self.engine
+        order = engine.create_order([BURGER], 1, date=TODAY, time='12:00')
+        changes = [
+            lambda: engine.create_order([BURGER], 2, date=TODAY, time='12:05'),
+            lambda: engine.create_orders_batch([{'items': [BURGER], 'table': 3, 'date': TODAY, 'time': '12:10'}]),
+            lambda: engine.mark_ready(order['id']),
+            lambda: engine.add_menu_item('Main Courses', {'name': 'Wrap', 'price': 9.0, 'cost': 3.0}),
+            lambda: engine.set_inventory_item('Buns', {'quantity': 5, 'unit': 'pcs', 'min_stock': 10}),
+            lambda: engine.add_customer({'name': 'Ada'}),
+            lambda: engine.add_expense({'date': TODAY, 'amount': 5.0, 'category': 'Other'}),
+            lambda: engine.add_employee({'name': 'Sam', 'role': 'Waiter'}),
+            lambda: engine.load(TODAY),
+            engine.reset
+        ]
+        for change in changes:
+            version = engine.data_version
+            change()
+            self.assertGreater(engine.data_version, version)
+
+    def test_reads_leave_the_version_alone(self):
+        engine = self.engine
+        engine.create_order([BURGER], 1, date=TODAY, time='12:00')
+        version = engine.data_version
+        engine.sales_report(TODAY)
+        engine.orders_in_range()
+        engine.dashboard_metrics(TODAY)
+        engine.save()
+        self.assertEqual(engine.data_version, version)
+
+
+if __name__ == '__main__':
+    unittest.main()